@@ -1,6 +1,7 @@
 from typing import List
 
 from apps.lwsc.lwscdb import engine, Base
+from apps.lwsc import lwscmigrations
 
 from apps.lwsc.models.bill_rate_model import BillRate
 from apps.lwsc.routes import auth_routes
@@ -24,6 +25,7 @@ from apps.lwsc.routes import transaction_routes
 from apps.lwsc.routes import complaint_routes
 from apps.lwsc.routes import complaint_department_routes
 from apps.lwsc.routes import complaint_stages_routes
+from apps.lwsc.routes import consumption_rollup_routes
 
 APP_ROUTE = "/lwsc"
 
@@ -83,6 +85,7 @@ def include_lwsc_routes(app):
     app.include_router(meter_reading_routes.router, prefix=APP_ROUTE)
     app.include_router(meter_status_routes.router, prefix=APP_ROUTE)
     app.include_router(dashboard_routes.router, prefix=APP_ROUTE)
+    app.include_router(consumption_rollup_routes.router, prefix=APP_ROUTE)
     
     app.include_router(transaction_routes.router, prefix=APP_ROUTE)
     app.include_router(transaction_type_routes.router, prefix=APP_ROUTE)
@@ -95,4 +98,5 @@ def include_lwsc_routes(app):
 async def init_lwsc_db(app):
     async with engine.begin() as conn:
         print("Application lwsc starting up old...")
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(lwscmigrations.upgrade)
\ No newline at end of file
@@ -0,0 +1,134 @@
+import asyncio
+import sys
+from datetime import date, datetime
+
+from sqlalchemy.future import select
+
+from apps.lwsc.models.attachment_model import AttachmentDB
+from apps.lwsc.models.complaint_model import ComplaintDB
+from apps.lwsc.models.customer_model import CustomerDB
+from apps.lwsc.models.meter_reading_model import MeterReadingDB
+from apps.lwsc.models.transaction_model import TransactionDB
+from apps.lwsc.models.user_model import UserDB
+from helpers import assist
+from helpers.migrations import (
+    add_columns,
+    check_queries,
+    create_indexes,
+    get_index,
+    run_migrations,
+)
+
+# migrations in the order they are applied, never reorder or rename
+MIGRATIONS = [
+    (
+        "0001_hot_lookup_indexes",
+        create_indexes(
+            get_index(MeterReadingDB, "ix_meter_readings_customer_period"),
+            get_index(MeterReadingDB, "ix_meter_readings_customer_status_read"),
+            get_index(MeterReadingDB, "ix_meter_readings_period_date"),
+            get_index(CustomerDB, "ix_customers_account"),
+            get_index(CustomerDB, "ix_customers_mobile"),
+            get_index(CustomerDB, "ix_customers_route_id"),
+            get_index(UserDB, "ix_users_code"),
+            get_index(TransactionDB, "ix_transactions_customer_id"),
+            get_index(ComplaintDB, "ix_complaints_customer_id"),
+        ),
+    ),
+    ("0002_attachment_sha256", add_columns(AttachmentDB, "sha256")),
+]
+
+# hot queries and the index each one must be planned with
+HOT_QUERIES = [
+    (
+        "upload reading in period",
+        select(MeterReadingDB.id).where(
+            MeterReadingDB.customer_id == 1,
+            MeterReadingDB.period_date == date(2025, 1, 1),
+        ),
+        "ix_meter_readings_customer_period",
+    ),
+    (
+        "previous approved reading",
+        select(MeterReadingDB.id)
+        .where(
+            MeterReadingDB.customer_id == 1,
+            MeterReadingDB.status_id == assist.STATUS_APPROVED,
+            MeterReadingDB.read_date < datetime(2025, 1, 1),
+        )
+        .order_by(MeterReadingDB.read_date.desc())
+        .limit(1),
+        "ix_meter_readings_customer_status_read",
+    ),
+    (
+        "customer by account",
+        select(CustomerDB.id).where(CustomerDB.account == "0"),
+        "ix_customers_account",
+    ),
+    (
+        "customer by mobile",
+        select(CustomerDB.id).where(CustomerDB.mobile == "0"),
+        "ix_customers_mobile",
+    ),
+    (
+        "user by code",
+        select(UserDB.id).where(UserDB.code == "0"),
+        "ix_users_code",
+    ),
+    (
+        "customer transactions",
+        select(TransactionDB.id).where(TransactionDB.customer_id == 1),
+        "ix_transactions_customer_id",
+    ),
+    (
+        "customer complaints",
+        select(ComplaintDB.id).where(ComplaintDB.customer_id == 1),
+        "ix_complaints_customer_id",
+    ),
+]
+
+
+def upgrade(conn):
+    return run_migrations(conn, MIGRATIONS)
+
+
+def check(conn):
+    return check_queries(conn, HOT_QUERIES)
+
+
+async def main(command: str):
+    from apps.lwsc import lwscapp  # noqa: F401 registers all lwsc models
+    from apps.lwsc.lwscdb import Base, engine
+
+    async with engine.begin() as conn:
+        if command == "upgrade":
+            await conn.run_sync(Base.metadata.create_all)
+            result = await conn.run_sync(upgrade)
+        else:
+            result = await conn.run_sync(check)
+
+    await engine.dispose()
+
+    return result
+
+
+if __name__ == "__main__":
+    # python -m apps.lwsc.lwscmigrations [upgrade|check]
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+
+    if command not in ("upgrade", "check"):
+        sys.exit(f"Unknown command '{command}', use upgrade or check")
+
+    result = asyncio.run(main(command))
+
+    if command == "upgrade":
+        print(f"Migrations applied: {result or 'none'}")
+    elif result:
+        for name, index, used in result:
+            print(
+                f"{name}: expected {index}, planned with {sorted(used) or 'no index'}"
+            )
+
+        sys.exit(1)
+    else:
+        print("All hot queries use their index")
@@ -0,0 +1,141 @@
+import asyncio
+import sys
+
+from sqlalchemy import Integer, cast, delete, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from apps.lwsc.models.consumption_rollup_model import ConsumptionRollupDB
+from apps.lwsc.models.customer_model import CustomerDB
+from apps.lwsc.models.meter_reading_model import MeterReadingDB
+from helpers import assist
+
+ROLLUP_KEY = ["year", "month", "district_id", "cat_id", "route_id"]
+
+ROLLUP_VALUES = [
+    "readings",
+    "consumption_m3_sum",
+    "consumption_m3_count",
+    "consumption_zmw_sum",
+    "consumption_zmw_count",
+    "consumption_daily_sum",
+    "consumption_daily_count",
+    "consumption_days_sum",
+    "consumption_days_count",
+]
+
+READ_YEAR = cast(func.extract("year", MeterReadingDB.read_date), Integer)
+READ_MONTH = cast(func.extract("month", MeterReadingDB.read_date), Integer)
+
+
+def get_rollup_select(*criteria):
+    """
+    Aggregates meter readings matching the criteria into rollup rows
+    """
+    columns = [
+        MeterReadingDB.consumption_m3,
+        MeterReadingDB.consumption_zmw,
+        MeterReadingDB.consumption_daily,
+        MeterReadingDB.consumption_days,
+    ]
+
+    values = [func.count(MeterReadingDB.id)]
+
+    for column in columns:
+        values.append(func.coalesce(func.sum(column), 0))
+        values.append(func.count(column))
+
+    return (
+        select(
+            READ_YEAR,
+            READ_MONTH,
+            CustomerDB.district_id,
+            CustomerDB.cat_id,
+            CustomerDB.route_id,
+            *values,
+            func.now(),
+        )
+        .join(CustomerDB, MeterReadingDB.customer_id == CustomerDB.id)
+        .where(*criteria)
+        .group_by(
+            READ_YEAR,
+            READ_MONTH,
+            CustomerDB.district_id,
+            CustomerDB.cat_id,
+            CustomerDB.route_id,
+        )
+    )
+
+
+def get_rollup_insert(*criteria):
+    table = ConsumptionRollupDB.__table__
+
+    stmt = insert(table).from_select(
+        ROLLUP_KEY + ROLLUP_VALUES + ["updated_at"], get_rollup_select(*criteria)
+    )
+
+    # add to the totals already rolled up for the key
+    return stmt.on_conflict_do_update(
+        constraint="uq_consumption_rollups_key",
+        set_={
+            **{name: table.c[name] + stmt.excluded[name] for name in ROLLUP_VALUES},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+async def add_reading_to_rollup(reading_id: int, db: AsyncSession):
+    """
+    Adds an approved meter reading to the consumption rollups
+
+    Runs in the caller's transaction so the rollup is committed together
+    with the approval of the reading.
+
+    Args:
+        reading_id (int): The id of the approved meter reading.
+        db (AsyncSession): The session of the approval.
+    """
+    await db.execute(get_rollup_insert(MeterReadingDB.id == reading_id))
+
+
+async def rebuild_consumption_rollups(db: AsyncSession, years: list | None = None):
+    """
+    Recomputes the consumption rollups from the approved meter readings
+
+    Args:
+        db (AsyncSession): The session to rebuild in. The caller commits.
+        years (list): The years to rebuild. All years are rebuilt if not given.
+    """
+    criteria = [MeterReadingDB.status_id == assist.STATUS_APPROVED]
+    stmt = delete(ConsumptionRollupDB)
+
+    if years is not None:
+        criteria.append(READ_YEAR.in_(years))
+        stmt = stmt.where(ConsumptionRollupDB.year.in_(years))
+
+    await db.execute(stmt)
+    await db.execute(get_rollup_insert(*criteria))
+
+
+async def backfill(years: list | None = None):
+    from apps.lwsc import lwscapp  # noqa: F401 registers all lwsc models
+    from apps.lwsc.lwscdb import AsyncSessionLocal, Base, engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionLocal() as db:
+        await rebuild_consumption_rollups(db, years)
+        await db.commit()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    # python -m apps.lwsc.lwscrollup [year ...]
+    years = [int(year) for year in sys.argv[1:]] or None
+
+    asyncio.run(backfill(years))
+
+    print(f"Consumption rollups rebuilt for {years or 'all years'}")
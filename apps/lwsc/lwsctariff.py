@@ -0,0 +1,137 @@
+import asyncio
+import json
+import os
+from bisect import bisect_left
+from itertools import accumulate
+
+import numpy as np
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from apps.lwsc.models.bill_rate_model import BillRateDB
+from apps.lwsc.models.customer_category_model import CategoryDB
+
+RATES_FILE = os.path.join(os.path.dirname(__file__), "rates.json")
+
+_tariffs: dict | None = None
+_version = 0
+_lock = asyncio.Lock()
+
+
+class Tariff:
+    """
+    The billing bands of a customer category, precomputed for lookups
+
+    Gives the same totals as lwscapp.get_consumption_rate: the rates of the
+    leading bands whose upper volume is below the consumption are summed.
+    Bands stop at the first one whose upper volume reaches the consumption,
+    which is the first position where the running maximum of the upper
+    volumes reaches it, so the band count is a bisect over that maximum.
+    """
+
+    __slots__ = ("boundaries", "totals")
+
+    def __init__(self, bands):
+        # bands as (to_vol, rate) in band order
+        self.boundaries = list(accumulate((band[0] for band in bands), max))
+        self.totals = [0.0] + list(accumulate(band[1] for band in bands))
+
+    def get_rate(self, consumption: float) -> float:
+        return self.totals[bisect_left(self.boundaries, consumption)]
+
+    def get_rates(self, consumption: np.ndarray) -> np.ndarray:
+        """
+        Gets the charge of each consumption in an array at once
+        """
+        bands = np.searchsorted(self.boundaries, consumption, side="left")
+        return np.asarray(self.totals)[bands]
+
+
+EMPTY_TARIFF = Tariff([])
+
+
+def load_default_bands():
+    """
+    Loads the default billing bands in rates.json, keyed by category name
+    """
+    with open(RATES_FILE, "r") as f:
+        categories = json.load(f)
+
+    return {
+        category["name"].lower(): [
+            (band["end_vol"], band["rate"])
+            for band in sorted(category["bands"], key=lambda band: band["order"])
+        ]
+        for category in categories
+    }
+
+
+async def build_tariffs(db: AsyncSession):
+    # configured bill rates
+    result = await db.execute(
+        select(BillRateDB.cat_id, BillRateDB.to_vol, BillRateDB.rate).order_by(
+            BillRateDB.cat_id, BillRateDB.order
+        )
+    )
+
+    bands = {}
+
+    for row in result.all():
+        bands.setdefault(row.cat_id, []).append((row.to_vol, row.rate))
+
+    # categories without configured rates use the defaults
+    result = await db.execute(select(CategoryDB.id, CategoryDB.cat_name))
+    defaults = load_default_bands()
+
+    for row in result.all():
+        if row.id not in bands and row.cat_name.lower() in defaults:
+            bands[row.id] = defaults[row.cat_name.lower()]
+
+    return {cat_id: Tariff(catBands) for cat_id, catBands in bands.items()}
+
+
+async def get_tariffs(db: AsyncSession):
+    """
+    Gets the tariffs of all categories, building them on first use
+
+    Args:
+        db (AsyncSession): The session used to build the tariffs when needed.
+
+    Returns:
+        dict: The tariffs keyed by category id.
+    """
+    global _tariffs
+
+    tariffs = _tariffs
+
+    if tariffs is not None:
+        return tariffs
+
+    async with _lock:
+        if _tariffs is None:
+            version = _version
+            tariffs = await build_tariffs(db)
+
+            # do not keep a build that was invalidated while loading
+            if version == _version:
+                _tariffs = tariffs
+
+            return tariffs
+
+        return _tariffs
+
+
+async def get_tariff(cat_id: int, db: AsyncSession) -> Tariff:
+    tariffs = await get_tariffs(db)
+    return tariffs.get(cat_id, EMPTY_TARIFF)
+
+
+def invalidate_tariffs():
+    """
+    Drops the cached tariffs. Call after bill rates or categories change
+    """
+    global _tariffs, _version
+
+    _version += 1
+    _tariffs = None
@@ -0,0 +1,80 @@
+from sqlalchemy import Column, Float, ForeignKey, Integer, DateTime, UniqueConstraint
+from pydantic import BaseModel
+from typing import Optional
+from apps.lwsc.lwscdb import Base
+from datetime import datetime
+
+
+# ---------- SQLAlchemy Models ----------
+class ConsumptionRollupDB(Base):
+    __tablename__ = "consumption_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "year",
+            "month",
+            "district_id",
+            "cat_id",
+            "route_id",
+            name="uq_consumption_rollups_key",
+        ),
+    )
+
+    # id
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+
+    # period
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+
+    # customer
+    district_id = Column(Integer, ForeignKey("districts.id"), nullable=False)
+    cat_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
+    route_id = Column(Integer, ForeignKey("routes.id"), nullable=False)
+
+    # readings
+    readings = Column(Integer, nullable=False, default=0)
+
+    consumption_m3_sum = Column(Float, nullable=False, default=0)
+    consumption_m3_count = Column(Integer, nullable=False, default=0)
+    consumption_zmw_sum = Column(Float, nullable=False, default=0)
+    consumption_zmw_count = Column(Integer, nullable=False, default=0)
+    consumption_daily_sum = Column(Float, nullable=False, default=0)
+    consumption_daily_count = Column(Integer, nullable=False, default=0)
+    consumption_days_sum = Column(Float, nullable=False, default=0)
+    consumption_days_count = Column(Integer, nullable=False, default=0)
+
+    # service columns
+    updated_at = Column(DateTime(timezone=True), default=datetime.now, nullable=True)
+
+
+# ---------- Pydantic Schemas ----------
+class ConsumptionRollup(BaseModel):
+    # id
+    id: Optional[int] = None
+
+    # period
+    year: int
+    month: int
+
+    # customer
+    district_id: int
+    cat_id: int
+    route_id: int
+
+    # readings
+    readings: int
+
+    consumption_m3_sum: float
+    consumption_m3_count: int
+    consumption_zmw_sum: float
+    consumption_zmw_count: int
+    consumption_daily_sum: float
+    consumption_daily_count: int
+    consumption_days_sum: float
+    consumption_days_count: int
+
+    # service columns
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, DateTime
+from sqlalchemy import Column, Float, ForeignKey, Integer, String, DateTime, func
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, ConfigDict, EmailStr, Field
 from typing import Optional
@@ -21,7 +21,7 @@ class CustomerDB(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
     # account
-    account = Column(String, nullable=False)
+    account = Column(String, index=True, nullable=False)
     
     # user
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -33,7 +33,7 @@ class CustomerDB(Base):
     district_id = Column(Integer, ForeignKey("districts.id"), nullable=False)
     
     # route
-    route_id = Column(Integer, ForeignKey("routes.id"), nullable=False)
+    route_id = Column(Integer, ForeignKey("routes.id"), index=True, nullable=False)
     
     # attachments
     attachment_id = Column(Integer, ForeignKey("attachments.id"), nullable=True)
@@ -45,7 +45,7 @@ class CustomerDB(Base):
     
     #contact, address 
     email = Column(String, unique=True, index=True, nullable=False)
-    mobile = Column(String, nullable=False)
+    mobile = Column(String, index=True, nullable=False)
     tel = Column(String, nullable=False)
     address_physical = Column(String, nullable=True)
     address_postal = Column(String, nullable=True)
@@ -78,9 +78,10 @@ class CustomerDB(Base):
     review3_comments = Column(String, nullable=True)
 
     # service columns
-    created_at = Column(DateTime(timezone=True), default=datetime.now, nullable=True)
+    # stamped by the database clock, as the import does, for the route syncs
+    created_at = Column(DateTime(timezone=True), default=func.now(), nullable=True)
     created_by = Column(String, nullable=True, default="System")
-    updated_at = Column(DateTime(timezone=True), onupdate=datetime.now, nullable=True)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), nullable=True)
     updated_by = Column(String, nullable=True)
 
     # relationships
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, ForeignKey, Integer, DateTime, func
+from pydantic import BaseModel
+from typing import Optional
+from apps.lwsc.lwscdb import Base
+from datetime import datetime
+
+
+# ---------- SQLAlchemy Models ----------
+class CustomerRouteChangeDB(Base):
+    __tablename__ = "customer_route_changes"
+
+    # id
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+
+    # customer
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+
+    # route the customer was moved off
+    route_id = Column(Integer, ForeignKey("routes.id"), nullable=False, index=True)
+
+    # service columns, stamped by the database clock for the route syncs
+    changed_at = Column(DateTime(timezone=True), default=func.now(), nullable=False)
+
+
+# ---------- Pydantic Schemas ----------
+class CustomerRouteChange(BaseModel):
+    # id
+    id: Optional[int] = None
+
+    # customer
+    customer_id: int
+
+    # route
+    route_id: int
+
+    # service columns
+    changed_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
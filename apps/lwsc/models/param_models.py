@@ -6,9 +6,9 @@ from apps.lwsc.models.complaint_department_model import ComplaintDepartmentItem
 from apps.lwsc.models.complaint_model import ComplaintWithDetail
 from apps.lwsc.models.customer_category_model import Category
 from apps.lwsc.models.configuration_model import AppConfiguration
-from apps.lwsc.models.customer_model import Customer
+from apps.lwsc.models.customer_model import Customer, CustomerSimpleWithDetail
 from apps.lwsc.models.district_model import District, DistrictSimple
-from apps.lwsc.models.meter_reading_model import MeterReading
+from apps.lwsc.models.meter_reading_model import MeterReading, MeterReadingWithDetail
 from apps.lwsc.models.user_model import User, UserWithDetail, UserWithFullDetail
 from apps.lwsc.models.walkroute_model import WalkRoute, WalkRouteWithSimpleDetail
 
@@ -30,6 +30,23 @@ class ParamUploadTaskResult(BaseModel):
         orm_mode = True
 
 
+class ParamMeterReadingPage(BaseModel):
+    items: Optional[List[MeterReadingWithDetail]] = []
+    count: int = 0
+    next_cursor: Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class ParamRebillPeriod(BaseModel):
+    user_id: int
+    period_date: date
+
+    class Config:
+        orm_mode = True
+
+
 class ParamUserEdit(BaseModel):
     user: Optional[UserWithFullDetail] = None
     districts: Optional[List[DistrictSimple]] = []
@@ -93,6 +110,27 @@ class ParamCustomer(BaseModel):
         orm_mode = True
 
 
+class ParamCustomerSync(BaseModel):
+    since: Optional[datetime] = None
+    watermark: Optional[datetime] = None
+    changed: Optional[List[CustomerSimpleWithDetail]] = []
+    removed: Optional[List[int]] = []
+
+    class Config:
+        orm_mode = True
+
+
+class ParamCustomerSyncColumnar(BaseModel):
+    since: Optional[datetime] = None
+    watermark: Optional[datetime] = None
+    columns: Optional[List[str]] = []
+    rows: Optional[List[List[Any]]] = []
+    removed: Optional[List[int]] = []
+
+    class Config:
+        orm_mode = True
+
+
 class ParamDetail(BaseModel):
     status_code: int
     detail: str
@@ -16,7 +16,7 @@ class UserDB(Base):
 
     # id
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    code = Column(String, nullable=True)
+    code = Column(String, index=True, nullable=True)
     pin = Column(String, nullable=True)
 
     # district
@@ -5,15 +5,23 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 from jose import JWTError, jwt
+from apps.lwsc import lwscauth
 from apps.lwsc.lwscdb import get_lwsc_db
 from apps.lwsc.models.user_model import User, UserDB
 import helpers.assist as assist
-import time
+import helpers.passwords as passwords
+from helpers.ratelimit import RateLimiter, retry_after
 from sqlalchemy import or_
 from sqlalchemy.orm import selectinload, load_only
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+# mobile login attempts allowed per reader code within the window in seconds
+MOBILE_LOGIN_LIMIT = 10
+MOBILE_LOGIN_WINDOW = 60
+
+mobile_login_limiter = RateLimiter(MOBILE_LOGIN_LIMIT, MOBILE_LOGIN_WINDOW)
+
 
 @router.post("/login")
 async def login(
@@ -33,7 +41,10 @@ async def login(
             status_code=401, detail=f"The specified username or password is incorrect"
         )
 
-    if not assist.verify_password(form_data.password, user.password):
+    # return the connection to the pool while the password is verified
+    await db.close()
+
+    if not await passwords.verify_password(form_data.password, user.password):
         raise HTTPException(
             status_code=401, detail=f"The specified username or password is incorrect"
         )
@@ -44,6 +55,7 @@ async def login(
         "name": f"{user.fname} {user.lname}",
         "role": user.role_id,
         "mobile": user.mobile,
+        "aud": lwscauth.TOKEN_AUDIENCE,
         "exp": datetime.now(timezone.utc) + timedelta(minutes=30),
     }
     token = jwt.encode(to_encode, assist.SECRET_KEY, algorithm=assist.ALGORITHM)
@@ -56,8 +68,16 @@ async def loginMobile(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_lwsc_db),
 ):
-    # simulate sleep for 5min: TODO: remove
-    time.sleep(2)  # Pauses execution for 5 seconds
+    # throttle repeated attempts for the same code without blocking other requests
+    wait = mobile_login_limiter.hit(form_data.username)
+    if wait:
+        seconds = retry_after(wait)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many login attempts, please try again in {seconds} seconds",
+            headers={"Retry-After": str(seconds)},
+        )
+
     # check user exists
     result = await db.execute(
             select(UserDB)
@@ -13,7 +13,7 @@ from apps.lwsc.models.user_model import UserDB
 from apps.lwsc.models.walkroute_model import WalkRouteDB
 from helpers import assist
 import random
-from apps.lwsc import lwscapp
+from apps.lwsc import lwscapp, lwsctariff
 
 router = APIRouter(prefix="/bill-rates", tags=["BillRates"])
 
@@ -50,6 +50,10 @@ async def create_type(billrate: BillRate, db: AsyncSession = Depends(get_lwsc_db
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to create bill rate: f{e}")
+
+    # rates changed, rebuild tariffs on next use
+    lwsctariff.invalidate_tariffs()
+
     return db_user
 
 
@@ -89,6 +93,10 @@ async def update_category(
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to update billrate {e}")
+
+    # rates changed, rebuild tariffs on next use
+    lwsctariff.invalidate_tariffs()
+
     return config
 
 
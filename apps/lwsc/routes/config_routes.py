@@ -4,7 +4,10 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 
-from apps.lwsc.lwscdb import get_lwsc_db
+from helpers import database, http_client, passwords
+
+from apps.lwsc import lwscauth
+from apps.lwsc.lwscdb import engine, get_lwsc_db
 from apps.lwsc.models.configuration_model import AppConfiguration, AppConfigurationDB, SACCOConfigurationWithDetail
 from apps.lwsc.models.user_model import UserDB
 from apps.lwsc.models.status_types_model import StatusTypeDB
@@ -76,6 +79,30 @@ async def update_configuration(config_id: int, config_update: AppConfiguration,
         raise HTTPException(status_code=400, detail=f"Unable to update configuration {e}")
     return config
 
+@router.get("/pool-metrics", dependencies=[Depends(lwscauth.get_administrator)])
+async def get_pool_metrics():
+    """
+    Gets the database connection pool usage, for sizing pools and workers
+    """
+    return database.get_pool_metrics(engine)
+
+
+@router.get("/password-hash-metrics", dependencies=[Depends(lwscauth.get_administrator)])
+async def get_password_hash_metrics():
+    """
+    Gets the password hashing pool usage, waiting is the number of queued hashes
+    """
+    return passwords.get_metrics()
+
+
+@router.get("/http-client-metrics", dependencies=[Depends(lwscauth.get_administrator)])
+async def get_http_client_metrics():
+    """
+    Gets the outbound request timings and circuit state per host
+    """
+    return http_client.get_metrics()
+
+
 @router.get("/", response_model=List[SACCOConfigurationWithDetail])
 async def list_configurations(db: AsyncSession = Depends(get_lwsc_db)):
     result = await db.execute(
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import List, Optional
+
+from apps.lwsc import lwscrollup
+from apps.lwsc.lwscdb import get_lwsc_db
+from apps.lwsc.models.consumption_rollup_model import (
+    ConsumptionRollup,
+    ConsumptionRollupDB,
+)
+
+router = APIRouter(prefix="/consumption-rollups", tags=["ConsumptionRollups"])
+
+
+@router.post("/rebuild")
+async def rebuild_rollups(
+    year: Optional[int] = None, db: AsyncSession = Depends(get_lwsc_db)
+):
+    years = None if year is None else [year]
+
+    try:
+        await lwscrollup.rebuild_consumption_rollups(db, years)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"Unable to rebuild consumption rollups: {e}"
+        )
+
+    return {
+        "succeeded": True,
+        "message": f"Consumption rollups have been successfully rebuilt for {year or 'all years'}",
+    }
+
+
+@router.get("/list/{year}", response_model=List[ConsumptionRollup])
+async def list_rollups(year: int, db: AsyncSession = Depends(get_lwsc_db)):
+    result = await db.execute(
+        select(ConsumptionRollupDB)
+        .where(ConsumptionRollupDB.year == year)
+        .order_by(
+            ConsumptionRollupDB.month,
+            ConsumptionRollupDB.district_id,
+            ConsumptionRollupDB.cat_id,
+            ConsumptionRollupDB.route_id,
+        )
+    )
+    return result.scalars().all()
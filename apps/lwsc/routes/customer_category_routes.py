@@ -4,7 +4,7 @@ from sqlalchemy.future import select
 from sqlalchemy import delete
 from typing import List
 
-from apps.lwsc import lwscapp
+from apps.lwsc import lwscapp, lwsctariff
 from apps.lwsc.lwscdb import get_lwsc_db
 from apps.lwsc.models.bill_rate_model import BillRateDB
 from apps.lwsc.models.customer_category_model import Category, CategoryDB, CategoryWithDetail
@@ -77,6 +77,9 @@ async def process_bill_rates(category: Category, db: AsyncSession):
 
     await db.commit()
 
+    # rates changed, rebuild tariffs on next use
+    lwsctariff.invalidate_tariffs()
+
 
 @router.post("/create", response_model=Category)
 async def post__category(category: Category, db: AsyncSession = Depends(get_lwsc_db)):
@@ -1,9 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+import time
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import func, insert, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List, Any
+from typing import List, Any, Optional
 from sqlalchemy.orm import selectinload
 from apps.lwsc.lwscdb import get_lwsc_db
+from apps.lwsc.models.attachment_model import AttachmentDB
 from apps.lwsc.models.customer_category_model import CategoryDB
 from apps.lwsc.models.customer_model import (
     Customer,
@@ -13,13 +20,20 @@ from apps.lwsc.models.customer_model import (
     CustomerSimpleWithDetail,
     CustomerWithDetail,
 )
+from apps.lwsc.models.customer_route_change_model import CustomerRouteChangeDB
 from apps.lwsc.models.district_model import DistrictDB
-from apps.lwsc.models.param_models import ParamCustomer, ParamCustomerImport
+from apps.lwsc.models.param_models import (
+    ParamCustomer,
+    ParamCustomerImport,
+    ParamCustomerSync,
+    ParamCustomerSyncColumnar,
+)
 from apps.lwsc.models.user_model import UserDB
 from apps.lwsc.models.walkroute_model import WalkRouteDB
-from helpers import assist
+from helpers import assist, ingest, storage
 import random
 from apps.lwsc import lwscapp
+from apps.lwsc.routes import attachment_routes
 from sqlalchemy.orm import noload
 
 router = APIRouter(prefix="/customers", tags=["Customers"])
@@ -72,12 +86,209 @@ async def create_type(customer: Customer, db: AsyncSession = Depends(get_lwsc_db
     return db_user
 
 
-@router.post("/import")
-async def import_customers(
-    customerImport: ParamCustomerImport,
-    db: AsyncSession = Depends(get_lwsc_db),
+IMPORT_BATCH_SIZE = 2000
+
+IMPORT_STAGING_TABLE = "customer_import_staging"
+
+IMPORT_STAGING_COLUMNS = [
+    "customer_id",
+    "account",
+    "route_id",
+    "name",
+    "number",
+    "remarks",
+    "address_physical",
+    "lat",
+    "lon",
+    "current",
+    "previous",
+]
+
+
+async def get_import_routes(
+    routeNames: set, customerImport: ParamCustomerImport, db: AsyncSession
 ):
-    # check user exists
+    """
+    Gets the ids of the routes used by an import, creating any missing routes
+    """
+    # existing routes in district
+    result = await db.execute(
+        select(WalkRouteDB.id, WalkRouteDB.name).where(
+            WalkRouteDB.district_id == customerImport.district_id
+        )
+    )
+
+    routes = {}
+
+    for row in result.all():
+        # keep the first route when names are duplicated
+        routes.setdefault(row.name, row.id)
+
+    missingRoutes = [name for name in routeNames if name not in routes]
+
+    if missingRoutes:
+        # add all missing routes at once
+        result = await db.execute(
+            insert(WalkRouteDB)
+            .values(
+                [
+                    {
+                        "user_id": customerImport.user_id,
+                        "district_id": customerImport.district_id,
+                        "name": name,
+                        "status_id": lwscapp.STATUS_APPROVED,
+                        "stage_id": lwscapp.APPROVAL_STAGE_APPROVED,
+                        "approval_levels": 2,
+                    }
+                    for name in missingRoutes
+                ]
+            )
+            .returning(WalkRouteDB.id, WalkRouteDB.name)
+        )
+
+        for row in result.all():
+            routes[row.name] = row.id
+
+    return routes
+
+
+async def stage_import_batch(records: list, db: AsyncSession):
+    """
+    Copies a batch of import records into the staging table using COPY
+    """
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+
+    await connection.execute(text(f"TRUNCATE {IMPORT_STAGING_TABLE}"))
+    await raw.driver_connection.copy_records_to_table(
+        IMPORT_STAGING_TABLE, records=records, columns=IMPORT_STAGING_COLUMNS
+    )
+
+
+async def upsert_import_batch(
+    customerImport: ParamCustomerImport, user: UserDB, db: AsyncSession
+):
+    """
+    Applies the staged batch to the customers table
+
+    Returns the number of customers updated and added
+    """
+    # record customers moving off their route for route syncs, matched on id
+    # or on the generated email in two joins so each can use an index
+    await db.execute(
+        text(
+            f"""
+            INSERT INTO customer_route_changes (customer_id, route_id, changed_at)
+            SELECT c.id, c.route_id, now()
+            FROM customers AS c
+            JOIN {IMPORT_STAGING_TABLE} AS s ON c.id = s.customer_id
+            WHERE c.route_id <> s.route_id
+            UNION ALL
+            SELECT c.id, c.route_id, now()
+            FROM customers AS c
+            JOIN {IMPORT_STAGING_TABLE} AS s
+                ON c.email = s.account || '@lpwsc.co.zm'
+            WHERE s.customer_id IS NULL AND c.route_id <> s.route_id
+            """
+        )
+    )
+
+    # update customers matched on account
+    result = await db.execute(
+        text(
+            f"""
+            UPDATE customers AS c
+            SET name = s.name,
+                number = s.number,
+                address_physical = s.address_physical,
+                lat = s.lat,
+                lon = s.lon,
+                route_id = s.route_id,
+                current = s.current,
+                previous = s.previous,
+                updated_at = now()
+            FROM {IMPORT_STAGING_TABLE} AS s
+            WHERE s.customer_id IS NOT NULL AND c.id = s.customer_id
+            """
+        )
+    )
+    updated = result.rowcount
+
+    # add new customers, the generated email is unique for the account
+    result = await db.execute(
+        text(
+            f"""
+            INSERT INTO customers (
+                account, user_id, cat_id, district_id, route_id,
+                name, number, remarks, email, mobile, tel,
+                address_physical, address_postal, lat, lon, current, previous,
+                status_id, stage_id, approval_levels, created_at, created_by
+            )
+            SELECT
+                s.account, :user_id, :cat_id, :district_id, s.route_id,
+                s.name, s.number, s.remarks, s.account || '@lpwsc.co.zm', '097', '',
+                s.address_physical, '', s.lat, s.lon, s.current, s.previous,
+                :status_id, :stage_id, 1, now(), :created_by
+            FROM {IMPORT_STAGING_TABLE} AS s
+            WHERE s.customer_id IS NULL
+            ON CONFLICT (email) DO UPDATE
+            SET name = EXCLUDED.name,
+                number = EXCLUDED.number,
+                remarks = EXCLUDED.remarks,
+                address_physical = EXCLUDED.address_physical,
+                lat = EXCLUDED.lat,
+                lon = EXCLUDED.lon,
+                route_id = EXCLUDED.route_id,
+                current = EXCLUDED.current,
+                previous = EXCLUDED.previous,
+                updated_at = now()
+            RETURNING (xmax = 0) AS inserted
+            """
+        ),
+        {
+            "user_id": customerImport.user_id,
+            "cat_id": customerImport.cat_id,
+            "district_id": customerImport.district_id,
+            "status_id": lwscapp.STATUS_APPROVED,
+            "stage_id": lwscapp.APPROVAL_STAGE_APPROVED,
+            "created_by": user.email,
+        },
+    )
+
+    added = 0
+
+    for row in result.all():
+        if row.inserted:
+            added += 1
+        else:
+            updated += 1
+
+    return updated, added
+
+
+async def create_import_staging_table(db: AsyncSession):
+    await db.execute(
+        text(
+            f"""
+            CREATE TEMP TABLE {IMPORT_STAGING_TABLE} (
+                customer_id integer,
+                account varchar,
+                route_id integer,
+                name varchar,
+                number varchar,
+                remarks varchar,
+                address_physical varchar,
+                lat double precision,
+                lon double precision,
+                current double precision,
+                previous double precision
+            ) ON COMMIT DROP
+            """
+        )
+    )
+
+
+async def get_import_user(customerImport: ParamCustomerImport, db: AsyncSession):
     result = await db.execute(select(UserDB).where(UserDB.id == customerImport.user_id))
     user = result.scalars().first()
     if not user:
@@ -86,163 +297,204 @@ async def import_customers(
             detail=f"The user with id '{customerImport.user_id}' does not exist",
         )
 
-    # existig customers
+    return user
+
+
+async def get_existing_customers(db: AsyncSession):
+    """
+    Gets the ids of the approved customers, indexed by account
+    """
     result = await db.execute(
-        select(CustomerDB).where(CustomerDB.status_id == assist.STATUS_APPROVED)
+        select(CustomerDB.id, CustomerDB.account).where(
+            CustomerDB.status_id == assist.STATUS_APPROVED
+        )
     )
 
-    existingCustomers = result.scalars().all()
+    existingCustomers = {}
 
-    index = 0
-    added = 0
-    updated = 0
+    for row in result.all():
+        existingCustomers.setdefault(row.account, row.id)
 
-    startProcess = assist.get_current_date(False)
+    return existingCustomers
 
-    for customer in customerImport.items:
 
-        # update count
-        index += 1
+async def import_customer_batch(
+    customers: list,
+    existingCustomers: dict,
+    customerImport: ParamCustomerImport,
+    user: UserDB,
+    db: AsyncSession,
+):
+    """
+    Stages and applies one batch of import rows
 
-        # get account number
-        account = customer["Account"]
+    The staging table must exist in the current transaction.
 
-        # get route name
-        routename = customer["StreetName"]
+    Returns:
+        dict: The rows, updated and added counts and duration of the batch.
+    """
+    startBatch = time.perf_counter()
 
-        # keep track if customers who exist
-        customerExists = False
-        customerRecord = None
+    # latest row wins when an account is repeated in the batch
+    items = {}
 
-        for c in existingCustomers:
-            if c.account == account:
-                customerExists = True
-                customerRecord = c
-                break
+    for customer in customers:
+        items[customer["Account"]] = customer
 
-        # add route
-        # check route
-        result = await db.execute(
-            select(WalkRouteDB)
-            .options(
-                selectinload(WalkRouteDB.user),
-                selectinload(WalkRouteDB.district),
-                selectinload(WalkRouteDB.stage),
-                selectinload(WalkRouteDB.status),
-            )
-            .where(
-                WalkRouteDB.name == routename,
-                WalkRouteDB.district_id == customerImport.district_id,
-            )
+    routes = await get_import_routes(
+        {customer["StreetName"] for customer in items.values()},
+        customerImport,
+        db,
+    )
+
+    records = [
+        (
+            existingCustomers.get(account),
+            account,
+            routes[customer["StreetName"]],
+            customer["Name"],
+            customer["Meter"],
+            customer["Remarks"],
+            customer["StreetName"],
+            float(customer["Latitude"]),
+            float(customer["Longitude"]),
+            float(customer["Current"]),
+            float(customer["Previous"]),
         )
+        for account, customer in items.items()
+    ]
 
-        route = result.scalars().first()
-        routeId = None
+    await stage_import_batch(records, db)
+    updated, added = await upsert_import_batch(customerImport, user, db)
 
-        if route:
-            # route exists
-            routeId = route.id
-        else:
-            # route doesnt exist
-            db_route = WalkRouteDB(
-                # user
-                user_id=customerImport.user_id,
-                # district
-                district_id=customerImport.district_id,
-                # details
-                name=routename,
-                # approval
-                status_id=lwscapp.STATUS_APPROVED,
-                stage_id=lwscapp.APPROVAL_STAGE_APPROVED,
-                approval_levels=2,
-            )
-            db.add(db_route)
-            try:
-                await db.commit()
-                await db.refresh(db_route)
-                # get the id
-                routeId = db_route.id
-            except Exception as e:
-                await db.rollback()
-                raise HTTPException(
-                    status_code=400, detail=f"Unable to create route: f{e}"
-                )
-
-        if customerExists:
-            # update customer available fields
-
-            customerRecord.name = customer["Name"]
-            customerRecord.number = customer["Meter"]
-            customerRecord.address_physical = customer["StreetName"]
-            customerRecord.lat = customer["Latitude"]
-            customerRecord.lon = customer["Longitude"]
-            customerRecord.route_id = routeId
-            customerRecord.current = customer["Current"]
-            customerRecord.previous = customer["Previous"]
-
-            # commit
-            try:
-                await db.commit()
-                await db.refresh(customerRecord)
-
-                updated += 1
-            except Exception as e:
-                await db.rollback()
-                raise HTTPException(
-                    status_code=400, detail=f"Unable to update customer {e}"
-                )
-        else:
-            # add customer
-            db_customer = CustomerDB(
-                # user
-                user_id=customerImport.user_id,
-                # cat
-                cat_id=customerImport.cat_id,
-                # town
-                district_id=customerImport.district_id,
-                # route
-                route_id=routeId,
-                # details
-                account=account,
-                name=customer["Name"],
-                number=customer["Meter"],
-                remarks=customer["Remarks"],
-                # contact, address
-                email=f"{account}@lpwsc.co.zm",
-                mobile="097",
-                tel="",
-                address_physical=customer["StreetName"],
-                address_postal="",
-                lat=customer["Latitude"],
-                lon=customer["Longitude"],
-                # reading
-                current=customer["Current"],
-                previous=customer["Previous"],
-                # approval
-                status_id=lwscapp.STATUS_APPROVED,
-                stage_id=lwscapp.APPROVAL_STAGE_APPROVED,
-                approval_levels=1,
-                # service
-                created_by=user.email,
-            )
-            db.add(db_customer)
-            added += 1
+    return {
+        "rows": len(records),
+        "updated": updated,
+        "added": added,
+        "seconds": round(time.perf_counter() - startBatch, 3),
+    }
+
+
+@router.post("/import")
+async def import_customers(
+    customerImport: ParamCustomerImport,
+    db: AsyncSession = Depends(get_lwsc_db),
+):
+    # check user exists
+    user = await get_import_user(customerImport, db)
+
+    startProcess = time.perf_counter()
+
+    # existig customers, indexed by account
+    existingCustomers = await get_existing_customers(db)
+
+    # latest row wins when an account is repeated in the list
+    items = {}
+
+    for customer in customerImport.items:
+        items[customer["Account"]] = customer
 
-    # commit changes
     try:
+        await create_import_staging_table(db)
+
+        batches = []
+        updated = 0
+        added = 0
+
+        for batch in ingest.iter_batches(items.values(), IMPORT_BATCH_SIZE):
+            detail = await import_customer_batch(
+                batch, existingCustomers, customerImport, user, db
+            )
+
+            updated += detail["updated"]
+            added += detail["added"]
+
+            batches.append({"batch": len(batches) + 1, **detail})
+
         # comit changes
         await db.commit()
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to import customers: f{e}")
 
-    endProcess = assist.get_current_date(False)
+    duration = round(time.perf_counter() - startProcess, 3)
 
-    print(f"Import Duration. Start={startProcess}, End={endProcess}")
+    print(f"Import Duration. Seconds={duration}")
 
     return {
         "succeeded": True,
-        "message": f"Successfully imported {index} customer(s). Updated {updated} and added {added} customer(s)",
+        "message": f"Successfully imported {len(customerImport.items)} customer(s). Updated {updated} and added {added} customer(s)",
+        "seconds": duration,
+        "batches": batches,
+    }
+
+
+@router.post("/import/attachment/{attachment_id}")
+async def import_customers_attachment(
+    attachment_id: int,
+    customerImport: ParamCustomerImport,
+    db: AsyncSession = Depends(get_lwsc_db),
+):
+    """
+    Imports the customers of an uploaded customer import file
+
+    The file is read from disk in batches, each staged and applied before
+    the next is read, so memory does not grow with the size of the file.
+    The items of the request are not used.
+    """
+    # check user exists
+    user = await get_import_user(customerImport, db)
+
+    result = await db.execute(
+        select(AttachmentDB).where(AttachmentDB.id == attachment_id)
+    )
+    attachment = result.scalars().first()
+    if not attachment or attachment.type != "customerImport":
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unable to find customer import file with id '{attachment_id}'",
+        )
+
+    startProcess = time.perf_counter()
+
+    existingCustomers = await get_existing_customers(db)
+
+    rows = 0
+    batches = []
+    updated = 0
+    added = 0
+
+    try:
+        await create_import_staging_table(db)
+
+        async for batch in ingest.read_csv_batches(
+            storage.get_file(attachment.path),
+            attachment_routes.CUSTOMER_IMPORT_COLUMNS,
+            IMPORT_BATCH_SIZE,
+        ):
+            detail = await import_customer_batch(
+                batch, existingCustomers, customerImport, user, db
+            )
+
+            rows += len(batch)
+            updated += detail["updated"]
+            added += detail["added"]
+
+            batches.append({"batch": len(batches) + 1, **detail})
+
+        # comit changes
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=f"Unable to import customers: {e}")
+
+    duration = round(time.perf_counter() - startProcess, 3)
+
+    return {
+        "succeeded": True,
+        "message": f"Successfully imported {rows} customer(s). Updated {updated} and added {added} customer(s)",
+        "seconds": duration,
+        "batches": batches,
     }
 
 
@@ -347,10 +599,16 @@ async def update_category(
             status_code=404, detail=f"Unable to find customer with id '{customer_id}'"
         )
 
+    previousRouteId = config.route_id
+
     # Update fields that are not None
     for key, value in customer_update.dict(exclude_unset=True).items():
         setattr(config, key, value)
 
+    if config.route_id != previousRouteId:
+        # record customer moving off the route for route syncs
+        db.add(CustomerRouteChangeDB(customer_id=config.id, route_id=previousRouteId))
+
     try:
         await db.commit()
         await db.refresh(config)
@@ -395,3 +653,121 @@ async def list_customers(routeId: int, db: AsyncSession = Depends(get_lwsc_db)):
         .where(CustomerDB.route_id == routeId)
     )
     return result.scalars().all()
+
+
+
+SYNC_COLUMNS = list(CustomerSimple.__fields__)
+
+# changes are stamped when their transaction starts, not when it commits, so
+# the watermark stays this far behind the database time. Changes newer than
+# that are sent again on the next sync, writes running longer can be missed.
+SYNC_WATERMARK_MARGIN = timedelta(minutes=5)
+
+
+@router.get("/route/{routeId}/sync")
+async def sync_route_customers(
+    routeId: int,
+    request: Request,
+    since: Optional[datetime] = None,
+    columnar: bool = False,
+    db: AsyncSession = Depends(get_lwsc_db),
+):
+    changedAt = func.coalesce(CustomerDB.updated_at, CustomerDB.created_at)
+
+    customerCriteria = [CustomerDB.route_id == routeId]
+    removedCriteria = [
+        CustomerRouteChangeDB.route_id == routeId,
+        # customers moved back onto the route are sent as changed
+        CustomerRouteChangeDB.customer_id.not_in(
+            select(CustomerDB.id).where(CustomerDB.route_id == routeId)
+        ),
+    ]
+
+    if since is not None:
+        customerCriteria.append(changedAt > since)
+        removedCriteria.append(CustomerRouteChangeDB.changed_at > since)
+
+    # summarise changes first so unchanged routes load no customers
+    stmt = select(
+        select(func.count(CustomerDB.id))
+        .where(*customerCriteria)
+        .scalar_subquery()
+        .label("changed"),
+        select(func.max(changedAt))
+        .where(*customerCriteria)
+        .scalar_subquery()
+        .label("changedAt"),
+        select(func.count(CustomerRouteChangeDB.id))
+        .where(*removedCriteria)
+        .scalar_subquery()
+        .label("removed"),
+        select(func.max(CustomerRouteChangeDB.changed_at))
+        .where(*removedCriteria)
+        .scalar_subquery()
+        .label("removedAt"),
+        func.now().label("now"),
+    )
+    result = await db.execute(stmt)
+    summary = result.one()
+
+    changes = [value for value in (summary.changedAt, summary.removedAt) if value]
+    watermark = max(changes) if changes else since
+
+    if changes:
+        # changes still being committed may be stamped earlier than these
+        watermark = min(watermark, summary.now - SYNC_WATERMARK_MARGIN)
+
+    etag = '"{}"'.format(
+        assist.encode_sha256(
+            f"{routeId}|{since}|{columnar}|{summary.changed}|{summary.removed}|{watermark}"
+        )
+    )
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    removed = []
+
+    if summary.removed:
+        result = await db.execute(
+            select(CustomerRouteChangeDB.customer_id)
+            .distinct()
+            .where(*removedCriteria)
+        )
+        removed = result.scalars().all()
+
+    if columnar:
+        # plain rows in column order, without the related items
+        result = await db.execute(
+            select(*[getattr(CustomerDB, column) for column in SYNC_COLUMNS])
+            .where(*customerCriteria)
+            .order_by(CustomerDB.id)
+        )
+
+        param = ParamCustomerSyncColumnar(
+            since=since,
+            watermark=watermark,
+            columns=SYNC_COLUMNS,
+            rows=[list(row) for row in result.all()],
+            removed=removed,
+        )
+    else:
+        result = await db.execute(
+            select(CustomerDB)
+            .options(
+                selectinload(CustomerDB.category),
+                selectinload(CustomerDB.district),
+                selectinload(CustomerDB.route),
+            )
+            .where(*customerCriteria)
+            .order_by(CustomerDB.id)
+        )
+
+        param = ParamCustomerSync(
+            since=since,
+            watermark=watermark,
+            changed=result.scalars().all(),
+            removed=removed,
+        )
+
+    return JSONResponse(content=jsonable_encoder(param), headers={"ETag": etag})
@@ -25,179 +25,95 @@ from apps.lwsc.models.param_models import (
 from apps.lwsc.models.user_model import UserDB
 from apps.lwsc.models.walkroute_model import WalkRouteDB
 from helpers import assist
+from helpers.cache import TTLCache
 import random
 from sqlalchemy.orm import noload
 
 router = APIRouter(prefix="/dashboards", tags=["Dashboards"])
 
 
-@router.get("/year-to-date/{year}", response_model=ParamDashboardYearSummary)
-async def get_ytd_dashboard(year: int, db: AsyncSession = Depends(get_lwsc_db)):
-    print("starting ytd dashboard summary", assist.get_current_date(False))
-
-    # get base series
-    series = [
-        "Consumption (M3)",
-        "Revenue (ZMW)",
-        "Consumption Daily (AVG)",
-        "Consumption Per Day AVG (M3)",
-        "Count",
-    ]
-
-    # get months
-    months = list(calendar.month_name)[1:]
-
-    monthData = []
-
-    for serie in series:
-        monthSerieData = [
-            ParamChartItem(type=serie, id=index + 1, name=month, value=0.0)
-            for index, month in enumerate(months)
-        ]
+YTD_CACHE_SECONDS = 300
 
-        monthData.extend(monthSerieData)
+SERIES = [
+    "Consumption (M3)",
+    "Revenue (ZMW)",
+    "Consumption Daily (AVG)",
+    "Consumption Per Day AVG (M3)",
+    "Count",
+]
 
-    # get all districts
-    result = await db.execute(select(DistrictDB).options(noload("*")))
-    districts = result.scalars().all()
-
-    districtData = []
+# cached summaries by year
+ytd_cache = TTLCache(ttl=YTD_CACHE_SECONDS, maxsize=16)
 
-    for serie in series:
-        districtSerieData = [
-            ParamChartItem(type=serie, id=district.id, name=district.name, value=0.0)
-            for district in districts
-        ]
 
-        districtData.extend(districtSerieData)
+def invalidate_ytd_dashboard(year: int | None = None):
+    """
+    Drops the cached year-to-date dashboard of a year, or of all years
+    """
+    if year is None:
+        ytd_cache.clear()
+    else:
+        ytd_cache.invalidate(year)
 
-    # get all categories
-    result = await db.execute(select(CategoryDB).options(noload("*")))
-    categories = result.scalars().all()
 
-    categoryData = []
+def get_serie_value(serie: str, row):
+    if row is None:
+        return 0.0
 
-    for serie in series:
-        categorySerieData = [
-            ParamChartItem(
-                type=serie, id=category.id, name=category.cat_name, value=0.0
-            )
-            for category in categories
-        ]
+    if serie == "Consumption (M3)":
+        return round(row.consumptionM3, 2)
+    elif serie == "Revenue (ZMW)":
+        return round(row.consumptionZMW, 2)
+    elif serie == "Consumption Daily (AVG)":
+        return round(row.consumptionDaily, 2)
+    elif serie == "Consumption Per Day AVG (M3)":
+        return round(row.consumptionDays, 2)
 
-        categoryData.extend(categorySerieData)
+    return row.Count
 
-    # get readings per month
-    start_of_year = date(year, 1, 1)
-    start_of_next_year = date(year + 1, 1, 1)
 
-    stmt = (
-        select(
-            func.extract("month", MeterReadingDB.read_date).label("month"),
-            func.count(MeterReadingDB.read_date).label("Count"),
-            func.coalesce(func.sum(MeterReadingDB.consumption_m3), 0).label(
-                "consumptionM3"
-            ),
-            func.coalesce(func.sum(MeterReadingDB.consumption_zmw), 0).label(
-                "consumptionZMW"
-            ),
-            func.coalesce(func.avg(MeterReadingDB.consumption_daily), 0).label(
-                "consumptionDaily"
-            ),
-            func.coalesce(func.avg(MeterReadingDB.consumption_days), 0).label(
-                "consumptionDays"
-            ),
-        )
-        .where(
-            MeterReadingDB.status_id == lwscapp.APPROVAL_STAGE_APPROVED,
-            MeterReadingDB.read_date >= start_of_year,
-            MeterReadingDB.read_date < start_of_next_year,
+def get_chart_data(items, rows: dict):
+    """
+    Creates the chart items of every serie from (id, name) pairs and rows by id
+    """
+    return [
+        ParamChartItem(
+            type=serie, id=id, name=name, value=get_serie_value(serie, rows.get(id))
         )
-        .group_by(func.extract("month", MeterReadingDB.read_date).label("month"))
-    )
+        for serie in SERIES
+        for id, name in items
+    ]
 
-    result = await db.execute(stmt)
-    rows = result.all()
 
-    # map months
-    for category in monthData:
-        for row in rows:
-            if category.id == row["month"]:
-                if category.type == "Consumption (M3)":
-                    category.value = round(row["consumptionM3"], 2)
+@router.get("/year-to-date/{year}", response_model=ParamDashboardYearSummary)
+async def get_ytd_dashboard(year: int, db: AsyncSession = Depends(get_lwsc_db)):
+    dashboard = ytd_cache.get(year)
 
-                elif category.type == "Revenue (ZMW)":
-                    category.value = round(row["consumptionZMW"], 2)
+    if dashboard is not None:
+        return dashboard
 
-                elif category.type == "Consumption Daily (AVG)":
-                    category.value = round(row["consumptionDaily"], 2)
+    # get all districts
+    result = await db.execute(select(DistrictDB.id, DistrictDB.name))
+    districts = result.all()
 
-                elif category.type == "Consumption Per Day AVG (M3)":
-                    category.value = round(row["consumptionDays"], 2)
-                    
-                elif category.type == "Count":
-                    category.value = row["Count"]
+    # get all categories
+    result = await db.execute(select(CategoryDB.id, CategoryDB.cat_name))
+    categories = result.all()
 
-    # get readings per district
+    # get readings per month, district and category in one scan
     start_of_year = date(year, 1, 1)
     start_of_next_year = date(year + 1, 1, 1)
 
-    stmt = (
-        select(
-            CustomerDB.district_id,
-            func.count(CustomerDB.district_id).label("Count"),
-            func.coalesce(func.sum(MeterReadingDB.consumption_m3), 0).label(
-                "consumptionM3"
-            ),
-            func.coalesce(func.sum(MeterReadingDB.consumption_zmw), 0).label(
-                "consumptionZMW"
-            ),
-            func.coalesce(func.avg(MeterReadingDB.consumption_daily), 0).label(
-                "consumptionDaily"
-            ),
-            func.coalesce(func.avg(MeterReadingDB.consumption_days), 0).label(
-                "consumptionDays"
-            ),
-        )
-        .join(CustomerDB, MeterReadingDB.customer_id == CustomerDB.id)
-        .where(
-            MeterReadingDB.status_id == lwscapp.APPROVAL_STAGE_APPROVED,
-            MeterReadingDB.read_date >= start_of_year,
-            MeterReadingDB.read_date < start_of_next_year,
-        )
-        .group_by(CustomerDB.district_id)
-    )
-
-    result = await db.execute(stmt)
-    rows = result.all()
-
-    # map districts
-    for category in districtData:
-        for row in rows:
-            if category.id == row["district_id"]:
-                if category.type == "Consumption (M3)":
-                    category.value = round(row["consumptionM3"], 2)
-
-                elif category.type == "Revenue (ZMW)":
-                    category.value = round(row["consumptionZMW"], 2)
-
-                elif category.type == "Consumption Daily (AVG)":
-                    category.value = round(row["consumptionDaily"], 2)
-
-                elif category.type == "Consumption Per Day AVG (M3)":
-                    category.value = round(row["consumptionDays"], 2)
-                    
-                elif category.type == "Count":
-                    category.value = row["Count"]
-
-    # get readings per category
-    start_of_year = date(year, 1, 1)
-    start_of_next_year = date(year + 1, 1, 1)
+    month = func.extract("month", MeterReadingDB.read_date)
 
     stmt = (
         select(
+            func.grouping(month).label("byMonth"),
+            func.grouping(CustomerDB.district_id).label("byDistrict"),
+            month.label("month"),
+            CustomerDB.district_id,
             CustomerDB.cat_id,
-            func.count(CustomerDB.cat_id).label("Count"),
+            func.count(MeterReadingDB.id).label("Count"),
             func.coalesce(func.sum(MeterReadingDB.consumption_m3), 0).label(
                 "consumptionM3"
             ),
@@ -213,95 +129,81 @@ async def get_ytd_dashboard(year: int, db: AsyncSession = Depends(get_lwsc_db)):
         )
         .join(CustomerDB, MeterReadingDB.customer_id == CustomerDB.id)
         .where(
-            MeterReadingDB.status_id == lwscapp.APPROVAL_STAGE_APPROVED,
+            MeterReadingDB.status_id == lwscapp.STATUS_APPROVED,
             MeterReadingDB.read_date >= start_of_year,
             MeterReadingDB.read_date < start_of_next_year,
         )
-        .group_by(CustomerDB.cat_id)
+        .group_by(
+            func.grouping_sets(month, CustomerDB.district_id, CustomerDB.cat_id)
+        )
     )
 
     result = await db.execute(stmt)
-    rows = result.all()
 
-    # map categories
-    for category in categoryData:
-        for row in rows:
-            if category.id == row["cat_id"]:
-                if category.type == "Consumption (M3)":
-                    category.value = round(row["consumptionM3"], 2)
-
-                elif category.type == "Revenue (ZMW)":
-                    category.value = round(row["consumptionZMW"], 2)
-
-                elif category.type == "Consumption Daily (AVG)":
-                    category.value = round(row["consumptionDaily"], 2)
-
-                elif category.type == "Consumption Per Day AVG (M3)":
-                    category.value = round(row["consumptionDays"], 2)
-                    
-                elif category.type == "Count":
-                    category.value = row["Count"]
-
-    statisticData = []
-
-    # get users
-    stmt = select(func.count(UserDB.id)).where(
-        UserDB.status_id == lwscapp.APPROVAL_STAGE_APPROVED
-    )
-    user_count = await db.scalar(stmt)
-    # add
-    statisticData.append(
-        ParamDashboardStatistic(name="Users", value=user_count, color="green")
-    )
-
-    # get districts
-    stmt = select(func.count(DistrictDB.id)).where(
-        DistrictDB.status_id == lwscapp.APPROVAL_STAGE_APPROVED
-    )
-    district_count = await db.scalar(stmt)
-    # add
-    statisticData.append(
-        ParamDashboardStatistic(name="Districts", value=district_count, color="red")
-    )
-
-    # get routes
-    stmt = select(func.count(WalkRouteDB.id)).where(
-        WalkRouteDB.status_id == lwscapp.APPROVAL_STAGE_APPROVED
-    )
-    route_count = await db.scalar(stmt)
-    # add
-    statisticData.append(
-        ParamDashboardStatistic(name="Routes", value=route_count, color="orange")
+    monthRows = {}
+    districtRows = {}
+    categoryRows = {}
+
+    # grouping is zero for the column a row is grouped by
+    for row in result.all():
+        if row.byMonth == 0:
+            monthRows[int(row.month)] = row
+        elif row.byDistrict == 0:
+            districtRows[row.district_id] = row
+        else:
+            categoryRows[row.cat_id] = row
+
+    months = list(enumerate(list(calendar.month_name)[1:], start=1))
+
+    monthData = get_chart_data(months, monthRows)
+    districtData = get_chart_data(districts, districtRows)
+    categoryData = get_chart_data(categories, categoryRows)
+
+    # get statistics in one query
+    stmt = select(
+        select(func.count(UserDB.id))
+        .where(UserDB.status_id == lwscapp.STATUS_APPROVED)
+        .scalar_subquery()
+        .label("users"),
+        select(func.count(DistrictDB.id))
+        .where(DistrictDB.status_id == lwscapp.STATUS_APPROVED)
+        .scalar_subquery()
+        .label("districts"),
+        select(func.count(WalkRouteDB.id))
+        .where(WalkRouteDB.status_id == lwscapp.STATUS_APPROVED)
+        .scalar_subquery()
+        .label("routes"),
+        select(func.count(CustomerDB.id))
+        .where(CustomerDB.status_id == lwscapp.STATUS_APPROVED)
+        .scalar_subquery()
+        .label("customers"),
+        select(func.count(MeterReadingDB.id))
+        .where(MeterReadingDB.status_id == lwscapp.STATUS_APPROVED)
+        .scalar_subquery()
+        .label("readings"),
     )
 
-    # get customers
-    stmt = select(func.count(CustomerDB.id)).where(
-        CustomerDB.status_id == lwscapp.APPROVAL_STAGE_APPROVED
-    )
-    customer_count = await db.scalar(stmt)
-    # add
-    statisticData.append(
-        ParamDashboardStatistic(name="Customers", value=customer_count, color="red")
-    )
+    result = await db.execute(stmt)
+    counts = result.one()
 
-    # get meter readings
-    stmt = select(func.count(MeterReadingDB.id)).where(
-        MeterReadingDB.status_id == lwscapp.APPROVAL_STAGE_APPROVED
-    )
-    readings_count = await db.scalar(stmt)
-    # add
-    statisticData.append(
+    statisticData = [
+        ParamDashboardStatistic(name="Users", value=counts.users, color="green"),
         ParamDashboardStatistic(
-            name="Meter Readings", value=readings_count, color="green"
-        )
-    )
+            name="Districts", value=counts.districts, color="red"
+        ),
+        ParamDashboardStatistic(name="Routes", value=counts.routes, color="orange"),
+        ParamDashboardStatistic(
+            name="Customers", value=counts.customers, color="red"
+        ),
+        ParamDashboardStatistic(
+            name="Meter Readings", value=counts.readings, color="green"
+        ),
+    ]
 
     categoriesCountData = [
         category for category in categoryData if category.type == "Count"
     ]
 
-    print("ending ytd dashboard summary", assist.get_current_date(False))
-
     dashboard = ParamDashboardYearSummary(
         statistics=statisticData,
         months=monthData,
@@ -310,4 +212,6 @@ async def get_ytd_dashboard(year: int, db: AsyncSession = Depends(get_lwsc_db)):
         categoriesCount=categoriesCountData,
     )
 
+    ytd_cache.set(year, dashboard)
+
     return dashboard
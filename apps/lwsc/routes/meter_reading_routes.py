@@ -1,26 +1,34 @@
+import time
+from datetime import date, datetime
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List
-from sqlalchemy import desc
+from typing import List, Optional
+from sqlalchemy import bindparam, desc, func, tuple_
 from sqlalchemy.orm import selectinload, noload
-from apps.lwsc import lwscapp
-from apps.lwsc.lwscdb import get_lwsc_db
+from apps.lwsc import lwscapp, lwscexports, lwscrollup, lwsctariff
+from apps.lwsc.lwscdb import AsyncSessionLocal, get_lwsc_db
 from apps.lwsc.models.attachment_model import AttachmentDB
-from apps.lwsc.models.bill_rate_model import BillRateDB
 from apps.lwsc.models.customer_model import CustomerDB
 from apps.lwsc.models.meter_reading_model import (
     MeterReading,
     MeterReadingDB,
     MeterReadingWithDetail,
 )
-from apps.lwsc.models.param_models import ParamUploadTaskResult
+from apps.lwsc.models.param_models import (
+    ParamMeterReadingPage,
+    ParamRebillPeriod,
+    ParamUploadTaskResult,
+)
 from apps.lwsc.models.review_model import AppReview
 from apps.lwsc.models.user_model import UserDB
-from helpers import assist
+from apps.lwsc.routes import dashboard_routes
+from helpers import assist, export, pagination
 import random
+import numpy as np
 from sqlalchemy import or_, desc
 
 router = APIRouter(prefix="/meter-readings", tags=["MeterReadings"])
@@ -41,11 +49,7 @@ async def get_consumption_zmw(meterreading: MeterReading, db: AsyncSession):
         )
 
     # get bill rates
-    result = await db.execute(
-        select(BillRateDB).where(BillRateDB.cat_id == customer.cat_id)
-    )
-
-    rates = result.scalars().all()
+    tariff = await lwsctariff.get_tariff(customer.cat_id, db)
 
     # find the previous reading that is approved
     result = await db.execute(
@@ -61,10 +65,16 @@ async def get_consumption_zmw(meterreading: MeterReading, db: AsyncSession):
     )
     previousReading = result.scalars().first()
 
+    return apply_consumption(meterreading, previousReading, tariff)
+
+
+def apply_consumption(
+    meterreading: MeterReading, previousReading, tariff: lwsctariff.Tariff
+):
     if previousReading:
         # reading available. calculate consumption
         consumptionM3 = meterreading.current - previousReading.current
-        consumptionZMW = lwscapp.get_consumption_rate(consumptionM3, rates)
+        consumptionZMW = tariff.get_rate(consumptionM3)
 
         # update valeus for current
         meterreading.previous = previousReading.current
@@ -234,6 +244,241 @@ async def upload_meterreading(
         return await create_meterreading(meterreading, db)
 
 
+UPLOAD_BATCH_LIMIT = 1000
+
+
+async def get_batch_previous_readings(customerIds: set, db: AsyncSession):
+    """
+    Gets the two latest approved readings of each customer, newest first
+    """
+    ranked = (
+        select(
+            MeterReadingDB.id,
+            func.row_number()
+            .over(
+                partition_by=MeterReadingDB.customer_id,
+                order_by=desc(MeterReadingDB.read_date),
+            )
+            .label("rank"),
+        )
+        .where(
+            MeterReadingDB.customer_id.in_(customerIds),
+            MeterReadingDB.status_id == assist.STATUS_APPROVED,
+        )
+        .subquery()
+    )
+
+    result = await db.execute(
+        select(MeterReadingDB)
+        .options(noload("*"))
+        .join(ranked, ranked.c.id == MeterReadingDB.id)
+        .where(ranked.c.rank <= 2)
+        .order_by(MeterReadingDB.customer_id, desc(MeterReadingDB.read_date))
+    )
+
+    previousReadings = {}
+
+    for reading in result.scalars().all():
+        previousReadings.setdefault(reading.customer_id, []).append(reading)
+
+    return previousReadings
+
+
+@router.post("/upload-batch", response_model=List[ParamUploadTaskResult])
+async def upload_meterreadings_batch(
+    meterreadings: List[MeterReading], db: AsyncSession = Depends(get_lwsc_db)
+):
+    if len(meterreadings) > UPLOAD_BATCH_LIMIT:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch cannot have more than {UPLOAD_BATCH_LIMIT} meter readings",
+        )
+
+    customerIds = {reading.customer_id for reading in meterreadings}
+
+    # customers
+    result = await db.execute(
+        select(CustomerDB.id, CustomerDB.cat_id).where(CustomerDB.id.in_(customerIds))
+    )
+    customers = {row.id: row.cat_id for row in result.all()}
+
+    # bill rates for the customer categories
+    tariffs = await lwsctariff.get_tariffs(db)
+
+    # users
+    result = await db.execute(
+        select(UserDB.id, UserDB.email).where(
+            UserDB.email.in_({reading.created_by for reading in meterreadings})
+        )
+    )
+    users = {row.email: row.id for row in result.all()}
+
+    # readings already uploaded for the customer in the period
+    # do not use uuid which can change when app is reinstalled
+    result = await db.execute(
+        select(MeterReadingDB)
+        .options(noload("*"))
+        .where(
+            tuple_(MeterReadingDB.customer_id, MeterReadingDB.period_date).in_(
+                {
+                    (reading.customer_id, reading.period_date)
+                    for reading in meterreadings
+                }
+            )
+        )
+    )
+    existing = {}
+
+    for reading in result.scalars().all():
+        existing.setdefault((reading.customer_id, reading.period_date), reading)
+
+    # attachments of readings that are approved
+    attachmentIds = {
+        reading.attachment_id
+        for reading in existing.values()
+        if reading.status_id == lwscapp.STATUS_APPROVED and reading.attachment_id
+    }
+    attachments = {}
+
+    if attachmentIds:
+        result = await db.execute(
+            select(AttachmentDB.id, AttachmentDB.path).where(
+                AttachmentDB.id.in_(attachmentIds)
+            )
+        )
+        attachments = {row.id: row.path for row in result.all()}
+
+    previousReadings = await get_batch_previous_readings(customerIds, db)
+
+    results = []
+    pending = []
+
+    for meterreading in meterreadings:
+        key = (meterreading.customer_id, meterreading.period_date)
+        reading = existing.get(key)
+
+        if meterreading.customer_id not in customers:
+            results.append(
+                ParamUploadTaskResult(
+                    succeeded=False,
+                    approved=False,
+                    message=f"Unable to find customer with id '{meterreading.customer_id}'",
+                    meterreading=meterreading,
+                )
+            )
+            continue
+
+        if reading is not None and reading.status_id == lwscapp.STATUS_APPROVED:
+            results.append(
+                ParamUploadTaskResult(
+                    succeeded=False,
+                    approved=True,
+                    imageUrl=attachments.get(reading.attachment_id, ""),
+                    message="The meter reading submission has been approved and cannot be updated. Changes reverted",
+                    meterreading=reading,
+                )
+            )
+            continue
+
+        if reading is None and meterreading.created_by not in users:
+            results.append(
+                ParamUploadTaskResult(
+                    succeeded=False,
+                    approved=False,
+                    message=f"The user with email '{meterreading.created_by}' does not exist",
+                    meterreading=meterreading,
+                )
+            )
+            continue
+
+        # look for consumption
+        previousReading = next(
+            (
+                previous
+                for previous in previousReadings.get(meterreading.customer_id, [])
+                if previous.uuid != meterreading.uuid
+            ),
+            None,
+        )
+        meterreading = apply_consumption(
+            meterreading,
+            previousReading,
+            tariffs.get(customers[meterreading.customer_id], lwsctariff.EMPTY_TARIFF),
+        )
+
+        if reading is not None:
+            # update existing record instead of creating new one
+            for field, value in meterreading.dict(exclude_unset=True).items():
+                setattr(reading, field, value)
+
+            message = "The meter reading submission has been successfully updated"
+        else:
+            reading = MeterReadingDB(
+                # period
+                period_date=meterreading.period_date,
+                # uuid
+                uuid=meterreading.uuid,
+                # user
+                user_id=users[meterreading.created_by],
+                # attachment
+                attachment_id=meterreading.attachment_id,
+                # customer
+                customer_id=meterreading.customer_id,
+                # details
+                read_date=meterreading.read_date,
+                upload_at=meterreading.upload_at,
+                current=meterreading.current,
+                previous=meterreading.previous,
+                consumption_m3=meterreading.consumption_m3,
+                consumption_days=meterreading.consumption_days,
+                consumption_zmw=meterreading.consumption_zmw,
+                consumption_daily=meterreading.consumption_daily,
+                comments=meterreading.comments,
+                # status
+                access_status=meterreading.access_status,
+                reading_status=meterreading.reading_status,
+                condition_status=meterreading.condition_status,
+                # addres
+                lon=meterreading.lat,
+                lat=meterreading.lon,
+                # approval
+                status_id=meterreading.status_id,
+                stage_id=meterreading.stage_id,
+                approval_levels=meterreading.approval_levels,
+                # service
+                updated_at=meterreading.updated_at,
+                created_by=meterreading.created_by,
+            )
+            db.add(reading)
+
+            # later items for the same customer and period update this one
+            existing[key] = reading
+
+            message = "The meter reading has been successfully submitted"
+
+        # result is created once the reading has been saved
+        pending.append((len(results), reading, message))
+        results.append(None)
+
+    try:
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"Unable to upload meter readings: {e}"
+        )
+
+    for index, reading, message in pending:
+        results[index] = ParamUploadTaskResult(
+            succeeded=True,
+            approved=False,
+            message=message,
+            meterreading=reading,
+        )
+
+    return results
+
+
 @router.post("/create", response_model=MeterReading)
 async def create_new(
     meterreading: MeterReading, db: AsyncSession = Depends(get_lwsc_db)
@@ -263,10 +508,7 @@ async def initialize(db: AsyncSession = Depends(get_lwsc_db)):
             break
 
         # get bill rates
-        result = await db.execute(
-            select(BillRateDB).where(BillRateDB.cat_id == customer.cat_id)
-        )
-        rates = result.scalars().all()
+        tariff = await lwsctariff.get_tariff(customer.cat_id, db)
 
         # add a reading from 2026
         for y in range(2025, 2027):
@@ -282,7 +524,7 @@ async def initialize(db: AsyncSession = Depends(get_lwsc_db)):
                     consumptionM3 = round(currentReading - previousReading, 2)
                     consumptionDays = random.randint(15, 28)
                     consumptionDaily = round(consumptionM3 / consumptionDays, 2)
-                    consumptionZMW = lwscapp.get_consumption_rate(consumptionM3, rates)
+                    consumptionZMW = tariff.get_rate(consumptionM3)
 
                     db_status = MeterReadingDB(
                         # uuid
@@ -383,6 +625,150 @@ async def list_meterreadings(db: AsyncSession = Depends(get_lwsc_db)):
     return result.scalars().all()
 
 
+@router.get("/export")
+async def export_meterreadings(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    period_date: Optional[date] = None,
+    route_id: Optional[int] = None,
+    district_id: Optional[int] = None,
+    format: str = export.FORMAT_XLSX,
+):
+    """
+    Exports the meter readings matching the filters as XLSX or CSV
+
+    Rows are read with a server-side cursor and written as they arrive.
+    """
+    if format not in export.MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The export format '{format}' is not supported",
+        )
+
+    stmt = lwscexports.get_meterreading_export_query(
+        date_from, date_to, period_date, route_id, district_id
+    )
+
+    return export.export_response(
+        export.stream_query(AsyncSessionLocal, stmt),
+        lwscexports.METER_READING_COLUMNS,
+        "meter-readings",
+        format,
+    )
+
+
+def get_meterreading_page_query(
+    period_date: Optional[date],
+    route_id: Optional[int],
+    status_id: Optional[int],
+    user_id: Optional[int],
+    cursor: Optional[str],
+):
+    """
+    Builds the filtered meter reading query ordered for keyset pagination
+
+    Readings are ordered newest first on (read_date, id) so that the cursor
+    of the last row of a page is enough to continue from the next row.
+    """
+    stmt = select(MeterReadingDB).options(
+        selectinload(MeterReadingDB.user),
+        selectinload(MeterReadingDB.customer),
+        selectinload(MeterReadingDB.attachment),
+        selectinload(MeterReadingDB.stage),
+        selectinload(MeterReadingDB.status),
+    )
+
+    if period_date is not None:
+        stmt = stmt.where(MeterReadingDB.period_date == period_date)
+
+    if route_id is not None:
+        # route is held on the customer
+        stmt = stmt.join(CustomerDB, MeterReadingDB.customer_id == CustomerDB.id).where(
+            CustomerDB.route_id == route_id
+        )
+
+    if status_id is not None:
+        stmt = stmt.where(MeterReadingDB.status_id == status_id)
+
+    if user_id is not None:
+        stmt = stmt.where(MeterReadingDB.user_id == user_id)
+
+    if cursor:
+        try:
+            read_date, reading_id = pagination.decode_cursor(cursor)
+            read_date = datetime.fromisoformat(read_date)
+            reading_id = int(reading_id)
+        except (TypeError, ValueError) as e:
+            raise HTTPException(status_code=400, detail=f"{e}")
+
+        stmt = stmt.where(
+            tuple_(MeterReadingDB.read_date, MeterReadingDB.id)
+            < tuple_(read_date, reading_id)
+        )
+
+    return stmt.order_by(desc(MeterReadingDB.read_date), desc(MeterReadingDB.id))
+
+
+async def stream_meterreadings(stmt):
+    # use own session, the request session is closed once the response starts
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            stmt.execution_options(yield_per=pagination.STREAM_PARTITION_SIZE)
+        )
+
+        async for readings in result.scalars().partitions():
+            lines = [
+                MeterReadingWithDetail.from_orm(reading).json() + "\n"
+                for reading in readings
+            ]
+
+            # release rows already sent so the identity map stays small
+            session.expunge_all()
+
+            yield "".join(lines)
+
+
+@router.get("/list/page")
+async def list_meterreadings_page(
+    period_date: Optional[date] = None,
+    route_id: Optional[int] = None,
+    status_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    limit: int = pagination.DEFAULT_PAGE_SIZE,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_lwsc_db),
+):
+    stmt = get_meterreading_page_query(
+        period_date, route_id, status_id, user_id, cursor
+    )
+
+    if stream:
+        # stream every matching reading as newline delimited json
+        return StreamingResponse(
+            stream_meterreadings(stmt), media_type="application/x-ndjson"
+        )
+
+    size = pagination.get_page_size(limit)
+
+    # load one extra row to know if there is a next page
+    result = await db.execute(stmt.limit(size + 1))
+    readings = result.scalars().all()
+
+    nextCursor = None
+
+    if len(readings) > size:
+        readings = readings[:size]
+        last = readings[-1]
+        nextCursor = pagination.encode_cursor(last.read_date.isoformat(), last.id)
+
+    return ParamMeterReadingPage(
+        items=readings,
+        count=len(readings),
+        next_cursor=nextCursor,
+    )
+
+
 @router.put("/review-update/{id}", response_model=MeterReading)
 async def review_posting(
     id: int, review: AppReview, db: AsyncSession = Depends(get_lwsc_db)
@@ -499,12 +885,15 @@ async def review_posting(
             # three levels and on last stage
             approveMeeting = True
 
-    if approveMeeting:
-        # change announcement status
-        reading.status_id = lwscapp.STATUS_APPROVED
-        reading.stage_id = lwscapp.APPROVAL_STAGE_APPROVED
-
     try:
+        if approveMeeting:
+            # change announcement status
+            reading.status_id = lwscapp.STATUS_APPROVED
+            reading.stage_id = lwscapp.APPROVAL_STAGE_APPROVED
+
+            # roll up consumption in the same transaction
+            await lwscrollup.add_reading_to_rollup(reading.id, db)
+
         await db.commit()
         await db.refresh(reading)
     except Exception as e:
@@ -512,4 +901,203 @@ async def review_posting(
         raise HTTPException(
             status_code=400, detail=f"Unable to update meter reading: {e}"
         )
+
+    if approveMeeting:
+        # approved readings are part of the dashboard totals
+        dashboard_routes.invalidate_ytd_dashboard(reading.read_date.year)
+
     return reading
+
+
+REBILL_BATCH_SIZE = 1000
+
+
+async def get_period_rebill_data(period_date: date, db: AsyncSession):
+    """
+    Loads the readings of a period and each customer's previous approved reading
+    """
+    # readings in period with customer category
+    result = await db.execute(
+        select(
+            MeterReadingDB.id,
+            MeterReadingDB.customer_id,
+            CustomerDB.cat_id,
+            MeterReadingDB.current,
+            MeterReadingDB.consumption_days,
+            MeterReadingDB.consumption_daily,
+        )
+        .join(CustomerDB, MeterReadingDB.customer_id == CustomerDB.id)
+        .where(MeterReadingDB.period_date == period_date)
+        .order_by(MeterReadingDB.id)
+    )
+    readings = result.all()
+
+    # latest approved reading before the period, ordered by customer
+    result = await db.execute(
+        select(MeterReadingDB.customer_id, MeterReadingDB.current)
+        .distinct(MeterReadingDB.customer_id)
+        .where(
+            MeterReadingDB.customer_id.in_(
+                select(MeterReadingDB.customer_id).where(
+                    MeterReadingDB.period_date == period_date
+                )
+            ),
+            MeterReadingDB.status_id == assist.STATUS_APPROVED,
+            MeterReadingDB.period_date < period_date,
+        )
+        .order_by(MeterReadingDB.customer_id, desc(MeterReadingDB.read_date))
+    )
+    previousReadings = result.all()
+
+    return readings, previousReadings
+
+
+def compute_period_rebill(readings, previousReadings, tariffs: dict):
+    """
+    Computes the consumption of readings as arrays, one category at a time
+
+    Readings whose customer has no previous approved reading are left out,
+    the same way an upload leaves their consumption unchanged.
+    """
+    ids = np.array([row.id for row in readings], dtype=np.int64)
+    customerIds = np.array([row.customer_id for row in readings], dtype=np.int64)
+    catIds = np.array([row.cat_id for row in readings], dtype=np.int64)
+    current = np.array([row.current for row in readings], dtype=np.float64)
+    days = np.array([row.consumption_days or 0 for row in readings], dtype=np.float64)
+    daily = np.array(
+        [
+            np.nan if row.consumption_daily is None else row.consumption_daily
+            for row in readings
+        ],
+        dtype=np.float64,
+    )
+
+    # match each reading to its customer's previous reading
+    previousIds = np.array(
+        [row.customer_id for row in previousReadings], dtype=np.int64
+    )
+    previousCurrent = np.array(
+        [row.current for row in previousReadings], dtype=np.float64
+    )
+
+    position = np.searchsorted(previousIds, customerIds)
+    position[position >= len(previousIds)] = 0
+
+    hasPrevious = (
+        np.zeros(len(ids), dtype=bool)
+        if len(previousIds) == 0
+        else (previousIds[position] == customerIds)
+    )
+    hasPrevious &= ~np.isnan(current)
+
+    ids = ids[hasPrevious]
+    catIds = catIds[hasPrevious]
+    current = current[hasPrevious]
+    days = days[hasPrevious]
+    daily = daily[hasPrevious]
+    previous = previousCurrent[position[hasPrevious]]
+
+    consumptionM3 = current - previous
+    consumptionZMW = np.zeros(len(ids), dtype=np.float64)
+
+    for catId in np.unique(catIds):
+        inCategory = catIds == catId
+        tariff = tariffs.get(int(catId), lwsctariff.EMPTY_TARIFF)
+        consumptionZMW[inCategory] = tariff.get_rates(consumptionM3[inCategory])
+
+    # daily consumption where the days are known
+    hasDays = days > 0
+    daily[hasDays] = np.round(consumptionM3[hasDays] / days[hasDays], 2)
+
+    return [
+        {
+            "b_id": readingId,
+            "previous": readingPrevious,
+            "consumption_m3": readingM3,
+            "consumption_zmw": readingZMW,
+            "consumption_daily": None if np.isnan(readingDaily) else readingDaily,
+        }
+        for readingId, readingPrevious, readingM3, readingZMW, readingDaily in zip(
+            ids.tolist(),
+            previous.tolist(),
+            consumptionM3.tolist(),
+            consumptionZMW.tolist(),
+            daily.tolist(),
+        )
+    ]
+
+
+@router.post("/rebill")
+async def rebill_period(
+    rebill: ParamRebillPeriod, db: AsyncSession = Depends(get_lwsc_db)
+):
+    # check user exists
+    result = await db.execute(select(UserDB.email).where(UserDB.id == rebill.user_id))
+    userEmail = result.scalar()
+    if not userEmail:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The user with id '{rebill.user_id}' does not exist",
+        )
+
+    startProcess = time.perf_counter()
+
+    readings, previousReadings = await get_period_rebill_data(rebill.period_date, db)
+    tariffs = await lwsctariff.get_tariffs(db)
+
+    updates = compute_period_rebill(readings, previousReadings, tariffs)
+
+    table = MeterReadingDB.__table__
+    stmt = (
+        table.update()
+        .where(table.c.id == bindparam("b_id"))
+        .values(
+            previous=bindparam("previous"),
+            consumption_m3=bindparam("consumption_m3"),
+            consumption_zmw=bindparam("consumption_zmw"),
+            consumption_daily=bindparam("consumption_daily"),
+            updated_at=assist.get_current_date(False),
+            updated_by=userEmail,
+        )
+    )
+
+    try:
+        connection = await db.connection()
+
+        for start in range(0, len(updates), REBILL_BATCH_SIZE):
+            await connection.execute(stmt, updates[start : start + REBILL_BATCH_SIZE])
+
+        # roll up the changed consumption of approved readings again
+        result = await db.execute(
+            select(lwscrollup.READ_YEAR)
+            .distinct()
+            .where(
+                MeterReadingDB.period_date == rebill.period_date,
+                MeterReadingDB.status_id == assist.STATUS_APPROVED,
+            )
+        )
+        years = result.scalars().all()
+
+        if years:
+            await lwscrollup.rebuild_consumption_rollups(db, years)
+
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"Unable to rebill meter readings: {e}"
+        )
+
+    # approved readings may have changed totals
+    dashboard_routes.invalidate_ytd_dashboard()
+
+    duration = time.perf_counter() - startProcess
+
+    return {
+        "succeeded": True,
+        "message": f"Rebilled {len(updates)} of {len(readings)} meter reading(s) for {rebill.period_date}",
+        "readings": len(readings),
+        "updated": len(updates),
+        "seconds": round(duration, 3),
+        "readings_per_second": round(len(readings) / duration, 1) if duration else 0.0,
+    }
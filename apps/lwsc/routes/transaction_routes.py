@@ -5,10 +5,10 @@ from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import Session, joinedload, selectinload
-from typing import List
+from typing import List, Optional
 
-from apps.lwsc import lwscapp
-from apps.lwsc.lwscdb import get_lwsc_db
+from apps.lwsc import lwscapp, lwscexports
+from apps.lwsc.lwscdb import AsyncSessionLocal, get_lwsc_db
 from apps.lwsc.models.customer_model import CustomerDB
 from apps.lwsc.models.transaction_group_model import TransactionGroupDB
 from apps.lwsc.models.transaction_model import (
@@ -20,7 +20,7 @@ from apps.lwsc.models.transaction_model import (
 )
 from apps.lwsc.models.transaction_type_model import TransactionTypeDB
 from apps.lwsc.models.user_model import UserDB
-from helpers import assist
+from helpers import assist, export
 
 import pandas as pd
 import numpy as np
@@ -148,6 +148,37 @@ async def list_transactions(db: AsyncSession = Depends(get_lwsc_db)):
     return transactions
 
 
+@router.get("/export")
+async def export_transactions(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    route_id: Optional[int] = None,
+    district_id: Optional[int] = None,
+    format: str = export.FORMAT_XLSX,
+):
+    """
+    Exports the transactions matching the filters as XLSX or CSV
+
+    Rows are read with a server-side cursor and written as they arrive.
+    """
+    if format not in export.MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The export format '{format}' is not supported",
+        )
+
+    stmt = lwscexports.get_transaction_export_query(
+        date_from, date_to, route_id, district_id
+    )
+
+    return export.export_response(
+        export.stream_query(AsyncSessionLocal, stmt),
+        lwscexports.TRANSACTION_COLUMNS,
+        "transactions",
+        format,
+    )
+
+
 @router.get("/customer/{account}", response_model=List[TransactionWithDetail])
 async def list_customer_transactions(
     account: str, db: AsyncSession = Depends(get_lwsc_db)
@@ -16,8 +16,10 @@ from apps.lwsc.models.walkroute_model import (
 )
 from helpers import assist
 from helpers import validation
+from helpers import passwords
 from apps.lwsc.models.review_model import AppReview
 from apps.lwsc.models.user_model import User, UserDB, UserSimple, UserWithDetail
+from apps.lwsc import lwscauth
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -50,7 +52,7 @@ async def create_user(user: User, db: AsyncSession = Depends(get_lwsc_db)):
         address_postal=user.address_postal,
         # account
         role_id=user.role_id,
-        password=assist.hash_password(user.password),
+        password=await passwords.hash_password(user.password),
         # walkr routes
         walk_routes=user.walk_routes,
         # approval
@@ -201,7 +203,7 @@ async def import_users(
                 address_postal=None,
                 # account
                 role_id=lwscapp.ROLE_METERREADER,
-                password=assist.hash_password(email[:5]),
+                password=await passwords.hash_password(email[:5]),
                 # walkr routes
                 walk_routes=routes,
                 # approval
@@ -267,13 +269,16 @@ async def update_configuration(
     for key, value in config_update.dict(exclude_unset=True).items():
         # if password, encrypt
         if key == "password":
-            setattr(user, key, assist.hash_password(value))
+            setattr(user, key, await passwords.hash_password(value))
         else:
             setattr(user, key, value)
 
     try:
         await db.commit()
         await db.refresh(user)
+
+        # the role may have changed
+        lwscauth.invalidate_user_role(user_id)
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to update user {e}")
@@ -383,7 +388,7 @@ async def initialize(db: AsyncSession = Depends(get_lwsc_db)):
             address_postal=value["address_postal"],
             # account
             role_id=value["role"],
-            password=assist.hash_password(value["password"]),
+            password=await passwords.hash_password(value["password"]),
             # approval
             status_id=value["status_id"],
             stage_id=value["stage_id"],
@@ -47,7 +47,7 @@ async def send_auth_message(param: AuthParam):
         ]
     }
 
-    client = get_http_client()
+    client = get_http_client(assist.INFOBIP_API_URL)
 
     response = await client.post(assist.INFOBIP_API_URL, json=data, headers=headers)
 
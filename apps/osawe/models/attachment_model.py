@@ -17,6 +17,7 @@ class AttachmentDB(Base):
     path = Column(String, nullable=True)
     filesize = Column(Integer, nullable=True)
     filetype = Column(String, nullable=True)
+    sha256 = Column(String(64), nullable=True)
     
     # linkage
     parent = Column(Integer, nullable=True)
@@ -47,6 +48,7 @@ class Attachment(BaseModel):
     path: Optional[str] = None
     filesize: Optional[int] = None
     filetype: Optional[str] = None
+    sha256: Optional[str] = None
     
     # linkage
     parent: Optional[int] = None
@@ -59,7 +59,7 @@ class GuarantorDB(Base):
 
     # relationships
     member = relationship("MemberDB", back_populates="guarantor", lazy="selectin")
-    posting = relationship("MonthlyPostingDB", back_populates="guarantor", lazy="selectin")
+    posting = relationship("MonthlyPostingDB", back_populates="guarantor", lazy="raise")
     stage = relationship("ReviewStageDB", back_populates="gurantor", lazy="selectin")
     status = relationship("StatusTypeDB", back_populates="gurantor", lazy="selectin")
 
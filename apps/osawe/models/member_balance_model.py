@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Float, ForeignKey, Integer, DateTime, UniqueConstraint
+from pydantic import BaseModel
+from typing import Optional
+from apps.osawe.osawedb import Base
+from datetime import datetime
+
+
+# ---------- SQLAlchemy Models ----------
+class MemberBalanceDB(Base):
+    __tablename__ = "member_balances"
+    __table_args__ = (
+        # balances of a year, of all members or of one member
+        UniqueConstraint("year", "user_id", "type_id", name="uq_member_balances_key"),
+    )
+
+    # id
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+
+    # key
+    year = Column(Integer, nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    type_id = Column(Integer, ForeignKey("list_transaction_types.id"), nullable=False)
+
+    # approved transactions
+    amount = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    # service columns
+    updated_at = Column(DateTime(timezone=True), default=datetime.now, nullable=True)
+
+
+# ---------- Pydantic Schemas ----------
+class MemberBalance(BaseModel):
+    # id
+    id: Optional[int] = None
+
+    # key
+    year: int
+    user_id: int
+    type_id: int
+
+    # approved transactions
+    amount: float
+    count: int
+
+    # service columns
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        orm_mode = True
@@ -19,7 +19,7 @@ class MemberDB(Base):
     number = Column(String, nullable=True)
 
     # user linked to this member
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=True)
 
     # personal details
     fname = Column(String, nullable=False)
@@ -86,17 +86,17 @@ class MemberDB(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=datetime.now, nullable=True)
     updated_by = Column(String, nullable=True)
 
-    # relationships
-    user = relationship("UserDB", back_populates="member", lazy="selectin")
+    # relationships, loaded per route with the plans in apps/osawe/osaweloads.py
+    user = relationship("UserDB", back_populates="member", lazy="raise")
     postings = relationship(
-        "MonthlyPostingDB", back_populates="member", lazy="selectin"
+        "MonthlyPostingDB", back_populates="member", lazy="raise"
     )
-    stage = relationship("ReviewStageDB", back_populates="members", lazy="selectin")
-    status = relationship("StatusTypeDB", back_populates="members", lazy="selectin")
-    attachment = relationship("AttachmentDB", back_populates="member", lazy="selectin")
-    guarantor = relationship("GuarantorDB", back_populates="member", lazy="selectin")
+    stage = relationship("ReviewStageDB", back_populates="members", lazy="raise")
+    status = relationship("StatusTypeDB", back_populates="members", lazy="raise")
+    attachment = relationship("AttachmentDB", back_populates="member", lazy="raise")
+    guarantor = relationship("GuarantorDB", back_populates="member", lazy="raise")
     paymentmethod = relationship(
-        "PaymentMethodDB", back_populates="member", lazy="selectin"
+        "PaymentMethodDB", back_populates="member", lazy="raise"
     )
 
 
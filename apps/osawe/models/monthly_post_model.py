@@ -34,7 +34,7 @@ class MonthlyPostingDB(Base):
     type = Column(Integer, nullable=False)
 
     # user
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True, nullable=False)
 
     # member
     member_id = Column(Integer, ForeignKey("members.id"), nullable=False)
@@ -43,7 +43,9 @@ class MonthlyPostingDB(Base):
     guarantor_id = Column(Integer, ForeignKey("guarantors.id"), nullable=False)
 
     # period
-    period_id = Column(String, ForeignKey("list_posting_periods.id"), nullable=False)
+    period_id = Column(
+        String, ForeignKey("list_posting_periods.id"), index=True, nullable=False
+    )
 
     # meeting
     meeting_attendance = Column(String, nullable=False)
@@ -127,18 +129,18 @@ class MonthlyPostingDB(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=datetime.now, nullable=True)
     updated_by = Column(String, nullable=True)
 
-    # relationships
-    user = relationship("UserDB", back_populates="postings", lazy="selectin")
-    member = relationship("MemberDB", back_populates="postings", lazy="selectin")
-    guarantor = relationship("GuarantorDB", back_populates="posting", lazy="selectin")
+    # relationships, loaded per route with the plans in apps/osawe/osaweloads.py
+    user = relationship("UserDB", back_populates="postings", lazy="raise")
+    member = relationship("MemberDB", back_populates="postings", lazy="raise")
+    guarantor = relationship("GuarantorDB", back_populates="posting", lazy="raise")
     paymentmethod = relationship(
-        "PaymentMethodDB", back_populates="posting", lazy="selectin"
+        "PaymentMethodDB", back_populates="posting", lazy="raise"
     )
-    status = relationship("StatusTypeDB", back_populates="postings", lazy="selectin")
-    stage = relationship("ReviewStageDB", back_populates="postings", lazy="selectin")
-    transactions = relationship("TransactionDB", back_populates="post", lazy="selectin")
-    period = relationship("PostingPeriodDB", back_populates="postings", lazy="selectin")
-    attachment = relationship("AttachmentDB", back_populates="post", lazy="selectin")
+    status = relationship("StatusTypeDB", back_populates="postings", lazy="raise")
+    stage = relationship("ReviewStageDB", back_populates="postings", lazy="raise")
+    transactions = relationship("TransactionDB", back_populates="post", lazy="raise")
+    period = relationship("PostingPeriodDB", back_populates="postings", lazy="raise")
+    attachment = relationship("AttachmentDB", back_populates="post", lazy="raise")
 
 
 # ---------- Pydantic Schemas ----------
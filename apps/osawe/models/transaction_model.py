@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Float, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
@@ -19,6 +19,24 @@ from datetime import date, datetime
 # ---------- SQLAlchemy Models ----------
 class TransactionDB(Base):
     __tablename__ = "transactions"
+    __table_args__ = (
+        # transactions of a member by type and status, ordered by date
+        Index(
+            "ix_transactions_user_type_status_date",
+            "user_id",
+            "type_id",
+            "status_id",
+            "date",
+        ),
+        # transactions of all members by type and status, ordered by date
+        Index("ix_transactions_type_status_date", "type_id", "status_id", "date"),
+        # only child transactions such as penalty and loan payments have a parent
+        Index(
+            "ix_transactions_parent_id",
+            "parent_id",
+            postgresql_where=text("parent_id IS NOT NULL"),
+        ),
+    )
 
     # id
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
@@ -48,7 +66,10 @@ class TransactionDB(Base):
 
     # transaction
     post_id = Column(
-        Integer, ForeignKey("monthly_postings.id", ondelete="CASCADE"), nullable=True
+        Integer,
+        ForeignKey("monthly_postings.id", ondelete="CASCADE"),
+        index=True,
+        nullable=True,
     )
     period_id = Column(Integer, nullable=True)
     date = Column(DateTime(timezone=True), nullable=False)
@@ -93,34 +114,34 @@ class TransactionDB(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=datetime.now, nullable=True)
     updated_by = Column(String, nullable=True)
 
-    # relationships
-    user = relationship("UserDB", back_populates="transactions", lazy="selectin")
+    # relationships, loaded per route with the plans in apps/osawe/osaweloads.py
+    user = relationship("UserDB", back_populates="transactions", lazy="raise")
     type = relationship(
-        "TransactionTypeDB", back_populates="transactions", lazy="selectin"
+        "TransactionTypeDB", back_populates="transactions", lazy="raise"
     )
     group = relationship(
-        "TransactionGroupDB", back_populates="transactions", lazy="selectin"
+        "TransactionGroupDB", back_populates="transactions", lazy="raise"
     )
     ptype = relationship(
-        "PenaltyTypeDB", back_populates="transactions", lazy="selectin"
+        "PenaltyTypeDB", back_populates="transactions", lazy="raise"
     )
     state = relationship(
-        "TransactionStateDB", back_populates="transactions", lazy="selectin"
+        "TransactionStateDB", back_populates="transactions", lazy="raise"
     )
     source = relationship(
-        "TransactionSourceDB", back_populates="transactions", lazy="selectin"
+        "TransactionSourceDB", back_populates="transactions", lazy="raise"
     )
     status = relationship(
-        "StatusTypeDB", back_populates="transactions", lazy="selectin"
+        "StatusTypeDB", back_populates="transactions", lazy="raise"
     )
     stage = relationship(
-        "ReviewStageDB", back_populates="transactions", lazy="selectin"
+        "ReviewStageDB", back_populates="transactions", lazy="raise"
     )
     post = relationship(
-        "MonthlyPostingDB", back_populates="transactions", lazy="selectin"
+        "MonthlyPostingDB", back_populates="transactions", lazy="raise"
     )
     attachment = relationship(
-        "AttachmentDB", back_populates="transaction", lazy="selectin"
+        "AttachmentDB", back_populates="transaction", lazy="raise"
     )
 
 
@@ -1,4 +1,5 @@
 from apps.osawe.osawedb import engine, Base
+from apps.osawe import osawemigrations
 
 from apps.osawe.routes import status_type_routes, transaction_routes, transaction_source_routes
 from apps.osawe.routes import transaction_type_routes, user_routes
@@ -71,4 +72,5 @@ def include_osawe_routes(app):
 async def init_osawe_db(app):
     async with engine.begin() as conn:
         print("Application osawe starting up old...")
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(osawemigrations.upgrade)
\ No newline at end of file
@@ -0,0 +1,78 @@
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from apps.osawe.osawedb import get_osawe_db
+from apps.osawe.models.user_model import UserDB
+from helpers import assist, tokens
+from helpers.cache import TTLCache
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/osawe/auth/login")
+
+# tokens are issued for one app, so the tokens of the other apps are refused
+TOKEN_AUDIENCE = "osawe"
+
+# user roles keyed by user id, so a role change applies within a minute
+user_roles = TTLCache(ttl=60, maxsize=4096)
+
+
+async def get_user_role(user_id: int, db: AsyncSession):
+    """
+    Gets the current role of a user, from the cache when possible
+
+    Args:
+        user_id (int): The id of the user.
+        db (AsyncSession): The session used when the role is not cached.
+
+    Returns:
+        int: The role id, or None if the user does not exist.
+    """
+    role = user_roles.get(user_id)
+
+    if role is not None:
+        return role
+
+    result = await db.execute(select(UserDB.role).where(UserDB.id == user_id))
+    role = result.scalars().first()
+
+    if role is not None:
+        user_roles.set(user_id, role)
+
+    return role
+
+
+def invalidate_user_role(user_id: int):
+    """
+    Drops the cached role of a user. Call after the user is updated
+    """
+    user_roles.invalidate(user_id)
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_osawe_db)
+):
+    """
+    Gets the claims of the bearer token with the current role of the user
+
+    Needs no database round trip once the token and role are cached.
+    """
+    claims = tokens.decode_token(token, TOKEN_AUDIENCE)
+    role = await get_user_role(claims["userid"], db)
+
+    if role is None:
+        raise tokens.get_unauthorized("The user of the specified token does not exist")
+
+    return {**claims, "role": role}
+
+
+async def get_administrator(user: dict = Depends(get_current_user)):
+    """
+    Gets the current user, allowing only administrators
+    """
+    if user["role"] != assist.USER_ADMIN:
+        raise HTTPException(
+            status_code=403, detail=f"You are not authorized to access this resource"
+        )
+
+    return user
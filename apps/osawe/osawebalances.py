@@ -0,0 +1,247 @@
+import asyncio
+import sys
+
+from sqlalchemy import Integer, and_, cast, delete, func, or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from apps.osawe.models.member_balance_model import MemberBalanceDB
+from apps.osawe.models.transaction_model import TransactionDB
+from helpers import assist
+
+BALANCE_KEY = ["user_id", "year", "type_id"]
+
+BALANCE_VALUES = ["amount", "count"]
+
+TRANSACTION_YEAR = cast(func.extract("year", TransactionDB.date), Integer)
+
+# balances further apart are reported by the check
+AMOUNT_TOLERANCE = 0.005
+
+
+def get_balance_select(*criteria, sign: int = 1):
+    """
+    Aggregates the approved transactions matching the criteria into balance rows
+
+    Args:
+        criteria: Filters of the transactions.
+        sign (int): 1 to add the transactions, -1 to take them off.
+    """
+    return (
+        select(
+            TransactionDB.user_id.label("user_id"),
+            TRANSACTION_YEAR.label("year"),
+            TransactionDB.type_id.label("type_id"),
+            (func.coalesce(func.sum(TransactionDB.amount), 0) * sign).label("amount"),
+            (func.count(TransactionDB.id) * sign).label("count"),
+            func.now(),
+        )
+        .where(TransactionDB.status_id == assist.STATUS_APPROVED, *criteria)
+        .group_by(TransactionDB.user_id, TRANSACTION_YEAR, TransactionDB.type_id)
+    )
+
+
+def get_balance_insert(*criteria, sign: int = 1):
+    table = MemberBalanceDB.__table__
+
+    stmt = insert(table).from_select(
+        BALANCE_KEY + BALANCE_VALUES + ["updated_at"],
+        get_balance_select(*criteria, sign=sign),
+    )
+
+    # add to the balance already held for the key
+    return stmt.on_conflict_do_update(
+        constraint="uq_member_balances_key",
+        set_={
+            **{name: table.c[name] + stmt.excluded[name] for name in BALANCE_VALUES},
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+
+
+def get_rebuild_statements(years: list | None = None):
+    """
+    Gets the statements recomputing the balances from the approved transactions
+    """
+    criteria = []
+    stmt = delete(MemberBalanceDB)
+
+    if years is not None:
+        criteria.append(TRANSACTION_YEAR.in_(years))
+        stmt = stmt.where(MemberBalanceDB.year.in_(years))
+
+    return [stmt, get_balance_insert(*criteria)]
+
+
+async def add_to_balances(db: AsyncSession, transactions: list):
+    """
+    Adds new or newly approved transactions to the member balances
+
+    Runs in the caller's transaction so the balances are committed together
+    with the transactions. Transactions that are not approved are skipped.
+
+    Args:
+        db (AsyncSession): The session holding the transactions.
+        transactions (list): The TransactionDB items, flushed here if new.
+    """
+    if not transactions:
+        return
+
+    await db.flush()
+
+    ids = [transaction.id for transaction in transactions]
+    await db.execute(get_balance_insert(TransactionDB.id.in_(ids)))
+
+
+async def remove_from_balances(db: AsyncSession, transactions: list):
+    """
+    Takes transactions off the member balances before they are changed
+
+    The stored rows are read, so call before changes to the transactions are
+    flushed and add them back with add_to_balances afterwards.
+    """
+    if not transactions:
+        return
+
+    ids = [transaction.id for transaction in transactions]
+    await db.execute(get_balance_insert(TransactionDB.id.in_(ids), sign=-1))
+
+
+async def get_member_balances(db: AsyncSession, user_id: int, year: int) -> dict:
+    """
+    Gets the balances of a member for a year by transaction type id
+    """
+    result = await db.execute(
+        select(MemberBalanceDB).where(
+            MemberBalanceDB.year == year,
+            MemberBalanceDB.user_id == user_id,
+        )
+    )
+
+    return {balance.type_id: balance for balance in result.scalars().all()}
+
+
+async def rebuild_member_balances(db: AsyncSession, years: list | None = None):
+    """
+    Recomputes the member balances from the approved transactions
+
+    Args:
+        db (AsyncSession): The session to rebuild in. The caller commits.
+        years (list): The years to rebuild. All years are rebuilt if not given.
+    """
+    for stmt in get_rebuild_statements(years):
+        await db.execute(stmt)
+
+
+def rebuild(conn):
+    """
+    Migration step filling the balances of the transactions already approved
+    """
+    for stmt in get_rebuild_statements():
+        conn.execute(stmt)
+
+
+async def get_balance_differences(db: AsyncSession, years: list | None = None):
+    """
+    Compares the stored balances with the approved transactions
+
+    Args:
+        db (AsyncSession): The session to read with.
+        years (list): The years to check. All years are checked if not given.
+
+    Returns:
+        list: (user_id, year, type_id, stored amount, stored count, amount,
+        count) of each key that differs, None where a side has no row.
+    """
+    criteria = []
+    stored = select(MemberBalanceDB)
+
+    if years is not None:
+        criteria.append(TRANSACTION_YEAR.in_(years))
+        stored = stored.where(MemberBalanceDB.year.in_(years))
+
+    computed = get_balance_select(*criteria).subquery()
+    stored = stored.subquery()
+
+    # balances taken down to nothing are the same as no balance
+    stored_amount = func.coalesce(stored.c.amount, 0)
+    stored_count = func.coalesce(stored.c.count, 0)
+
+    keys = [
+        func.coalesce(stored.c[name], computed.c[name]).label(name)
+        for name in BALANCE_KEY
+    ]
+
+    stmt = (
+        select(
+            *keys,
+            stored.c.amount,
+            stored.c.count,
+            computed.c.amount,
+            computed.c.count,
+        )
+        .select_from(
+            stored.outerjoin(
+                computed,
+                and_(*[stored.c[name] == computed.c[name] for name in BALANCE_KEY]),
+                full=True,
+            )
+        )
+        .where(
+            or_(
+                stored_count != func.coalesce(computed.c.count, 0),
+                func.abs(stored_amount - func.coalesce(computed.c.amount, 0))
+                > AMOUNT_TOLERANCE,
+            )
+        )
+        .order_by(keys[1], keys[0], keys[2])
+    )
+
+    result = await db.execute(stmt)
+
+    return [tuple(row) for row in result.all()]
+
+
+async def main(command: str, years: list | None = None):
+    from apps.osawe import osaweapp  # noqa: F401 registers all osawe models
+    from apps.osawe.osawedb import AsyncSessionLocal, Base, engine
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionLocal() as db:
+        result = await get_balance_differences(db, years)
+
+        if command == "rebuild":
+            await rebuild_member_balances(db, years)
+            await db.commit()
+
+    await engine.dispose()
+
+    return result
+
+
+if __name__ == "__main__":
+    # python -m apps.osawe.osawebalances [check|rebuild] [year ...]
+    command = sys.argv[1] if len(sys.argv) > 1 else "check"
+
+    if command not in ("check", "rebuild"):
+        sys.exit(f"Unknown command '{command}', use check or rebuild")
+
+    years = [int(year) for year in sys.argv[2:]] or None
+
+    differences = asyncio.run(main(command, years))
+
+    for user_id, year, type_id, amount, count, expected, expected_count in differences:
+        print(
+            f"user {user_id} {year} type {type_id}: stored {amount} ({count}), "
+            f"transactions {expected} ({expected_count})"
+        )
+
+    if command == "rebuild":
+        print(f"Member balances rebuilt for {years or 'all years'}")
+    elif differences:
+        sys.exit(1)
+    else:
+        print("Member balances match the approved transactions")
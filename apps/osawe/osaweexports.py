@@ -0,0 +1,160 @@
+from sqlalchemy.future import select
+
+from apps.osawe.models.member_model import MemberDB
+from apps.osawe.models.monthly_post_model import MonthlyPostingDB
+from apps.osawe.models.posting_period_model import PostingPeriodDB
+from apps.osawe.models.review_stages_model import ReviewStageDB
+from apps.osawe.models.status_types_model import StatusTypeDB
+from apps.osawe.models.transaction_model import TransactionDB
+from apps.osawe.models.transaction_sources_model import TransactionSourceDB
+from apps.osawe.models.transaction_states_model import TransactionStateDB
+from apps.osawe.models.transaction_types_model import TransactionTypeDB
+from apps.osawe.models.user_model import UserDB
+from helpers import export
+
+# columns never exported
+EXCLUDED_COLUMNS = {"password"}
+
+
+def get_columns(model, relation: str | None = None):
+    """
+    Gets the columns of a model labelled as the grids name their fields
+
+    Args:
+        model: The model of the table.
+        relation (string): The relationship name the model is reached by,
+            prefixed to the labels (e.g. 'status.status_name').
+    """
+    prefix = f"{relation}." if relation else ""
+
+    return [
+        column.label(f"{prefix}{column.key}")
+        for column in model.__table__.columns
+        if column.key not in EXCLUDED_COLUMNS
+    ]
+
+
+def filter_dates(stmt, column, filters: dict):
+    """
+    Filters a query on the days from date_from to date_to, both included
+
+    Days start at midnight in the current time zone, as in the lwsc exports.
+    """
+    start, end = export.get_date_range(filters.get("date_from"), filters.get("date_to"))
+
+    if start is not None:
+        stmt = stmt.where(column >= start)
+
+    if end is not None:
+        stmt = stmt.where(column < end)
+
+    return stmt
+
+
+def get_members_query(filters: dict):
+    stmt = (
+        select(
+            *get_columns(MemberDB),
+            StatusTypeDB.status_name.label("status.status_name"),
+            ReviewStageDB.stage_name.label("stage.stage_name"),
+        )
+        .outerjoin(StatusTypeDB, StatusTypeDB.id == MemberDB.status_id)
+        .outerjoin(ReviewStageDB, ReviewStageDB.id == MemberDB.stage_id)
+        .order_by(MemberDB.id)
+    )
+
+    if filters.get("status_id") is not None:
+        stmt = stmt.where(MemberDB.status_id == filters["status_id"])
+
+    return stmt
+
+
+def get_transactions_query(filters: dict):
+    stmt = (
+        select(
+            *get_columns(TransactionDB),
+            UserDB.fname.label("user.fname"),
+            UserDB.lname.label("user.lname"),
+            TransactionTypeDB.type_name.label("type.type_name"),
+            TransactionStateDB.state_name.label("state.state_name"),
+            TransactionSourceDB.source_name.label("source.source_name"),
+            StatusTypeDB.status_name.label("status.status_name"),
+            ReviewStageDB.stage_name.label("stage.stage_name"),
+        )
+        .outerjoin(UserDB, UserDB.id == TransactionDB.user_id)
+        .outerjoin(TransactionTypeDB, TransactionTypeDB.id == TransactionDB.type_id)
+        .outerjoin(TransactionStateDB, TransactionStateDB.id == TransactionDB.state_id)
+        .outerjoin(
+            TransactionSourceDB, TransactionSourceDB.id == TransactionDB.source_id
+        )
+        .outerjoin(StatusTypeDB, StatusTypeDB.id == TransactionDB.status_id)
+        .outerjoin(ReviewStageDB, ReviewStageDB.id == TransactionDB.stage_id)
+        .order_by(TransactionDB.date, TransactionDB.id)
+    )
+
+    if filters.get("user_id") is not None:
+        stmt = stmt.where(TransactionDB.user_id == filters["user_id"])
+
+    if filters.get("type_id") is not None:
+        stmt = stmt.where(TransactionDB.type_id == filters["type_id"])
+
+    if filters.get("status_id") is not None:
+        stmt = stmt.where(TransactionDB.status_id == filters["status_id"])
+
+    return filter_dates(stmt, TransactionDB.date, filters)
+
+
+def get_monthly_postings_query(filters: dict):
+    stmt = (
+        select(
+            *get_columns(MonthlyPostingDB),
+            MemberDB.fname.label("member.fname"),
+            MemberDB.lname.label("member.lname"),
+            PostingPeriodDB.period_name.label("period.period_name"),
+            StatusTypeDB.status_name.label("status.status_name"),
+            ReviewStageDB.stage_name.label("stage.stage_name"),
+        )
+        .outerjoin(MemberDB, MemberDB.id == MonthlyPostingDB.member_id)
+        .outerjoin(PostingPeriodDB, PostingPeriodDB.id == MonthlyPostingDB.period_id)
+        .outerjoin(StatusTypeDB, StatusTypeDB.id == MonthlyPostingDB.status_id)
+        .outerjoin(ReviewStageDB, ReviewStageDB.id == MonthlyPostingDB.stage_id)
+        .order_by(MonthlyPostingDB.date, MonthlyPostingDB.id)
+    )
+
+    if filters.get("user_id") is not None:
+        stmt = stmt.where(MonthlyPostingDB.user_id == filters["user_id"])
+
+    if filters.get("period_id") is not None:
+        stmt = stmt.where(MonthlyPostingDB.period_id == filters["period_id"])
+
+    if filters.get("status_id") is not None:
+        stmt = stmt.where(MonthlyPostingDB.status_id == filters["status_id"])
+
+    return filter_dates(stmt, MonthlyPostingDB.date, filters)
+
+
+# queries that can be exported by name, each taking a dict of optional filters
+EXPORT_QUERIES = {
+    "members": get_members_query,
+    "transactions": get_transactions_query,
+    "monthly-postings": get_monthly_postings_query,
+}
+
+
+def get_export_query(name: str, filters: dict):
+    """
+    Builds a named export query
+
+    Args:
+        name (string): The name of the query, one of EXPORT_QUERIES.
+        filters (dict): The optional filters, ignored where they do not apply.
+
+    Returns:
+        Select: The query, or None if no query has the name.
+    """
+    builder = EXPORT_QUERIES.get(name)
+
+    if builder is None:
+        return None
+
+    return builder(filters)
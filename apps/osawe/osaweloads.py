@@ -0,0 +1,168 @@
+import asyncio
+import sys
+
+from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
+
+from apps.osawe.models.member_model import MemberDB
+from apps.osawe.models.monthly_post_model import MonthlyPostingDB
+from apps.osawe.models.transaction_model import TransactionDB
+from helpers import assist
+
+# The relationships of transactions, postings and members raise when they are
+# not loaded, so each query loads the ones its response needs with a plan.
+
+# TransactionWithDetail
+TRANSACTION_DETAIL = [
+    joinedload(TransactionDB.user),
+    joinedload(TransactionDB.type),
+    joinedload(TransactionDB.group),
+    joinedload(TransactionDB.status),
+    joinedload(TransactionDB.state),
+    joinedload(TransactionDB.source),
+    joinedload(TransactionDB.post),
+    joinedload(TransactionDB.ptype),
+    joinedload(TransactionDB.stage),
+    joinedload(TransactionDB.attachment),
+]
+
+# TransactionWithPenalty
+TRANSACTION_PENALTY = [
+    joinedload(TransactionDB.type),
+    joinedload(TransactionDB.ptype),
+]
+
+# the expense and earning summary
+TRANSACTION_SUMMARY = [
+    joinedload(TransactionDB.user),
+    joinedload(TransactionDB.type),
+    joinedload(TransactionDB.group),
+]
+
+# MonthlyPostingWithDetail
+POSTING_DETAIL = [
+    joinedload(MonthlyPostingDB.user),
+    joinedload(MonthlyPostingDB.stage),
+    joinedload(MonthlyPostingDB.status),
+    joinedload(MonthlyPostingDB.period),
+    joinedload(MonthlyPostingDB.attachment),
+    joinedload(MonthlyPostingDB.paymentmethod),
+]
+
+# MonthlyPostingWithMemberDetail
+POSTING_MEMBER_DETAIL = POSTING_DETAIL + [joinedload(MonthlyPostingDB.member)]
+
+# postings reviewed, the period names their transactions
+POSTING_PERIOD = [joinedload(MonthlyPostingDB.period)]
+
+# MemberWithDetail
+MEMBER_DETAIL = [
+    joinedload(MemberDB.user),
+    joinedload(MemberDB.attachment),
+    joinedload(MemberDB.stage),
+    joinedload(MemberDB.status),
+]
+
+# endpoints checked by the CLI with the most statements each may run,
+# whatever the number of rows returned. Endpoints must also succeed, one
+# failing on a relationship without a plan may run fewer statements.
+STATEMENT_BUDGETS = [
+    ("/transactions/list", 6),
+    ("/transactions/expense-earnings/list", 6),
+    ("/transactions/expense-earning-summary/{year}", 6),
+    ("/monthly-posting/list", 8),
+    ("/monthly-posting/status/{status}", 8),
+    ("/monthly-posting/period/{period}", 8),
+    ("/members/list", 3),
+    ("/guarantors/list", 4),
+    ("/paymentmethods/list", 4),
+    ("/posting-periods/ddac/{period}", 8),
+]
+
+
+async def reload(db, item, plan: list):
+    """
+    Loads an item again with the relationships of a plan, e.g. after a commit
+
+    Args:
+        db (AsyncSession): The session holding the item.
+        item: The transaction, posting or member.
+        plan (list): The loader options of the relationships needed.
+
+    Returns:
+        The item, with its columns refreshed and the relationships loaded.
+    """
+    model = type(item)
+
+    result = await db.execute(
+        select(model)
+        .options(*plan)
+        .where(model.id == item.id)
+        .execution_options(populate_existing=True)
+    )
+
+    return result.scalars().one()
+
+
+async def count_endpoint_statements(budgets: list):
+    """
+    Calls each endpoint and counts the statements it runs
+
+    Args:
+        budgets (list): (path, most statements) pairs, paths below /osawe.
+
+    Returns:
+        list: (path, status code, statements, most statements) of each endpoint.
+    """
+    import httpx
+    from fastapi import FastAPI
+
+    from apps.osawe.osaweapp import APP_ROUTE, include_osawe_routes
+    from apps.osawe.osawedb import engine
+    from helpers.database import count_statements
+
+    app = FastAPI()
+    include_osawe_routes(app)
+
+    values = {
+        "year": assist.get_current_date().year,
+        "period": assist.get_current_period(),
+        "status": assist.STATUS_SUBMITTED,
+    }
+
+    counts = []
+    # errors are answered with a 500 and reported with the endpoint
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://osawe") as client:
+        for path, budget in budgets:
+            with count_statements(engine) as statements:
+                response = await client.get(APP_ROUTE + path.format(**values))
+
+            counts.append((path, response.status_code, len(statements), budget))
+
+    await engine.dispose()
+
+    return counts
+
+
+if __name__ == "__main__":
+    # python -m apps.osawe.osaweloads, against a database with data
+    counts = asyncio.run(count_endpoint_statements(STATEMENT_BUDGETS))
+
+    over = []
+    failed = []
+
+    for path, status_code, count, budget in counts:
+        print(f"{path}: {count} statements (at most {budget}), status {status_code}")
+
+        if not 200 <= status_code < 300:
+            failed.append(path)
+        elif count > budget:
+            over.append(path)
+
+    if failed or over:
+        sys.exit(
+            f"Endpoints failed: {', '.join(failed) or 'none'}. "
+            f"Statements over budget: {', '.join(over) or 'none'}"
+        )
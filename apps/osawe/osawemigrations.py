@@ -0,0 +1,133 @@
+import asyncio
+import sys
+
+from sqlalchemy.future import select
+
+from apps.osawe import osawebalances
+from apps.osawe.models.attachment_model import AttachmentDB
+from apps.osawe.models.member_model import MemberDB
+from apps.osawe.models.monthly_post_model import MonthlyPostingDB
+from apps.osawe.models.transaction_model import TransactionDB
+from helpers import assist
+from helpers.migrations import (
+    add_columns,
+    check_queries,
+    create_indexes,
+    get_index,
+    run_migrations,
+)
+
+# migrations in the order they are applied, never reorder or rename
+MIGRATIONS = [
+    (
+        "0001_hot_lookup_indexes",
+        create_indexes(
+            get_index(TransactionDB, "ix_transactions_user_type_status_date"),
+            get_index(TransactionDB, "ix_transactions_type_status_date"),
+            get_index(TransactionDB, "ix_transactions_parent_id"),
+            get_index(TransactionDB, "ix_transactions_post_id"),
+            get_index(MonthlyPostingDB, "ix_monthly_postings_user_id"),
+            get_index(MonthlyPostingDB, "ix_monthly_postings_period_id"),
+            get_index(MemberDB, "ix_members_user_id"),
+        ),
+    ),
+    ("0002_attachment_sha256", add_columns(AttachmentDB, "sha256")),
+    # the table is created by create_all, fill it from the approved transactions
+    ("0003_member_balances", osawebalances.rebuild),
+]
+
+# hot queries and the index each one must be planned with
+HOT_QUERIES = [
+    (
+        "member transactions by type",
+        select(TransactionDB.id)
+        .where(
+            TransactionDB.user_id == 1,
+            TransactionDB.type_id == assist.TRANSACTION_SAVINGS,
+            TransactionDB.status_id == assist.STATUS_APPROVED,
+        )
+        .order_by(TransactionDB.date),
+        "ix_transactions_user_type_status_date",
+    ),
+    (
+        "all transactions by type",
+        select(TransactionDB.id)
+        .where(
+            TransactionDB.type_id == assist.TRANSACTION_LOAN,
+            TransactionDB.status_id == assist.STATUS_APPROVED,
+        )
+        .order_by(TransactionDB.date),
+        "ix_transactions_type_status_date",
+    ),
+    (
+        "loan payments",
+        select(TransactionDB.id).where(TransactionDB.parent_id == 1),
+        "ix_transactions_parent_id",
+    ),
+    (
+        "posting transactions",
+        select(TransactionDB.id).where(TransactionDB.post_id == 1),
+        "ix_transactions_post_id",
+    ),
+    (
+        "member postings",
+        select(MonthlyPostingDB.id).where(MonthlyPostingDB.user_id == 1),
+        "ix_monthly_postings_user_id",
+    ),
+    (
+        "period postings",
+        select(MonthlyPostingDB.id).where(MonthlyPostingDB.period_id == "0"),
+        "ix_monthly_postings_period_id",
+    ),
+    (
+        "member of user",
+        select(MemberDB.id).where(MemberDB.user_id == 1),
+        "ix_members_user_id",
+    ),
+]
+
+
+def upgrade(conn):
+    return run_migrations(conn, MIGRATIONS)
+
+
+def check(conn):
+    return check_queries(conn, HOT_QUERIES)
+
+
+async def main(command: str):
+    from apps.osawe import osaweapp  # noqa: F401 registers all osawe models
+    from apps.osawe.osawedb import Base, engine
+
+    async with engine.begin() as conn:
+        if command == "upgrade":
+            await conn.run_sync(Base.metadata.create_all)
+            result = await conn.run_sync(upgrade)
+        else:
+            result = await conn.run_sync(check)
+
+    await engine.dispose()
+
+    return result
+
+
+if __name__ == "__main__":
+    # python -m apps.osawe.osawemigrations [upgrade|check]
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+
+    if command not in ("upgrade", "check"):
+        sys.exit(f"Unknown command '{command}', use upgrade or check")
+
+    result = asyncio.run(main(command))
+
+    if command == "upgrade":
+        print(f"Migrations applied: {result or 'none'}")
+    elif result:
+        for name, index, used in result:
+            print(
+                f"{name}: expected {index}, planned with {sorted(used) or 'no index'}"
+            )
+
+        sys.exit(1)
+    else:
+        print("All hot queries use their index")
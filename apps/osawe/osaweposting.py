@@ -0,0 +1,193 @@
+from sqlalchemy import Float, Integer, cast, literal, null, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from apps.osawe import osawebalances
+from apps.osawe.models.monthly_post_model import MonthlyPostingDB
+from apps.osawe.models.posting_period_model import PostingPeriodDB
+from apps.osawe.models.transaction_model import TransactionDB
+from helpers import assist
+
+# transactions posted when a monthly posting is approved:
+# (type, amount field, penalty type, only when the amount is not 0)
+POSTING_TRANSACTIONS = [
+    (assist.TRANSACTION_SAVINGS, "saving", None, False),
+    (assist.TRANSACTION_SHARE, "shares", None, False),
+    (assist.TRANSACTION_SOCIAL_FUND, "social", None, False),
+    (
+        assist.TRANSACTION_PENALTY_CHARGED,
+        "late_post_penalty",
+        assist.PENALTY_LATE_POSTING,
+        True,
+    ),
+    (
+        assist.TRANSACTION_PENALTY_PAID,
+        "late_post_penalty",
+        assist.PENALTY_LATE_POSTING,
+        True,
+    ),
+    (assist.TRANSACTION_LOAN, "loan_application", assist.PENALTY_LATE_POSTING, True),
+]
+
+TRANSACTION_COLUMNS = [
+    "type_id",
+    "penalty_type_id",
+    "user_id",
+    "post_id",
+    "date",
+    "source_id",
+    "amount",
+    "comments",
+    "term_months",
+    "interest_rate",
+    "status_id",
+    "state_id",
+    "stage_id",
+    "approval_levels",
+    "created_at",
+    "created_by",
+]
+
+
+def get_loan_terms(type: int, config):
+    """
+    Gets the term and interest rate of a posting transaction, set on loans only
+    """
+    if type == assist.TRANSACTION_LOAN:
+        return config.loan_duration, config.loan_interest_rate
+
+    return None, None
+
+
+def get_posting_transactions(posting, config) -> list:
+    """
+    Creates the transactions of an approved monthly posting
+
+    Args:
+        posting (MonthlyPostingDB): The approved posting, with its period.
+        config (PostingPeriodDB): The period giving the loan terms.
+
+    Returns:
+        list: The TransactionDB items, not yet added to the session.
+    """
+    transactions = []
+    now = assist.get_current_date(False)
+
+    for type, field, penalty_type, skip_zero in POSTING_TRANSACTIONS:
+        amount = getattr(posting, field)
+
+        if skip_zero and amount == 0:
+            continue
+
+        term, interest = get_loan_terms(type, config)
+
+        transactions.append(
+            TransactionDB(
+                # id
+                type_id=type,
+                penalty_type_id=penalty_type,
+                # user
+                user_id=posting.user_id,
+                post_id=posting.id,
+                # transaction
+                date=now,
+                source_id=1,
+                amount=amount,
+                comments=posting.period.period_name,
+                # loan
+                term_months=term,
+                interest_rate=interest,
+                # approval
+                status_id=assist.STATUS_APPROVED,
+                state_id=assist.STATE_CLOSED,
+                stage_id=assist.APPROVAL_STAGE_APPROVED,
+                approval_levels=posting.approval_levels,
+                # service
+                created_by=posting.created_by,
+            )
+        )
+
+    return transactions
+
+
+def get_posting_transactions_insert(post_ids: list, config):
+    """
+    Builds one INSERT ... SELECT posting the transactions of approved postings
+
+    Each transaction of POSTING_TRANSACTIONS is a select over the postings,
+    combined with UNION ALL, so all postings are posted in one statement.
+
+    Args:
+        post_ids (list): The ids of the approved postings.
+        config (PostingPeriodDB): The period giving the loan terms.
+
+    Returns:
+        Insert: The statement, returning the ids of the new transactions.
+    """
+    now = assist.get_current_date(False)
+    selects = []
+
+    for type, field, penalty_type, skip_zero in POSTING_TRANSACTIONS:
+        amount = getattr(MonthlyPostingDB, field)
+        term, interest = get_loan_terms(type, config)
+
+        criteria = [MonthlyPostingDB.id.in_(post_ids)]
+        if skip_zero:
+            criteria.append(amount != 0)
+
+        selects.append(
+            select(
+                literal(type, Integer),
+                cast(penalty_type if penalty_type is not None else null(), Integer),
+                MonthlyPostingDB.user_id,
+                MonthlyPostingDB.id,
+                literal(now, TransactionDB.date.type),
+                literal(1, Integer),
+                amount,
+                PostingPeriodDB.period_name,
+                cast(term if term is not None else null(), Integer),
+                cast(interest if interest is not None else null(), Float),
+                literal(assist.STATUS_APPROVED, Integer),
+                literal(assist.STATE_CLOSED, Integer),
+                literal(assist.APPROVAL_STAGE_APPROVED, Integer),
+                MonthlyPostingDB.approval_levels,
+                literal(now, TransactionDB.created_at.type),
+                MonthlyPostingDB.created_by,
+            )
+            .join(PostingPeriodDB, PostingPeriodDB.id == MonthlyPostingDB.period_id)
+            .where(*criteria)
+        )
+
+    return (
+        insert(TransactionDB)
+        .from_select(TRANSACTION_COLUMNS, union_all(*selects))
+        .returning(TransactionDB.id)
+    )
+
+
+async def post_approved_postings(db: AsyncSession, post_ids: list, config) -> list:
+    """
+    Posts the transactions of approved postings and adds them to the balances
+
+    Runs in the caller's transaction so the postings, transactions and
+    balances are committed together.
+
+    Args:
+        db (AsyncSession): The osawe session.
+        post_ids (list): The ids of the approved postings.
+        config (PostingPeriodDB): The period giving the loan terms.
+
+    Returns:
+        list: The ids of the new transactions.
+    """
+    if not post_ids:
+        return []
+
+    result = await db.execute(get_posting_transactions_insert(post_ids, config))
+    ids = result.scalars().all()
+
+    if ids:
+        await db.execute(osawebalances.get_balance_insert(TransactionDB.id.in_(ids)))
+
+    return ids
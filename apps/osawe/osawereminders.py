@@ -0,0 +1,265 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timezone
+
+import httpx
+from sqlalchemy import or_, update
+from sqlalchemy.future import select
+
+from apps.osawe.models.member_model import MemberDB
+from apps.osawe.osawedb import AsyncSessionLocal
+from helpers import assist
+from helpers.cache import TTLCache
+from helpers.http_client import get_http_client
+
+# members loaded per page and messages sent per Infobip request
+REMINDER_PAGE_SIZE = 500
+REMINDER_BATCH_SIZE = 50
+
+# requests in flight at once and retries of a failed request
+REMINDER_CONCURRENCY = 4
+REMINDER_RETRIES = 3
+REMINDER_BACKOFF = 1.0
+
+# longest wait before a retry, whatever the server asks for
+REMINDER_MAX_DELAY = 30.0
+
+# statuses of recent jobs, kept for a day
+reminder_jobs = TTLCache(ttl=86400, maxsize=100)
+_current_job: dict | None = None
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+def get_pending_criteria(current: date):
+    return or_(
+        MemberDB.last_reminder_date.is_(None),
+        MemberDB.last_reminder_date != current,
+    )
+
+
+def get_reminder_message(member, period: str):
+    return {
+        "from": assist.INFOBIP_PHONE_NUMBER,
+        "to": f"+{member.mobile1}",
+        "messageId": str(uuid.uuid4()),
+        "content": {
+            "templateName": "posting_reminder",
+            "templateData": {
+                "body": {"placeholders": [f"{member.fname}", f"{period}"]},
+            },
+            "language": "en_GB",
+        },
+    }
+
+
+def get_retry_delay(attempt: int, response: httpx.Response | None) -> float:
+    delay = REMINDER_BACKOFF * 2**attempt
+
+    # honour the delay asked for by the server when rate limited
+    if response is not None and "Retry-After" in response.headers:
+        try:
+            delay = float(response.headers["Retry-After"])
+        except ValueError:
+            pass
+
+    return min(max(delay, 0), REMINDER_MAX_DELAY)
+
+
+async def post_messages(client: httpx.AsyncClient, messages: list):
+    """
+    Sends messages in one Infobip request, retrying rate limits and errors
+
+    Returns:
+        set: The ids of the messages that were accepted.
+    """
+    headers = {
+        "Authorization": f"App {assist.INFOBIP_API_TOKEN}",
+        "Content-type": "application/json",
+        "Accept": "application/json",
+    }
+
+    for attempt in range(REMINDER_RETRIES + 1):
+        response = None
+
+        try:
+            response = await client.post(
+                assist.INFOBIP_API_URL, json={"messages": messages}, headers=headers
+            )
+        except httpx.TransportError:
+            pass
+        else:
+            if response.status_code == 200:
+                break
+
+            # other client errors will not succeed on a retry
+            if response.status_code < 500 and response.status_code != 429:
+                return set()
+
+        if attempt == REMINDER_RETRIES:
+            return set()
+
+        await asyncio.sleep(get_retry_delay(attempt, response))
+
+    # messages are accepted unless reported as rejected, the request was
+    # accepted even when the report cannot be read
+    try:
+        rejected = {
+            item.get("messageId")
+            for item in response.json().get("messages", [])
+            if item.get("status", {}).get("groupName") == "REJECTED"
+        }
+    except (ValueError, AttributeError):
+        rejected = set()
+
+    return {message["messageId"] for message in messages} - rejected
+
+
+async def send_reminder_page(members: list, period: str, limit: asyncio.Semaphore):
+    """
+    Sends the reminders of a page of members in concurrent batches
+
+    Returns:
+        list: The ids of the members whose reminder was accepted.
+    """
+    client = get_http_client(assist.INFOBIP_API_URL)
+
+    async def send_batch(batch):
+        messages = {}
+
+        for member in batch:
+            messages[member.id] = get_reminder_message(member, period)
+
+        async with limit:
+            accepted = await post_messages(client, list(messages.values()))
+
+        return [
+            id for id, message in messages.items() if message["messageId"] in accepted
+        ]
+
+    batches = [
+        members[i : i + REMINDER_BATCH_SIZE]
+        for i in range(0, len(members), REMINDER_BATCH_SIZE)
+    ]
+
+    # a failed batch does not lose the batches already accepted
+    results = await asyncio.gather(
+        *(send_batch(batch) for batch in batches), return_exceptions=True
+    )
+
+    return [id for ids in results if isinstance(ids, list) for id in ids]
+
+
+def create_reminder_job(total: int | None = None):
+    global _current_job
+
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": JOB_QUEUED,
+        "total": total,
+        "sent": 0,
+        "failed": 0,
+        "error": None,
+        "created_at": datetime.now(timezone.utc),
+        "finished_at": None,
+    }
+
+    reminder_jobs.set(job["id"], job)
+    _current_job = job
+
+    return job
+
+
+def get_running_reminder_job():
+    """
+    Gets the reminder job that is queued or running, if any
+    """
+    if _current_job and _current_job["status"] in (JOB_QUEUED, JOB_RUNNING):
+        return _current_job
+
+    return None
+
+
+def claim_reminder_job():
+    """
+    Gets the reminder job that is queued or running, or creates one
+
+    The check and the creation do not await, so concurrent requests cannot
+    both create a job. The total of a new job is set once it is counted.
+
+    Returns:
+        tuple: The job and whether it was created by this call.
+    """
+    job = get_running_reminder_job()
+    if job:
+        return job, False
+
+    return create_reminder_job(), True
+
+
+def finish_reminder_job(job: dict, status: str, error: str | None = None):
+    """
+    Ends a job, e.g. one claimed for a request that did not send reminders
+    """
+    job["status"] = status
+    job["error"] = error
+    job["finished_at"] = datetime.now(timezone.utc)
+
+
+async def run_reminder_job(job: dict, current: date, period: str):
+    """
+    Sends the posting reminder to every member not yet reminded on the date
+
+    Members are paged by id. After each page, the reminder date of the
+    accepted members is set in one update.
+
+    Args:
+        job (dict): The job to report progress on.
+        current (date): The date of the reminders.
+        period (string): The late posting period shown in the message.
+    """
+    job["status"] = JOB_RUNNING
+    limit = asyncio.Semaphore(REMINDER_CONCURRENCY)
+    lastId = 0
+
+    try:
+        async with AsyncSessionLocal() as db:
+            while True:
+                result = await db.execute(
+                    select(MemberDB.id, MemberDB.fname, MemberDB.mobile1)
+                    .where(get_pending_criteria(current), MemberDB.id > lastId)
+                    .order_by(MemberDB.id)
+                    .limit(REMINDER_PAGE_SIZE)
+                )
+                members = result.all()
+
+                if not members:
+                    break
+
+                lastId = members[-1].id
+
+                # end the read transaction while messages are sent
+                await db.rollback()
+
+                sent = await send_reminder_page(members, period, limit)
+
+                if sent:
+                    await db.execute(
+                        update(MemberDB)
+                        .where(MemberDB.id.in_(sent))
+                        .values(last_reminder_date=current)
+                    )
+                    await db.commit()
+
+                job["sent"] += len(sent)
+                job["failed"] += len(members) - len(sent)
+
+        job["status"] = JOB_COMPLETED
+    except Exception as e:
+        job["status"] = JOB_FAILED
+        job["error"] = str(e)
+    finally:
+        job["finished_at"] = datetime.now(timezone.utc)
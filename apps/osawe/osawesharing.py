@@ -0,0 +1,344 @@
+import asyncio
+import sys
+import time
+from datetime import date
+from types import SimpleNamespace
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.future import select
+
+from apps.osawe.models.member_model import MemberDB
+from apps.osawe.models.transaction_model import TransactionDB
+from helpers import assist
+
+MONTHS = 12
+
+# interest rate of each month, loans taken late in the year earn less
+MONTHLY_RATES = np.array([0.10] * 9 + [0.075, 0.05, 0.025])
+
+# group totals are kept per month
+GROUP_TYPES = (
+    assist.TRANSACTION_SAVINGS,
+    assist.TRANSACTION_LOAN,
+    assist.TRANSACTION_INTEREST_CHARGED,
+)
+
+# member loan totals are kept for the year, by the summary field they fill
+LOAN_FIELDS = {
+    assist.TRANSACTION_LOAN: "loan_total",
+    assist.TRANSACTION_INTEREST_CHARGED: "loan_interest_total",
+    assist.TRANSACTION_LOAN_PAYMENT: "loan_repayment_total",
+}
+
+MEMBER_TYPES = (assist.TRANSACTION_SAVINGS, *LOAN_FIELDS)
+
+
+def get_month_query(year: int, types: tuple, per_member: bool):
+    """
+    Builds the query of approved transaction totals per type and month of a year
+
+    Args:
+        year (int): The year shared.
+        types (tuple): The transaction types summed.
+        per_member (bool): Whether totals are also grouped by user.
+    """
+    month = func.extract("month", TransactionDB.date)
+    keys = [TransactionDB.type_id, month]
+
+    if per_member:
+        keys.insert(0, TransactionDB.user_id)
+
+    return (
+        select(
+            *keys[:-1],
+            month.label("month"),
+            func.coalesce(func.sum(TransactionDB.amount), 0).label("amount"),
+        )
+        .where(
+            TransactionDB.status_id == assist.STATUS_APPROVED,
+            TransactionDB.date >= date(year, 1, 1),
+            TransactionDB.date < date(year + 1, 1, 1),
+            TransactionDB.type_id.in_(types),
+        )
+        .group_by(*keys)
+    )
+
+
+def pivot_months(rows, types: tuple, index: dict | None = None) -> dict:
+    """
+    Pivots grouped (user_id, type_id, month, amount) rows into month matrices
+
+    Args:
+        rows: The grouped rows.
+        types (tuple): The transaction types kept.
+        index (dict): The matrix row of each user id. Rows of other users are
+            skipped. Without an index rows have no user_id and give one vector
+            per type.
+
+    Returns:
+        dict: A users x months matrix, or a months vector, per type.
+    """
+    shape = (len(index), MONTHS) if index is not None else (MONTHS,)
+    matrices = {type: np.zeros(shape) for type in types}
+
+    for row in rows:
+        matrix = matrices.get(row.type_id)
+        if matrix is None:
+            continue
+
+        month = int(row.month) - 1
+
+        if index is None:
+            matrix[month] += row.amount
+        elif (position := index.get(row.user_id)) is not None:
+            matrix[position, month] += row.amount
+
+    return matrices
+
+
+def get_month_data(label: str, values) -> dict:
+    """
+    Converts 12 monthly values to the m1..m12 fields of ParamMonthData
+    """
+    data = {"id": label}
+
+    for m, value in enumerate(values.tolist(), 1):
+        data[f"m{m}"] = value
+
+    return data
+
+
+def get_prior_totals(values):
+    """
+    Gets the running total of the months before each month, along the last axis
+    """
+    totals = np.zeros_like(values)
+    totals[..., 1:] = np.cumsum(values, axis=-1)[..., :-1]
+
+    return totals
+
+
+def compute_sharing(members: list, member_rows, group_rows, pool: float | None = None):
+    """
+    Computes the year end interest sharing of all members
+
+    Interest is shared by how much of the group savings each member holds.
+    In January that is the share of the month savings times the interest
+    charged. Later months add the share of the month savings times the
+    loaned part (r1) to the share of the savings up to the month times the
+    part loaned beyond the savings (r2). Months without group savings share
+    nothing.
+
+    Args:
+        members (list): The members, matched to transactions by their id.
+        member_rows: Member totals from get_month_query(per_member=True).
+        group_rows: Group totals from get_month_query(per_member=False).
+        pool (float): The amount shared in proportion to the time value of
+            the members. Defaults to the group loan balance.
+
+    Returns:
+        dict: The totals and members of a ParamInterestSharingSummary.
+    """
+    index = {member.id: i for i, member in enumerate(members)}
+
+    member_months = pivot_months(member_rows, MEMBER_TYPES, index)
+    group_months = pivot_months(group_rows, GROUP_TYPES)
+
+    savings = member_months[assist.TRANSACTION_SAVINGS]
+    group_savings = group_months[assist.TRANSACTION_SAVINGS]
+    group_loans = group_months[assist.TRANSACTION_LOAN]
+    group_interest = group_months[assist.TRANSACTION_INTEREST_CHARGED]
+
+    # the loaned part of the month savings and the part loaned beyond them
+    r1 = np.round(np.minimum(group_savings, group_loans) * MONTHLY_RATES, 3)
+    r2 = np.round(np.maximum(group_loans - group_savings, 0) * MONTHLY_RATES, 3)
+
+    prior_savings = get_prior_totals(savings)
+    prior_group_savings = get_prior_totals(group_savings)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current_share = savings / group_savings
+        prior_share = prior_savings / prior_group_savings
+
+        sharing = np.round(current_share * r1, 3) + np.round(prior_share * r2, 3)
+        sharing[:, 0] = np.round(current_share[:, 0] * group_interest[0], 3)
+
+    shared = (group_savings != 0) & (prior_group_savings != 0)
+    shared[0] = group_savings[0] != 0
+    sharing = np.where(shared, sharing, 0.0)
+
+    itotal = sharing.sum(axis=1)
+    stotal = savings.sum(axis=1)
+    loan_totals = {
+        field: member_months[type].sum(axis=1) for type, field in LOAN_FIELDS.items()
+    }
+    loan_plus_interest = loan_totals["loan_total"] + loan_totals["loan_interest_total"]
+    loan_balance = loan_plus_interest - loan_totals["loan_repayment_total"]
+    time_value = stotal + itotal
+
+    total_loan_balance = float(loan_balance.sum())
+    group_time_value = float(time_value.sum())
+    group_share_total = float(stotal.sum())
+
+    if pool is None:
+        pool = total_loan_balance
+
+    if group_time_value:
+        final_share = np.round(time_value / group_time_value * pool, 3)
+    else:
+        final_share = np.zeros(len(members))
+
+    payout_balance = final_share - loan_balance
+
+    group_final_share = float(final_share.sum())
+    group_money_growth = group_final_share - group_share_total
+
+    totals = {
+        "total_loan_balance": total_loan_balance,
+        "group_time_value_total": group_time_value,
+        "group_proportional_final_share": group_final_share,
+        "group_share_total": group_share_total,
+        "group_money_growth_total": group_money_growth,
+        "group_money_growth_percent": (
+            round(group_money_growth / group_share_total * 100, 0)
+            if group_share_total
+            else 0
+        ),
+        "group_payout_balance": round(float(payout_balance.sum()), 1),
+        f"t{assist.TRANSACTION_SAVINGS}": get_month_data("Group Savings", group_savings),
+        f"t{assist.TRANSACTION_LOAN}": get_month_data("Group Loans", group_loans),
+        f"t{assist.TRANSACTION_INTEREST_CHARGED}": get_month_data(
+            "Group Interest", group_interest
+        ),
+        "r1": get_month_data("Current Month Loan/Savings Proportion", r1),
+        "r2": get_month_data("Cummulative Month Loan/Savings Proportion", r2),
+        "r3": get_month_data("Interest rate", MONTHLY_RATES),
+    }
+
+    columns = {
+        "itotal": itotal,
+        "stotal": stotal,
+        **loan_totals,
+        "loan_plus_interest_total": loan_plus_interest,
+        "loan_balance": loan_balance,
+        "time_value_total": time_value,
+        "proportional_final_share": final_share,
+        "payout_balance": payout_balance,
+    }
+    values = {field: column.tolist() for field, column in columns.items()}
+
+    summary = []
+
+    for i, member in enumerate(members):
+        item = {
+            "id": member.id,
+            "fname": member.fname,
+            "lname": member.lname,
+            "email": member.email,
+            "phone": member.mobile1,
+            "bank_name": member.bank_name,
+            "branch_name": member.bank_branch_name,
+            "branch_code": member.bank_branch_code,
+            "bank_account_no": member.bank_account_no,
+            "bank_account_name": member.bank_account_name,
+        }
+
+        for field, column in values.items():
+            item[field] = column[i]
+
+        item["tsavings"] = get_month_data("Member Savings", savings[i])
+        item["isharing"] = get_month_data("Member Sharing", sharing[i])
+
+        summary.append(item)
+
+    return {"totals": totals, "members": summary}
+
+
+async def get_sharing_summary(db, year: int, pool: float | None = None):
+    """
+    Loads the transaction totals of a year and computes the interest sharing
+
+    Args:
+        db (AsyncSession): The osawe session.
+        year (int): The year shared.
+        pool (float): The amount shared, defaults to the group loan balance.
+
+    Returns:
+        dict: The totals and members of a ParamInterestSharingSummary.
+    """
+    result = await db.execute(select(MemberDB))
+    members = result.scalars().all()
+
+    result = await db.execute(get_month_query(year, MEMBER_TYPES, True))
+    member_rows = result.all()
+
+    result = await db.execute(get_month_query(year, GROUP_TYPES, False))
+    group_rows = result.all()
+
+    return await asyncio.to_thread(
+        compute_sharing, members, member_rows, group_rows, pool
+    )
+
+
+def benchmark(member_count: int, seed: int = 1):
+    """
+    Times compute_sharing on random savings and loans of member_count members
+
+    Returns:
+        float: The seconds taken.
+    """
+    random = np.random.default_rng(seed)
+
+    members = [
+        SimpleNamespace(
+            id=id,
+            fname="Member",
+            lname=str(id),
+            email=f"member{id}@example.com",
+            mobile1="",
+            bank_name="",
+            bank_branch_name="",
+            bank_branch_code="",
+            bank_account_no="",
+            bank_account_name="",
+        )
+        for id in range(1, member_count + 1)
+    ]
+
+    member_rows = [
+        SimpleNamespace(
+            user_id=member.id,
+            type_id=type,
+            month=month,
+            amount=float(random.integers(0, 5000)),
+        )
+        for member in members
+        for type in MEMBER_TYPES
+        for month in range(1, MONTHS + 1)
+    ]
+
+    group_totals = {}
+    for row in member_rows:
+        if row.type_id in GROUP_TYPES:
+            key = (row.type_id, row.month)
+            group_totals[key] = group_totals.get(key, 0) + row.amount
+
+    group_rows = [
+        SimpleNamespace(type_id=type, month=month, amount=amount)
+        for (type, month), amount in group_totals.items()
+    ]
+
+    start = time.perf_counter()
+    compute_sharing(members, member_rows, group_rows)
+
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # python -m apps.osawe.osawesharing [members]
+    member_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    seconds = benchmark(member_count)
+
+    print(f"Shared interest of {member_count} members in {seconds:.3f}s")
@@ -1,13 +1,13 @@
 import io
 import os
-import uuid
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 
 from apps.osawe.osawedb import get_osawe_db
-from helpers import assist
+from helpers import assist, storage
 from apps.osawe.models.attachment_model import Attachment, AttachmentDB, AttachmentInput
 import csv
 
@@ -150,36 +150,24 @@ async def post_attachment(
         if typeId == "AttendanceList":
             userList = await validateAttendance(file, db)
 
-        # ensure folders exist
-        current = assist.get_current_date()
-        dir = f"{assist.UPLOAD_DIR}/{current.year}/{current.month}"
-
-        os.makedirs(dir, exist_ok=True)
-
         # Validate filename
         if not file.filename:
             raise HTTPException(status_code=400, detail="No filename provided")
 
-        # Generate unique name
-        fileDetail = os.path.splitext(file.filename)
-        noextensionfile = fileDetail[0]
-        ext = fileDetail[1]
+        # the attendance list was read by the validation
+        await file.seek(0)
 
-        unique_name = f"{noextensionfile}_{uuid.uuid4()}{ext}"
-        file_path = os.path.join(dir, unique_name)
-
-        # Save file safely
-        contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        # save in chunks, identical content is stored once
+        stored = await storage.store_upload(file)
 
         # update file
         db_attachment = AttachmentDB(
             # personal details
             name=file.filename,
-            path=f"{current.year}/{current.month}/{unique_name}",
-            filesize=len(contents),
+            path=stored["path"],
+            filesize=stored["filesize"],
             filetype=file.content_type,
+            sha256=stored["sha256"],
             type=typeId,
             parent=parentId,
         )
@@ -207,6 +195,34 @@ async def list_attachments(db: AsyncSession = Depends(get_osawe_db)):
     return attachments
 
 
+@router.get("/{id}/download")
+async def download_attachment(id: int, db: AsyncSession = Depends(get_osawe_db)):
+    result = await db.execute(select(AttachmentDB).where(AttachmentDB.id == id))
+    attachment = result.scalars().first()
+    if not attachment or not attachment.path:
+        raise HTTPException(
+            status_code=404, detail=f"Attachment with id '{id}' not found"
+        )
+
+    file_path = storage.get_file(attachment.path)
+    if not os.path.isfile(file_path):
+        raise HTTPException(
+            status_code=404, detail=f"The file of attachment '{id}' was not found"
+        )
+
+    # range requests are answered by FileResponse, so downloads can resume
+    headers = {}
+    if attachment.sha256:
+        headers["ETag"] = f'"{attachment.sha256}"'
+
+    return FileResponse(
+        file_path,
+        media_type=attachment.filetype,
+        filename=attachment.name,
+        headers=headers,
+    )
+
+
 @router.get("/{id}", response_model=Attachment)
 async def get_attachment(id: int, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(select(AttachmentDB).where(AttachmentDB.id == id))
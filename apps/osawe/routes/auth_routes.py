@@ -6,10 +6,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 from jose import JWTError, jwt
+from apps.osawe import osaweauth
 from apps.osawe.osawedb import get_osawe_db
 from apps.osawe.models.member_model import MemberDB
 from apps.osawe.models.user_model import User, UserDB
 import helpers.assist as assist
+import helpers.passwords as passwords
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
@@ -41,7 +43,10 @@ async def login(
                 detail=f"The specified username or password is incorrect",
             )
 
-    if not assist.verify_password(form_data.password, user.password):
+    # return the connection to the pool while the password is verified
+    await db.close()
+
+    if not await passwords.verify_password(form_data.password, user.password):
         raise HTTPException(
             status_code=401, detail=f"The specified username or password is incorrect"
         )
@@ -52,6 +57,7 @@ async def login(
         "name": f"{user.fname} {user.lname}",
         "role": user.role,
         "mobile": user.mobile,
+        "aud": osaweauth.TOKEN_AUDIENCE,
         "exp": datetime.now(timezone.utc) + timedelta(minutes=30),
         "jti": uuid4().hex,
     }
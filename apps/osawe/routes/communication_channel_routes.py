@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 from jose import JWTError, jwt
+from apps.osawe import osawereminders
 from apps.osawe.osawedb import get_osawe_db
 from apps.osawe.models.configuration_model import SACCOConfigurationDB
 from apps.osawe.models.member_model import MemberDB
@@ -16,9 +17,8 @@ from apps.osawe.models.user_model import User, UserDB
 import helpers.assist as assist
 from apps.osawe.models.coomunication_channel_models import AuthParam, MobileParam, ItemReviewParam, TransactionReviewParam
 from helpers.http_client import get_http_client
-from sqlalchemy import or_
-import smtplib
-from email.message import EmailMessage
+from helpers import mail
+from sqlalchemy import func
 import os
 
 
@@ -54,7 +54,7 @@ async def send_auth_message(param: AuthParam):
         ]
     }
 
-    client = get_http_client()
+    client = get_http_client(assist.INFOBIP_API_URL)
 
     response = await client.post(assist.INFOBIP_API_URL, json=data, headers=headers)
 
@@ -102,7 +102,7 @@ async def send_account_registered(
         ]
     }
 
-    client = get_http_client()
+    client = get_http_client(assist.INFOBIP_API_URL)
 
     response = await client.post(assist.INFOBIP_API_URL, json=data, headers=headers)
 
@@ -148,7 +148,7 @@ async def send_account_approved(param: ItemReviewParam, db: AsyncSession = Depen
         ]
     }
 
-    client = get_http_client()
+    client = get_http_client(assist.INFOBIP_API_URL)
 
     response = await client.post(assist.INFOBIP_API_URL, json=data, headers=headers)
 
@@ -156,101 +156,80 @@ async def send_account_approved(param: ItemReviewParam, db: AsyncSession = Depen
 
 
 @router.get("/send-infobip-posting-reminder-messages")
-async def send_posting_reminder_messages(db: AsyncSession = Depends(get_osawe_db)):
-    # get config
-    result = await db.execute(
-        select(SACCOConfigurationDB).where(SACCOConfigurationDB.id == 1)
-    )
+async def send_posting_reminder_messages(
+    background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_osawe_db)
+):
+    # only one reminder job at a time, claimed before any await
+    job, created = osawereminders.claim_reminder_job()
+    if not created:
+        return {
+            "succeeded": True,
+            "message": f"Reminders are already being sent by job '{job['id']}'",
+            "job": job,
+        }
 
-    config = result.scalars().first()
-    if not config:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Unable to load param: Configuration with id '{1}' not found",
+    try:
+        # get config
+        result = await db.execute(
+            select(SACCOConfigurationDB).where(SACCOConfigurationDB.id == 1)
         )
 
-    # get all members who have not been reminded today
-    current = assist.get_current_date()
-
-    day = config.late_posting_date_start.strftime("%d")
-    month = current.strftime("%B %Y")
-
-    period = f"{day} {month}"
-
-    result = await db.execute(
-        select(MemberDB)
-        .where(
-            or_(
-                MemberDB.last_reminder_date.is_(None),
-                MemberDB.last_reminder_date != current,
+        config = result.scalars().first()
+        if not config:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Unable to load param: Configuration with id '{1}' not found",
             )
-        )
-        .limit(1)
-        .order_by(MemberDB.id)
-    )
-    members = result.scalars().all()
-
-    # check if this person has registered as a member
-    if len(members) == 0:
-        # not registered
-        raise HTTPException(
-            status_code=401,
-            detail=f"There no members to send reminders to for the current date",
-        )
 
-    index = 0
+        # get all members who have not been reminded today
+        current = assist.get_current_date()
 
-    for mem in members:
+        day = config.late_posting_date_start.strftime("%d")
+        month = current.strftime("%B %Y")
 
-        messageId = uuid.uuid4()
+        period = f"{day} {month}"
 
-        headers = {
-            "Authorization": f"App {assist.INFOBIP_API_TOKEN}",
-            "Content-type": "application/json",
-            "Accept": "application/json",
-        }
+        result = await db.execute(
+            select(func.count(MemberDB.id)).where(
+                osawereminders.get_pending_criteria(current)
+            )
+        )
+        total = result.scalar()
+
+        # check if this person has registered as a member
+        if total == 0:
+            # not registered
+            raise HTTPException(
+                status_code=401,
+                detail=f"There no members to send reminders to for the current date",
+            )
+    except Exception as e:
+        # release the claim so a later request can start a job
+        osawereminders.finish_reminder_job(job, osawereminders.JOB_FAILED, str(e))
+        raise
 
-        data = {
-            "messages": [
-                {
-                    "from": assist.INFOBIP_PHONE_NUMBER,
-                    "to": f"+{mem.mobile1}",
-                    "messageId": str(messageId),
-                    "content": {
-                        "templateName": "posting_reminder",
-                        "templateData": {
-                            "body": {"placeholders": [f"{mem.fname}", f"{period}"]},
-                        },
-                        "language": "en_GB",
-                    },
-                }
-            ]
-        }
+    # members are sent to in the background, progress is on the job
+    job["total"] = total
+    background_tasks.add_task(osawereminders.run_reminder_job, job, current, period)
 
-        client = get_http_client()
+    return {
+        "succeeded": True,
+        "message": f"Sending messages to {total} member(s)",
+        "job": job,
+    }
 
-        response = await client.post(assist.INFOBIP_API_URL, json=data, headers=headers)
 
-        # check if response succeeded
-        if response.status_code == 200:
-            # update current member
-            mem.last_reminder_date = current
-            index += 1
+@router.get("/posting-reminder-jobs/{job_id}")
+async def get_posting_reminder_job(job_id: str):
+    job = osawereminders.reminder_jobs.get(job_id)
 
-            try:
-                await db.commit()
-                await db.refresh(mem)
-            except Exception as e:
-                await db.rollback()
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unable to update member last reminder details: {e}",
-                )
+    if not job:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unable to find reminder job with id '{job_id}'",
+        )
 
-    return {
-        "succeeded": True,
-        "message": f"Successfully sent messages to {index} member(s) from a total of {len(members)} member(s)",
-    }
+    return job
 
 
 @router.post("/send-infobip-posting-reviewed-message")
@@ -314,30 +293,14 @@ async def send_posting_reviewed(
         ]
     }
 
-    client = get_http_client()
+    client = get_http_client(assist.INFOBIP_API_URL)
 
     response = await client.post(assist.INFOBIP_API_URL, json=data, headers=headers)
 
     return {"status": response.status_code, "data": response.json()}
 
-def send_email(to: str, subject: str, body: str, config: SACCOConfigurationDB ):
-    msg = EmailMessage()
-    msg["From"] = config.smtp_user
-    msg["To"] = to
-    msg["Subject"] = subject
-    msg.set_content(body)
-
-    with smtplib.SMTP(config.smtp_server, config.smtp_port) as server:
-        server.starttls()
-        server.login(config.smtp_user, config.smtp_password)
-        server.send_message(msg)
-        
 @router.post("/send-email-message")
-async def send_email_endpoint(
-    to: str,
-    background_tasks: BackgroundTasks,
-    db: AsyncSession = Depends(get_osawe_db)
-):
+async def send_email_endpoint(to: str, db: AsyncSession = Depends(get_osawe_db)):
     
       # get config
     result = await db.execute(
@@ -351,11 +314,7 @@ async def send_email_endpoint(
             detail=f"Unable to load param: Configuration with id '{1}' not found",
         )
         
-    background_tasks.add_task(
-        send_email,
-        to,
-        "Welcome",
-        "Thanks for signing up!",
-        config
-    )
+    # sent off the request path over a reused session
+    mail.queue_email(to, "Welcome", "Thanks for signing up!", config)
+
     return {"status": "Email queued"}
\ No newline at end of file
@@ -4,7 +4,10 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 
-from apps.osawe.osawedb import get_osawe_db
+from helpers import database, http_client, passwords
+
+from apps.osawe import osaweauth
+from apps.osawe.osawedb import engine, get_osawe_db
 from apps.osawe.models.configuration_model import (
     SACCOConfiguration,
     SACCOConfigurationDB,
@@ -102,6 +105,30 @@ async def update_item(
     return config
 
 
+@router.get("/pool-metrics", dependencies=[Depends(osaweauth.get_administrator)])
+async def get_pool_metrics():
+    """
+    Gets the database connection pool usage, for sizing pools and workers
+    """
+    return database.get_pool_metrics(engine)
+
+
+@router.get("/password-hash-metrics", dependencies=[Depends(osaweauth.get_administrator)])
+async def get_password_hash_metrics():
+    """
+    Gets the password hashing pool usage, waiting is the number of queued hashes
+    """
+    return passwords.get_metrics()
+
+
+@router.get("/http-client-metrics", dependencies=[Depends(osaweauth.get_administrator)])
+async def get_http_client_metrics():
+    """
+    Gets the outbound request timings and circuit state per host
+    """
+    return http_client.get_metrics()
+
+
 @router.get("/", response_model=List[SACCOConfigurationWithDetail])
 async def list_configurations(db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
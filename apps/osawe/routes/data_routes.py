@@ -1,19 +1,17 @@
 from datetime import datetime, timedelta, timezone, date
-from zoneinfo import ZoneInfo
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel, Field
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List
+from typing import List, Optional
 from jose import JWTError, jwt
-from apps.osawe.osawedb import get_osawe_db
+from apps.osawe.osawedb import get_osawe_db, AsyncSessionLocal
+from apps.osawe import osaweexports
 from apps.osawe.models.member_model import MemberDB
 from apps.osawe.models.user_model import User, UserDB
 import helpers.assist as assist
-import pandas as pd
-from io import BytesIO
-from fastapi.responses import StreamingResponse
+from helpers import export
 
 router = APIRouter(prefix="/data", tags=["Data"])
 
@@ -26,44 +24,25 @@ class ExportParam(BaseModel):
     
     class Config:
         orm_mode = True
-        
 
-def excel_date(value):
-    """
-    Convert ISO 8601 string or datetime/date object into Excel-friendly string,
-    using Africa/Lusaka timezone.
-    Returns 'YYYY-MM-DD' if time is 00:00:00, otherwise 'YYYY-MM-DD HH:MM:SS'.
-    """
-    if value is None:
-        return None
 
-    # Parse string if necessary
-    if isinstance(value, str):
-        value = value.strip()
-        try:
-            dt = datetime.fromisoformat(value)  # may be offset-aware
-        except ValueError:
-            return value  # return original string if parsing fails
-    elif isinstance(value, date) and not isinstance(value, datetime):
-        dt = datetime.combine(value, datetime.min.time())
-    elif isinstance(value, datetime):
-        dt = value
-    else:
-        return value
+class ExportFilter(BaseModel):
+    user_id: Optional[int] = None
+    type_id: Optional[int] = None
+    status_id: Optional[int] = None
+    period_id: Optional[str] = None
+    # days, both included
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
 
-    # Convert to Africa/Lusaka timezone
-    lusaka_tz = ZoneInfo("Africa/Lusaka")
 
-    if dt.tzinfo is None:
-        # naive → assume UTC
-        dt = dt.replace(tzinfo=timezone.utc)
-    dt = dt.astimezone(lusaka_tz)
+class ExportQueryParam(BaseModel):
 
-    # Format for Excel
-    if dt.time() == datetime.min.time():
-        return dt.date().isoformat()  # YYYY-MM-DD
-    else:
-        return dt.strftime("%Y-%m-%d %H:%M:%S")  # YYYY-MM-DD HH:MM:SS
+    filename: str = Field(..., min_length=3, description="Filename must be at least 3 characters")
+    query: str
+    format: str = export.FORMAT_XLSX
+    columns: list[dict]
+    filters: ExportFilter = ExportFilter()
 
 
 def excel_serial(value):
@@ -89,61 +68,50 @@ def excel_serial(value):
         return None
 
     # Convert to Africa/Lusaka timezone
-    lusaka_tz = ZoneInfo(assist.CURRENT_TIME_ZONE)
-
     if dt.tzinfo is None:
         # naive → assume UTC
         dt = dt.replace(tzinfo=timezone.utc)
-    dt = dt.astimezone(lusaka_tz).replace(tzinfo=None)  # make naive in Lusaka
+    dt = dt.astimezone(export.TIME_ZONE).replace(tzinfo=None)  # make naive in Lusaka
 
     # Excel base date
     excel_start = datetime(1899, 12, 30)  # Excel day 1 = 1900-01-01
     delta = dt - excel_start
     return delta.days + delta.seconds / 86400  # include fraction of day
 
-def get_nested_value(obj, path):
-    keys = path.split(".")
-    for key in keys:
-        if not isinstance(obj, dict):
-            return None
-        obj = obj.get(key)
-        if obj is None:
-            return None
-    return obj
-        
 @router.post("/export-excel")
-def export_excel(param: ExportParam):
-    #process data
-    result = []
-
-    for row in param.jsonArray:
-        item = {}
-        for col in param.columns:
-            caption = col["caption"]
-            field = col["dataField"]
-            value = get_nested_value(row, field)
-
-            if col.get("dataType") == "date":
-                #add option in config to handle wether user wants serial or string
-                value = excel_date(value)
-
-            item[caption] = value
-        result.append(item)
-        
-    # Convert to DataFrame
-    df = pd.DataFrame(result)
-
-    # Create Excel in memory
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine="openpyxl") as writer:
-        df.to_excel(writer, index=False, sheet_name="Sheet1")
-
-    output.seek(0)
-
-    return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f"attachment; filename={param.filename}.xlsx"
-        }
-    )
\ No newline at end of file
+async def export_excel(param: ExportParam):
+    # the rows are sent by the client, prefer /data/export for large datasets
+    columns = export.compile_columns(param.columns)
+
+    return export.export_response(
+        export.iter_rows(param.jsonArray), columns, param.filename
+    )
+
+
+@router.post("/export")
+async def export_query(param: ExportQueryParam):
+    """
+    Exports the rows of a named query, read from the database as they are written
+    """
+    stmt = osaweexports.get_export_query(param.query, param.filters.dict())
+
+    if stmt is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The export query '{param.query}' does not exist",
+        )
+
+    if param.format not in export.MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The export format '{param.format}' is not supported",
+        )
+
+    columns = export.compile_columns(param.columns)
+
+    return export.export_response(
+        export.stream_query(AsyncSessionLocal, stmt),
+        columns,
+        param.filename,
+        param.format,
+    )
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 
+from apps.osawe import osawebalances
 from apps.osawe.osawedb import get_osawe_db
 from helpers import assist
 from apps.osawe.models.attachment_model import AttachmentDB
@@ -148,6 +149,9 @@ async def postAttendance(meeting: any, db=AsyncSession):
     try:
         attendance_list = json.loads(meeting.attendance_list)
 
+        # approved penalty transactions of the meeting
+        transactions = []
+
         for attend in attendance_list:
             memId = attend["id"]
             penalty = attend["penalty"]
@@ -189,7 +193,9 @@ async def postAttendance(meeting: any, db=AsyncSession):
                     created_by=meeting.created_by,
                 )
                 db.add(db_tran)
+                transactions.append(db_tran)
 
+        await osawebalances.add_to_balances(db, transactions)
         await db.commit()
     except Exception as e:
         raise HTTPException(
@@ -3,8 +3,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 
+from apps.osawe import osaweloads
 from apps.osawe.osawedb import get_osawe_db
-from helpers import assist, validation
+from helpers import assist, passwords, validation
 from apps.osawe.models.attachment_model import AttachmentDB
 from apps.osawe.models.member_model import Member, MemberDB, MemberWithDetail
 from apps.osawe.models.review_model import SACCOReview
@@ -52,7 +53,7 @@ async def register_member(member: Member, db: AsyncSession = Depends(get_osawe_d
         bank_account_name=member.bank_account_name,
         bank_account_no=member.bank_account_no,
         # account
-        password=assist.hash_password(member.password),
+        password=await passwords.hash_password(member.password),
         # approval
         status_id=member.status_id,
         stage_id=member.stage_id,
@@ -89,7 +90,7 @@ async def update_member(
 
     try:
         await db.commit()
-        await db.refresh(member)
+        member = await osaweloads.reload(db, member, osaweloads.MEMBER_DETAIL)
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to update member {e}")
@@ -115,7 +116,7 @@ async def update_user_member(
 
     try:
         await db.commit()
-        await db.refresh(member)
+        member = await osaweloads.reload(db, member, osaweloads.MEMBER_DETAIL)
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to update member {e}")
@@ -125,6 +126,7 @@ async def update_user_member(
 async def get_member(member_id: int, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(MemberDB)
+        .options(*osaweloads.MEMBER_DETAIL)
         .where(MemberDB.id == member_id)
     )
     transaction = result.scalars().first()
@@ -137,7 +139,11 @@ async def get_member(member_id: int, db: AsyncSession = Depends(get_osawe_db)):
 
 @router.get("/user/{user_id}", response_model=MemberWithDetail)
 async def get_member(user_id: int, db: AsyncSession = Depends(get_osawe_db)):
-    result = await db.execute(select(MemberDB).where(MemberDB.user_id == user_id))
+    result = await db.execute(
+        select(MemberDB)
+        .options(*osaweloads.MEMBER_DETAIL)
+        .where(MemberDB.user_id == user_id)
+    )
     member = result.scalars().first()
     if not member:
         raise HTTPException(
@@ -148,13 +154,17 @@ async def get_member(user_id: int, db: AsyncSession = Depends(get_osawe_db)):
 
 @router.get("/list", response_model=List[MemberWithDetail])
 async def list_members(db: AsyncSession = Depends(get_osawe_db)):
-    result = await db.execute(select(MemberDB))
+    result = await db.execute(select(MemberDB).options(*osaweloads.MEMBER_DETAIL))
     return result.scalars().all()
 
 
 @router.get("/status/{status_id}", response_model=List[MemberWithDetail])
 async def list_members(status_id: int, db: AsyncSession = Depends(get_osawe_db)):
-    result = await db.execute(select(MemberDB).where(MemberDB.status_id == status_id))
+    result = await db.execute(
+        select(MemberDB)
+        .options(*osaweloads.MEMBER_DETAIL)
+        .where(MemberDB.status_id == status_id)
+    )
     return result.scalars().all()
 
 
@@ -328,6 +338,8 @@ async def review_posting(
             member.user_id = db_user.id
 
             await db.commit()
+
+        member = await osaweloads.reload(db, member, osaweloads.MEMBER_DETAIL)
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to review member: {e}")
@@ -340,9 +352,20 @@ async def initialize_validation_members(db: AsyncSession = Depends(get_osawe_db)
     members = validation.get_validation_members()
     admins = validation.get_validation_admins()
 
+    # hash up front so the passwords are hashed in parallel
+    memberPasswords = await passwords.hash_passwords(
+        [value["password"] for value in members]
+    )
+    userPasswords = await passwords.hash_passwords(["12345678"] * len(members))
+    adminPasswords = await passwords.hash_passwords(
+        [value["password"] for value in admins]
+    )
+
     index = 1
 
-    for value in members:
+    for value, memberPassword, userPassword in zip(
+        members, memberPasswords, userPasswords
+    ):
         # add member
         username = value["email"]
 
@@ -377,7 +400,7 @@ async def initialize_validation_members(db: AsyncSession = Depends(get_osawe_db)
             bank_account_name=value["bank_account_name"],
             bank_account_no=value["bank_account_no"],
             # account
-            password=assist.hash_password(value["password"]),
+            password=memberPassword,
             # approval
             status_id=value["status_id"],
             stage_id=value["stage_id"],
@@ -402,7 +425,7 @@ async def initialize_validation_members(db: AsyncSession = Depends(get_osawe_db)
             address_postal=value["address_postal"],
             # account
             role=1,
-            password=assist.hash_password("12345678"),
+            password=userPassword,
             # approval
             status_id=value["status_id"],
             stage_id=value["stage_id"],
@@ -424,7 +447,7 @@ async def initialize_validation_members(db: AsyncSession = Depends(get_osawe_db)
                 detail=f"Unable to initialize member {index} '{username}': f{e}",
             )
 
-    for value in admins:
+    for value, adminPassword in zip(admins, adminPasswords):
         # add  user
         username = value["email"]
 
@@ -443,7 +466,7 @@ async def initialize_validation_members(db: AsyncSession = Depends(get_osawe_db)
             address_postal=value["address_postal"],
             # account
             role=value["role"],
-            password=assist.hash_password(value["password"]),
+            password=adminPassword,
             # approval
             status_id=value["status_id"],
             stage_id=value["stage_id"],
@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 from sqlalchemy import func
+from apps.osawe import osawebalances, osaweloads, osaweposting
 from apps.osawe.osawedb import get_osawe_db
 from apps.osawe.models.configuration_model import SACCOConfigurationDB
 from apps.osawe.models.guarantor_model import GuarantorDB
@@ -138,7 +139,9 @@ async def review_posting(
 
     # check posting exists
     result = await db.execute(
-        select(MonthlyPostingDB).where(MonthlyPostingDB.id == post_id)
+        select(MonthlyPostingDB)
+        .options(*osaweloads.POSTING_PERIOD)
+        .where(MonthlyPostingDB.id == post_id)
     )
     posting = result.scalar_one_or_none()
 
@@ -156,6 +159,9 @@ async def review_posting(
 
     posting.updated_by = user.email
 
+    # approved transactions posted by the review
+    transactions = []
+
     # get current period
     periodId = assist.get_current_period()
 
@@ -286,92 +292,9 @@ async def review_posting(
         posting.stage_id = assist.APPROVAL_STAGE_APPROVED
 
         # add transactions to database
-        items = [
-            {
-                "type": assist.TRANSACTION_SAVINGS,
-                "amount": posting.saving,
-                "term": None,
-                "interest": None,
-                "penaltyType": None,
-            },
-            {
-                "type": assist.TRANSACTION_SHARE,
-                "amount": posting.shares,
-                "term": None,
-                "interest": None,
-                "penaltyType": None,
-            },
-            {
-                "type": assist.TRANSACTION_SOCIAL_FUND,
-                "amount": posting.social,
-                "term": None,
-                "interest": None,
-                "penaltyType": None,
-            },
-        ]
-
-        # penalties
-
-        if posting.late_post_penalty != 0:
-
-            items.append(
-                {
-                    "type": assist.TRANSACTION_PENALTY_CHARGED,
-                    "amount": posting.late_post_penalty,
-                    "term": None,
-                    "interest": None,
-                    "penaltyType": assist.PENALTY_LATE_POSTING,
-                }
-            )
-            items.append(
-                {
-                    "type": assist.TRANSACTION_PENALTY_PAID,
-                    "amount": posting.late_post_penalty,
-                    "term": None,
-                    "interest": None,
-                    "penaltyType": assist.PENALTY_LATE_POSTING,
-                }
-            )
-
-        if posting.loan_application != 0:
-            items.append(
-                {
-                    "type": assist.TRANSACTION_LOAN,
-                    "amount": posting.loan_application,
-                    "term": config.loan_duration,
-                    "interest": config.loan_interest_rate,
-                    "penaltyType": assist.PENALTY_LATE_POSTING,
-                }
-            )
-
-        for item in items:
-            db_tran = TransactionDB(
-                # id
-                type_id=item["type"],
-                penalty_type_id=item["penaltyType"],
-                # user
-                user_id=posting.user_id,
-                post_id=posting.id,
-                # transaction
-                date=assist.get_current_date(False),
-                source_id=1,
-                amount=item["amount"],
-                comments=posting.period.period_name,
-                # reference = tran.reference,
-                # loan
-                term_months=item["term"],
-                interest_rate=item["interest"],
-                # loan payment transaction id
-                # parent_id = tran.parent_id,
-                # approval
-                status_id=assist.STATUS_APPROVED,
-                state_id=assist.STATE_CLOSED,
-                stage_id=assist.APPROVAL_STAGE_APPROVED,
-                approval_levels=posting.approval_levels,
-                # service
-                created_by=posting.created_by,
-            )
+        for db_tran in osaweposting.get_posting_transactions(posting, config):
             db.add(db_tran)
+            transactions.append(db_tran)
 
     # check if rejected
     if posting.status_id == assist.STATUS_REJECTED:
@@ -399,10 +322,12 @@ async def review_posting(
                 created_by=user.email,
             )
             db.add(db_tran)
+            transactions.append(db_tran)
 
     try:
+        await osawebalances.add_to_balances(db, transactions)
         await db.commit()
-        await db.refresh(posting)
+        posting = await osaweloads.reload(db, posting, osaweloads.POSTING_DETAIL)
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -415,9 +340,7 @@ async def review_posting(
 async def list_postings(db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(MonthlyPostingDB)
-        # .options(
-        #    joinedload(MonthlyPostingDB.status),
-        # )
+        .options(*osaweloads.POSTING_DETAIL)
     )
     postings = result.scalars().all()
     return postings
@@ -427,9 +350,7 @@ async def list_postings(db: AsyncSession = Depends(get_osawe_db)):
 async def list_user_postings(userId: int, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(MonthlyPostingDB)
-        # .options(
-        #    joinedload(MonthlyPostingDB.status),
-        # )
+        .options(*osaweloads.POSTING_DETAIL)
         .where(MonthlyPostingDB.user_id == userId)
     )
     postings = result.scalars().all()
@@ -440,9 +361,7 @@ async def list_user_postings(userId: int, db: AsyncSession = Depends(get_osawe_d
 async def list_user_mid_postings(userId: int, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(MonthlyPostingDB)
-        # .options(
-        #    joinedload(MonthlyPostingDB.status),
-        # )
+        .options(*osaweloads.POSTING_DETAIL)
         .where(MonthlyPostingDB.user_id == userId, MonthlyPostingDB.mid_status == 2)
     )
     postings = result.scalars().all()
@@ -455,9 +374,7 @@ async def list_user_mid_postings(userId: int, db: AsyncSession = Depends(get_osa
 async def list_user_postings(email: str, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(MonthlyPostingDB)
-        # .options(
-        #    joinedload(MonthlyPostingDB.status),
-        # )
+        .options(*osaweloads.POSTING_DETAIL)
         .where(
             MonthlyPostingDB.guarantor_required == assist.RESPONSE_YES,
             MonthlyPostingDB.guarantor_user_email == email,
@@ -471,9 +388,7 @@ async def list_user_postings(email: str, db: AsyncSession = Depends(get_osawe_db
 async def list_status_postings(status_id: int, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(MonthlyPostingDB)
-        # .options(
-        #    joinedload(MonthlyPostingDB.status),
-        # )
+        .options(*osaweloads.POSTING_DETAIL)
         .where(MonthlyPostingDB.status_id == status_id)
     )
     postings = result.scalars().all()
@@ -484,9 +399,7 @@ async def list_status_postings(status_id: int, db: AsyncSession = Depends(get_os
 async def list_period_postings(period_id: str, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(MonthlyPostingDB)
-        # .options(
-        #    joinedload(MonthlyPostingDB.status),
-        # )
+        .options(*osaweloads.POSTING_DETAIL)
         .where(MonthlyPostingDB.period_id == period_id)
     )
     postings = result.scalars().all()
@@ -502,9 +415,7 @@ async def list_status_period_postings(
 ):
     result = await db.execute(
         select(MonthlyPostingDB)
-        # .options(
-        #    joinedload(MonthlyPostingDB.status),
-        # )
+        .options(*osaweloads.POSTING_DETAIL)
         .where(
             MonthlyPostingDB.period_id == period_id,
             MonthlyPostingDB.status_id == status_id,
@@ -518,9 +429,7 @@ async def list_status_period_postings(
 async def get_posting(posting_id: int, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(MonthlyPostingDB)
-        # .options(
-        #    joinedload(MonthlyPostingDB.status),
-        # )
+        .options(*osaweloads.POSTING_MEMBER_DETAIL)
         .where(MonthlyPostingDB.id == posting_id)
     )
     posting = result.scalars().first()
@@ -578,7 +487,9 @@ async def get_posting_param(user_id: int, db: AsyncSession = Depends(get_osawe_d
     periodId = assist.get_current_period()
 
     result = await db.execute(
-        select(MonthlyPostingDB).where(
+        select(MonthlyPostingDB)
+        .options(*osaweloads.POSTING_DETAIL)
+        .where(
             MonthlyPostingDB.period_id == periodId,
             MonthlyPostingDB.user_id == user_id,
         )
@@ -615,18 +526,11 @@ async def get_posting_param(user_id: int, db: AsyncSession = Depends(get_osawe_d
         )
     """
 
-    # get savings
-    stmt = select(func.sum(TransactionDB.amount)).where(
-        TransactionDB.user_id == user_id,
-        TransactionDB.type_id == assist.TRANSACTION_SAVINGS,
-        TransactionDB.status_id == assist.STATUS_APPROVED,
-        TransactionDB.date >= start_of_year,
-        TransactionDB.date < start_of_next_year
-    )
-
-    result = await db.execute(stmt)
+    # get savings from the member balances
+    balances = await osawebalances.get_member_balances(db, user_id, currentDate.year)
 
-    totalSavings = result.scalar() or 0.0
+    savings = balances.get(assist.TRANSACTION_SAVINGS)
+    totalSavings = savings.amount if savings else 0.0
 
     # get loan that is open in current period
     result = await db.execute(
@@ -647,19 +551,10 @@ async def get_posting_param(user_id: int, db: AsyncSession = Depends(get_osawe_d
     # check if there is a loan
     if loan:
         # there is loan, check payments made against loan
-        stmt = select(func.sum(TransactionDB.amount)).where(
-            TransactionDB.user_id == user_id,
-            TransactionDB.type_id == assist.TRANSACTION_LOAN_PAYMENT,
-            TransactionDB.status_id == assist.STATUS_APPROVED,
-            TransactionDB.parent_id == loan.id,
-        )
-
-        result = await db.execute(stmt)
-
-        totalLoanPaymentsAmount = result.scalar() or 0.0
-
-        # there is loan, check payments made against loan
-        stmt = select(func.count(TransactionDB.amount)).where(
+        stmt = select(
+            func.coalesce(func.sum(TransactionDB.amount), 0.0),
+            func.count(TransactionDB.id),
+        ).where(
             TransactionDB.user_id == user_id,
             TransactionDB.type_id == assist.TRANSACTION_LOAN_PAYMENT,
             TransactionDB.status_id == assist.STATUS_APPROVED,
@@ -668,11 +563,13 @@ async def get_posting_param(user_id: int, db: AsyncSession = Depends(get_osawe_d
 
         result = await db.execute(stmt)
 
-        totalLoanPaymentsNo = result.scalar() or 0.0
+        totalLoanPaymentsAmount, totalLoanPaymentsNo = result.one()
 
     # penalties
     result = await db.execute(
-        select(TransactionDB).where(
+        select(TransactionDB)
+        .options(*osaweloads.TRANSACTION_PENALTY)
+        .where(
             TransactionDB.user_id == user_id,
             TransactionDB.type_id == assist.TRANSACTION_PENALTY_CHARGED,
             TransactionDB.status_id == assist.STATUS_APPROVED,
@@ -5,8 +5,9 @@ from typing import List
 from sqlalchemy import update
 import calendar
 from sqlalchemy import func, and_, or_
+from apps.osawe import osaweloads, osaweposting
 from apps.osawe.osawedb import get_osawe_db
-from helpers import assist
+from helpers import aggregate, assist
 from apps.osawe.models.configuration_model import SACCOConfigurationDB
 from apps.osawe.models.member_model import MemberDB
 from apps.osawe.models.monthly_post_model import MonthlyPostingDB, MonthlyPostingWithMemberDetail
@@ -242,10 +243,6 @@ async def get_posting(period_id: str, db: AsyncSession = Depends(get_osawe_db)):
         "stage": period.stage.stage_name,
     }
 
-    # add statistics info
-    for status in stages:
-        summary[f"sid{status.id}"] = 0
-
     # get available postings
     stmt = (
         select(
@@ -263,11 +260,11 @@ async def get_posting(period_id: str, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(stmt)
     rows = result.all()
 
-    # map periods to base items
+    # add the posting count of each stage
+    totals = aggregate.index_values(rows, "stage_id", "total", int)
 
-    for statistic in rows:
-        sid = statistic["stage_id"]
-        summary[f"sid{sid}"] = statistic["total"]
+    for stage in stages:
+        summary[f"sid{stage.id}"] = totals.get(stage.id, 0)
 
     print("ending single period summary", assist.get_current_date(False))
 
@@ -275,13 +272,19 @@ async def get_posting(period_id: str, db: AsyncSession = Depends(get_osawe_db)):
 
 
 def get_stage_fields(currentStage: int, email: str, comments: str):
-    if currentStage == 1:
+    if currentStage == assist.APPROVAL_STAGE_POP_APPROVAL:
+        return {
+            MonthlyPostingDB.pop_review_at: assist.get_current_date(False),
+            MonthlyPostingDB.pop_review_by: email,
+            MonthlyPostingDB.pop_review_comments: comments,
+        }
+    elif currentStage == assist.APPROVAL_STAGE_SUBMITTED:
         return {
             MonthlyPostingDB.review1_at: assist.get_current_date(False),
             MonthlyPostingDB.review1_by: email,
             MonthlyPostingDB.review1_comments: comments,
         }
-    elif currentStage == 2:
+    elif currentStage == assist.APPROVAL_STAGE_PRIMARY:
         return {
             MonthlyPostingDB.review2_at: assist.get_current_date(False),
             MonthlyPostingDB.review2_by: email,
@@ -298,98 +301,58 @@ def get_stage_fields(currentStage: int, email: str, comments: str):
 async def update_period_postings(
     db: AsyncSession,
     currentPeriod: int,
-    reviewAction: int,
     currentStage: int,
     email: str,
     comments: str,
     newStage: int,
     newStatus: int,
+    config: PostingPeriodDB = None,
 ):
-
-    # get fields
+    """
+    Moves the submitted postings of a period along with the period review
+
+    The review fields, stage and status are set in one UPDATE. Postings
+    approved by it get their transactions posted in one INSERT ... SELECT.
+    Nothing is committed, the caller commits with the period.
+
+    Args:
+        newStage (int): The stage of the postings, -1 to keep it.
+        newStatus (int): The status of the postings, -1 to keep it.
+        config (PostingPeriodDB): The period giving the loan terms, needed
+            when the postings are approved.
+
+    Returns:
+        list: The ids of the postings updated.
+    """
     # get review fields
     fields = get_stage_fields(currentStage, email, comments)
 
-    # check type of action
-    if reviewAction == assist.REVIEW_ACTION_REJECT:
-
-        # reject
-        await db.execute(
-            update(MonthlyPostingDB)
-            .where(
-                and_(
-                    MonthlyPostingDB.period_id == currentPeriod,
-                    MonthlyPostingDB.stage_id == currentStage,
-                    MonthlyPostingDB.status_id == assist.STATUS_SUBMITTED,
-                )
-            )
-            .values(fields)
-        )
-
-        if newStatus != -1:
-            # update the fields
-
-            await db.execute(
-                update(MonthlyPostingDB)
-                .where(
-                    and_(
-                        MonthlyPostingDB.period_id == currentPeriod,
-                        MonthlyPostingDB.stage_id == currentStage,
-                        MonthlyPostingDB.status_id == assist.STATUS_SUBMITTED,
-                    )
-                )
-                .values({MonthlyPostingDB.status_id: assist.STATUS_REJECTED})
-            )
+    if newStage != -1:
+        fields[MonthlyPostingDB.stage_id] = newStage
 
-        await db.commit()
+    if newStatus != -1:
+        fields[MonthlyPostingDB.status_id] = newStatus
 
-    else:
-        # approve
-
-        # fields
-        await db.execute(
-            update(MonthlyPostingDB)
-            .where(
-                and_(
-                    MonthlyPostingDB.period_id == currentPeriod,
-                    MonthlyPostingDB.stage_id == currentStage,
-                    MonthlyPostingDB.status_id == assist.STATUS_SUBMITTED,
-                )
+    result = await db.execute(
+        update(MonthlyPostingDB)
+        .where(
+            and_(
+                MonthlyPostingDB.period_id == currentPeriod,
+                MonthlyPostingDB.stage_id == currentStage,
+                MonthlyPostingDB.status_id == assist.STATUS_SUBMITTED,
             )
-            .values(fields)
         )
+        .values(fields)
+        .returning(MonthlyPostingDB.id)
+        .execution_options(synchronize_session=False)
+    )
+    ids = result.scalars().all()
 
-        # stage
-        if newStage != -1:
-            # update stage if its not -1
-            await db.execute(
-                update(MonthlyPostingDB)
-                .where(
-                    and_(
-                        MonthlyPostingDB.period_id == currentPeriod,
-                        MonthlyPostingDB.stage_id == currentStage,
-                        MonthlyPostingDB.status_id == assist.STATUS_SUBMITTED,
-                    )
-                )
-                .values({MonthlyPostingDB.stage_id: newStage})
-            )
+    # post the transactions of the approved postings
+    if newStatus == assist.STATUS_APPROVED:
+        await osaweposting.post_approved_postings(db, ids, config)
 
-        # status
-        if newStatus != -1:
-            # update status if its not -1
-            await db.execute(
-                update(MonthlyPostingDB)
-                .where(
-                    and_(
-                        MonthlyPostingDB.period_id == currentPeriod,
-                        MonthlyPostingDB.stage_id == currentStage,
-                        MonthlyPostingDB.status_id == assist.STATUS_SUBMITTED,
-                    )
-                )
-                .values({MonthlyPostingDB.status_id: newStatus})
-            )
-
-        await db.commit()
+    return ids
 
 
 @router.put("/review-update/{post_id}", response_model=PostingPeriodWithDetail)
@@ -454,7 +417,6 @@ async def review_posting(
             await update_period_postings(
                 db,
                 post_id,
-                review.review_action,
                 currentStage,
                 user.email,
                 review.comments,
@@ -474,7 +436,6 @@ async def review_posting(
                 await update_period_postings(
                     db,
                     post_id,
-                    review.review_action,
                     currentStage,
                     user.email,
                     review.comments,
@@ -492,7 +453,6 @@ async def review_posting(
                 await update_period_postings(
                     db,
                     post_id,
-                    review.review_action,
                     currentStage,
                     user.email,
                     review.comments,
@@ -516,7 +476,6 @@ async def review_posting(
             await update_period_postings(
                 db,
                 post_id,
-                review.review_action,
                 currentStage,
                 user.email,
                 review.comments,
@@ -536,7 +495,6 @@ async def review_posting(
                 await update_period_postings(
                     db,
                     post_id,
-                    review.review_action,
                     currentStage,
                     user.email,
                     review.comments,
@@ -552,7 +510,6 @@ async def review_posting(
                 await update_period_postings(
                     db,
                     post_id,
-                    review.review_action,
                     currentStage,
                     user.email,
                     review.comments,
@@ -576,7 +533,6 @@ async def review_posting(
             await update_period_postings(
                 db,
                 post_id,
-                review.review_action,
                 currentStage,
                 user.email,
                 review.comments,
@@ -592,7 +548,6 @@ async def review_posting(
             await update_period_postings(
                 db,
                 post_id,
-                review.review_action,
                 currentStage,
                 user.email,
                 review.comments,
@@ -618,8 +573,18 @@ async def review_posting(
         postingPeriod.status_id = assist.STATUS_APPROVED
         postingPeriod.stage_id = assist.APPROVAL_STAGE_APPROVED
 
-        # no need to update postings, the admin will approve the pop and force the stage to move
-        # this will also post the transactions
+        # approve the postings with a proof of payment and post their
+        # transactions, the admin forces postings still without one
+        await update_period_postings(
+            db,
+            post_id,
+            currentStage,
+            user.email,
+            review.comments,
+            assist.APPROVAL_STAGE_APPROVED,
+            assist.STATUS_APPROVED,
+            postingPeriod,
+        )
 
     try:
         await db.commit()
@@ -700,11 +665,6 @@ async def list_current_periods(
         for period in periods
     ]
 
-    # add statistics info
-    for period in summary:
-        for status in stages:
-            period[f"sid{status.id}"] = 0
-
     # get available postings
     period_date = dt.datetime(year, month, 1)
     period_id = assist.get_date_period(period_date)
@@ -726,12 +686,9 @@ async def list_current_periods(
     result = await db.execute(stmt)
     rows = result.all()
 
-    # map periods to base items
-    for period in summary:
-        for statistic in rows:
-            if period["id"] == statistic["period_id"]:
-                sid = statistic["stage_id"]
-                period[f"sid{sid}"] = statistic["total"]
+    # add the posting count of each stage to the periods
+    statistics = aggregate.pivot(rows, "period_id", "stage_id", "total", "sid", int)
+    aggregate.fill(summary, statistics, [f"sid{stage.id}" for stage in stages], default=0)
 
     print("ending period summary", assist.get_current_date(False))
 
@@ -742,9 +699,7 @@ async def list_current_periods(
 async def list_current_periods(period_id: str, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(MonthlyPostingDB)
-        # .options(
-        #    joinedload(MonthlyPostingDB.status),
-        # )
+        .options(*osaweloads.POSTING_MEMBER_DETAIL)
         .where(
             MonthlyPostingDB.period_id == period_id,
             MonthlyPostingDB.status_id == assist.STATUS_APPROVED,
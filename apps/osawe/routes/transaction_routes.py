@@ -5,10 +5,12 @@ from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import Session, joinedload
-from typing import List
+from typing import List, Optional
 
+from apps.osawe import osawebalances, osaweloads, osawesharing
 from apps.osawe.osawedb import get_osawe_db
-from helpers import assist
+from helpers import aggregate, assist
+from apps.osawe.models.member_balance_model import MemberBalance, MemberBalanceDB
 from apps.osawe.models.member_model import MemberDB
 from apps.osawe.models.param_models import (
     ParamExpenseEarningTransaction,
@@ -73,6 +75,7 @@ async def post_transaction(tran: Transaction, db: AsyncSession = Depends(get_osa
     )
     db.add(db_tran)
     try:
+        await osawebalances.add_to_balances(db, [db_tran])
         await db.commit()
         await db.refresh(db_tran)
     except Exception as e:
@@ -86,14 +89,7 @@ async def post_transaction(tran: Transaction, db: AsyncSession = Depends(get_osa
 @router.get("/list", response_model=List[TransactionWithDetail])
 async def list_transactions(db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
-        select(TransactionDB)
-        # .options(
-        #    joinedload(TransactionDB.post),
-        #    joinedload(TransactionDB.status),
-        #    joinedload(TransactionDB.type),
-        #    joinedload(TransactionDB.source),
-        #
-        # )
+        select(TransactionDB).options(*osaweloads.TRANSACTION_DETAIL)
     )
     transactions = result.scalars().all()
     return transactions
@@ -108,6 +104,7 @@ async def list_user_status_transactions(
 ):
     result = await db.execute(
         select(TransactionDB)
+        .options(*osaweloads.TRANSACTION_DETAIL)
         .where(
             TransactionDB.status_id == statusId,
             TransactionDB.user_id == userId,
@@ -128,6 +125,7 @@ async def list_status_transactions(typeId: int, statusId: int, year: int, db: As
     
     result = await db.execute(
         select(TransactionDB)
+        .options(*osaweloads.TRANSACTION_DETAIL)
         .where(
             TransactionDB.status_id == statusId,
             TransactionDB.type_id == typeId,
@@ -147,6 +145,7 @@ async def list_expense_earnings_status_transactions(
 ):
     result = await db.execute(
         select(TransactionDB)
+        .options(*osaweloads.TRANSACTION_DETAIL)
         .where(
             TransactionDB.status_id == statusId,
             or_(
@@ -165,7 +164,9 @@ async def list_expense_earnings_status_transactions(
 )
 async def list_expense_earnings(db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
-        select(TransactionDB).where(
+        select(TransactionDB)
+        .options(*osaweloads.TRANSACTION_DETAIL)
+        .where(
             or_(
                 TransactionDB.type_id == assist.TRANSACTION_GROUP_EARNING,
                 TransactionDB.type_id == assist.TRANSACTION_GROUP_EXPENSE,
@@ -182,7 +183,9 @@ async def list_expense_earnings(db: AsyncSession = Depends(get_osawe_db)):
 )
 async def list_mid_month_posting(type: int, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
-        select(TransactionDB).where(
+        select(TransactionDB)
+        .options(*osaweloads.TRANSACTION_DETAIL)
+        .where(
             TransactionDB.type_id == type,
             TransactionDB.period_id == assist.TRANSACTION_PERIOD_MID,
         )
@@ -199,7 +202,9 @@ async def list_mid_month_posting_status(
     type: int, status: int, db: AsyncSession = Depends(get_osawe_db)
 ):
     result = await db.execute(
-        select(TransactionDB).where(
+        select(TransactionDB)
+        .options(*osaweloads.TRANSACTION_DETAIL)
+        .where(
             TransactionDB.type_id == type,
             TransactionDB.period_id == assist.TRANSACTION_PERIOD_MID,
             TransactionDB.status_id == status,
@@ -213,6 +218,7 @@ async def list_mid_month_posting_status(
 async def get_transaction(tran_id: int, db: AsyncSession = Depends(get_osawe_db)):
     result = await db.execute(
         select(TransactionDB)
+        .options(*osaweloads.TRANSACTION_DETAIL)
         .where(TransactionDB.id == tran_id)
     )
     transaction = result.scalars().first()
@@ -236,13 +242,19 @@ async def update_transaction(
             detail=f"Unable to find transaction with id '{id}'",
         )
 
-    # Update fields that are not None
-    for key, value in transaction_update.dict(exclude_unset=True).items():
-        setattr(transaction, key, value)
-
     try:
+        # the balances are taken from the transaction as it was and as it is
+        await osawebalances.remove_from_balances(db, [transaction])
+
+        # Update fields that are not None
+        for key, value in transaction_update.dict(exclude_unset=True).items():
+            setattr(transaction, key, value)
+
+        await osawebalances.add_to_balances(db, [transaction])
         await db.commit()
-        await db.refresh(transaction)
+        transaction = await osaweloads.reload(
+            db, transaction, osaweloads.TRANSACTION_DETAIL
+        )
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to update transaction {e}")
@@ -253,10 +265,6 @@ async def update_transaction(
 async def get_member_summary(
     userId: int, year: int, db: AsyncSession = Depends(get_osawe_db)
 ):
-    # year
-    start_of_year = date(year, 1, 1)
-    start_of_next_year = date(year + 1, 1, 1)
-
     # get user
     result = await db.execute(select(UserDB).where(UserDB.id == userId))
     user = result.scalars().first()
@@ -271,29 +279,12 @@ async def get_member_summary(
 
     summary = [{"id": type.id, "name": type.type_name, "amount": 0} for type in types]
 
-    # get available transactions
-    stmt = (
-        select(
-            TransactionTypeDB.type_name,
-            func.coalesce(func.sum(TransactionDB.amount), 0).label("amount"),
-        )
-        .outerjoin(TransactionDB, TransactionTypeDB.id == TransactionDB.type_id)
-        .where(
-            TransactionDB.user_id == userId,
-            TransactionDB.date >= start_of_year,
-            TransactionDB.date < start_of_next_year,
-        )
-        .group_by(TransactionTypeDB.type_name)
-    )
+    # one indexed lookup of the member balances
+    balances = await osawebalances.get_member_balances(db, userId, year)
 
-    result = await db.execute(stmt)
-    rows = result.all()
-    # map transactions to base items
     for item in summary:
-        for row in rows:
-            if row[0] == item["name"]:
-                item["amount"] = row[1]
-                break
+        balance = balances.get(item["id"])
+        item["amount"] = balance.amount if balance else 0.0
 
     return summary
 
@@ -306,37 +297,52 @@ async def get_all_member_summary(year: int, db: AsyncSession = Depends(get_osawe
 
     summary = [{"id": type.id, "name": type.type_name, "amount": 0} for type in types]
 
-    # get available transactions
-
-    start_of_year = date(year, 1, 1)
-    start_of_next_year = date(year + 1, 1, 1)
-
-    stmt = (
+    # group totals of the member balances
+    result = await db.execute(
         select(
-            TransactionTypeDB.type_name,
-            func.coalesce(func.sum(TransactionDB.amount), 0).label("amount"),
+            MemberBalanceDB.type_id,
+            func.sum(MemberBalanceDB.amount).label("amount"),
         )
-        .where(
-            TransactionDB.status_id == assist.STATUS_APPROVED,
-            TransactionDB.date >= start_of_year,
-            TransactionDB.date < start_of_next_year,
-        )
-        .outerjoin(TransactionDB, TransactionTypeDB.id == TransactionDB.type_id)
-        .group_by(TransactionTypeDB.type_name)
+        .where(MemberBalanceDB.year == year)
+        .group_by(MemberBalanceDB.type_id)
     )
+    amounts = aggregate.index_values(result.all(), "type_id", "amount")
 
-    result = await db.execute(stmt)
-    rows = result.all()
-    # map transactions to base items
     for item in summary:
-        for row in rows:
-            if row[0] == item["name"]:
-                item["amount"] = row[1]
-                break
+        item["amount"] = amounts.get(item["id"], 0.0)
 
     return summary
 
 
+@router.get("/balances/{userId}/{year}", response_model=List[MemberBalance])
+async def list_member_balances(
+    userId: int, year: int, db: AsyncSession = Depends(get_osawe_db)
+):
+    balances = await osawebalances.get_member_balances(db, userId, year)
+    return list(balances.values())
+
+
+@router.post("/balances/rebuild")
+async def rebuild_member_balances(
+    year: Optional[int] = None, db: AsyncSession = Depends(get_osawe_db)
+):
+    years = None if year is None else [year]
+
+    try:
+        await osawebalances.rebuild_member_balances(db, years)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(
+            status_code=400, detail=f"Unable to rebuild member balances: {e}"
+        )
+
+    return {
+        "succeeded": True,
+        "message": f"Member balances have been successfully rebuilt for {year or 'all years'}",
+    }
+
+
 @router.put("/review-update/{id}", response_model=TransactionWithDetail)
 async def review_posting(
     id: int, review: SACCOReview, db: AsyncSession = Depends(get_osawe_db)
@@ -462,8 +468,13 @@ async def review_posting(
         # attachment may or may not be provided
 
     try:
+        if approveTransaction:
+            await osawebalances.add_to_balances(db, [transaction])
+
         await db.commit()
-        await db.refresh(transaction)
+        transaction = await osaweloads.reload(
+            db, transaction, osaweloads.TRANSACTION_DETAIL
+        )
     except Exception as e:
         await db.rollback()
         raise HTTPException(
@@ -495,38 +506,17 @@ async def get_all_member_ytd(year: int, db: AsyncSession = Depends(get_osawe_db)
         for user in users
     ]
 
-    # add transaction info
-    for member in summary:
-        for type in types:
-            member[f"tid{type.id}"] = 0.0
-
-    # get available transactions
-    start_of_year = date(year, 1, 1)
-    start_of_next_year = date(year + 1, 1, 1)
-
-    stmt = (
-        select(
-            TransactionDB.user_id,
-            TransactionDB.type_id,
-            func.coalesce(func.sum(TransactionDB.amount), 0).label("amount"),
-        )
-        .where(
-            TransactionDB.status_id == assist.STATUS_APPROVED,
-            TransactionDB.date >= start_of_year,
-            TransactionDB.date < start_of_next_year,
-        )
-        .group_by(TransactionDB.user_id, TransactionDB.type_id)
-    )
+    # get the member balances of the year
+    stmt = select(
+        MemberBalanceDB.user_id, MemberBalanceDB.type_id, MemberBalanceDB.amount
+    ).where(MemberBalanceDB.year == year)
 
     result = await db.execute(stmt)
     rows = result.all()
 
-    # map transactions to base items
-    for member in summary:
-        for tran in rows:
-            if member["id"] == tran["user_id"]:
-                tid = tran["type_id"]
-                member[f"tid{tid}"] = tran["amount"]
+    # add the balance of each type to the members
+    balances = aggregate.pivot(rows, "user_id", "type_id", "amount", "tid")
+    aggregate.fill(summary, balances, [f"tid{type.id}" for type in types])
 
     print("ending summary", assist.get_current_date(False))
 
@@ -536,283 +526,9 @@ async def get_all_member_ytd(year: int, db: AsyncSession = Depends(get_osawe_db)
 @router.get("/interest-sharing/{year}", response_model=ParamInterestSharingSummary)
 async def get_all_member_interest_sharing(year: int, db: AsyncSession = Depends(get_osawe_db)):
     print("starting all member interest sharing", assist.get_current_date(False))
-    # get all users
-    result = await db.execute(select(MemberDB))
-    users = result.scalars().all()
 
-    # create a summary for all members
-    summary = [
-        {
-            "id": user.id,
-            "fname": user.fname,
-            "lname": user.lname,
-            "email": user.email,
-            "phone": user.mobile1,
-            "bank_name": user.bank_name,
-            "branch_name": user.bank_branch_name,
-            "branch_code": user.bank_branch_code,
-            "bank_account_no": user.bank_account_no,
-            "bank_account_name": user.bank_account_name,
-            "itotal": 0,
-            "stotal": 0,
-            "loan_total": 0,
-            "loan_interest_total": 0,
-            "loan_repayment_total": 0,
-            "loan_plus_interest_total": 0,
-            "loan_balance": 0,
-            "time_value_total": 0,
-            "proportional_final_share": 0,
-            "payout_balance": 0,
-            "tsavings": {"id": "Member Savings"},
-            "isharing": {"id": "Member Sharing"},
-        }
-        for user in users
-    ]
-
-    # add transaction info
-    for member in summary:
-        for m in range(1, 13):
-            member["tsavings"][f"m{m}"] = 0
-
-    # get total savings for member per month
-    start_of_year = date(year, 1, 1)
-    start_of_next_year = date(year + 1, 1, 1)
-    
-    stmt = (
-        select(
-            TransactionDB.user_id,
-            TransactionDB.type_id,
-            func.extract("year", TransactionDB.date).label("year"),
-            func.extract("month", TransactionDB.date).label("month"),
-            func.coalesce(func.sum(TransactionDB.amount), 0).label("amount"),
-        )
-        .where(
-            TransactionDB.status_id == assist.STATUS_APPROVED,
-            TransactionDB.date >= start_of_year,
-            TransactionDB.date < start_of_next_year,
-        )
-        .group_by(
-            TransactionDB.user_id,
-            TransactionDB.type_id,
-            func.extract("year", TransactionDB.date).label("year"),
-            func.extract("month", TransactionDB.date).label("month"),
-        )
-    )
-
-    result = await db.execute(stmt)
-    memberRows = result.all()
-
-    # get group total savings, interest and loans per month
-    stmt = (
-        select(
-            TransactionDB.type_id,
-            func.extract("year", TransactionDB.date).label("year"),
-            func.extract("month", TransactionDB.date).label("month"),
-            func.coalesce(func.sum(TransactionDB.amount), 0).label("amount"),
-        )
-        .where(
-            TransactionDB.status_id == assist.STATUS_APPROVED,
-            TransactionDB.date >= start_of_year,
-            TransactionDB.date < start_of_next_year,
-            or_(
-                TransactionDB.type_id == assist.TRANSACTION_SAVINGS,
-                TransactionDB.type_id == assist.TRANSACTION_LOAN,
-                TransactionDB.type_id == assist.TRANSACTION_INTEREST_CHARGED,
-            ),
-        )
-        .group_by(
-            TransactionDB.type_id,
-            func.extract("year", TransactionDB.date).label("year"),
-            func.extract("month", TransactionDB.date).label("month"),
-        )
-    )
-
-    result = await db.execute(stmt)
-    totalRows = result.all()
-
-    # get all totals
-    totals = {
-        "total_loan_balance": 0,
-        "group_time_value_total": 0,
-        "group_proportional_final_share": 0,
-        "group_share_total": 0,
-        "group_money_growth_total": 0,
-        "group_money_growth_percent": 0,
-        "group_payout_balance": 0,
-        f"t{assist.TRANSACTION_SAVINGS}": {"id": "Group Savings"},
-        f"t{assist.TRANSACTION_LOAN}": {"id": "Group Loans"},
-        f"t{assist.TRANSACTION_INTEREST_CHARGED}": {"id": "Group Interest"},
-        f"r1": {"id": "Current Month Loan/Savings Proportion"},
-        f"r2": {"id": "Cummulative Month Loan/Savings Proportion"},
-        f"r3": {"id": "Interest rate"},
-    }
-
-    for m in range(1, 13):
-        totals[f"t{assist.TRANSACTION_SAVINGS}"][f"m{m}"] = 0
-        totals[f"t{assist.TRANSACTION_LOAN}"][f"m{m}"] = 0
-        totals[f"t{assist.TRANSACTION_INTEREST_CHARGED}"][f"m{m}"] = 0
-        totals[f"r1"][f"m{m}"] = 0
-        totals[f"r2"][f"m{m}"] = 0
-
-    # map total transactions to base items
-    for tran in totalRows:
-        tid = tran["type_id"]
-        mid = tran["month"]
-        totals[f"t{tid}"][f"m{mid}"] = tran["amount"]
-
-    # calculate row 1 and row 2
-    for m in range(1, 13):
-        # get savings, loans and interest
-        savings = totals[f"t{assist.TRANSACTION_SAVINGS}"][f"m{m}"]
-        loans = totals[f"t{assist.TRANSACTION_LOAN}"][f"m{m}"]
-
-        # get interest rate
-        if m < 10:
-            rate = 0.10
-        elif m == 10:
-            rate = 0.075
-        elif m == 11:
-            rate = 0.05
-        else:
-            rate = 0.025
-
-        # set rows
-        totals[f"r1"][f"m{m}"] = (
-            round(loans * rate, 3) if savings >= loans else round(savings * rate, 3)
-        )
-        totals[f"r2"][f"m{m}"] = (
-            0 if savings >= loans else round(((loans - savings) * rate), 3)
-        )
-
-    # calculate interest rates
-    for m in range(1, 13):
-        # get interest rate
-
-        if m < 10:
-            rate = 0.10
-        elif m == 10:
-            rate = 0.075
-        elif m == 11:
-            rate = 0.05
-        else:
-            rate = 0.025
-        # set rows
-        totals[f"r3"][f"m{m}"] = rate
-
-    # map transactions to base items
-    for member in summary:
-        # set transactions
-        for tran in memberRows:
-            if member["id"] == tran["user_id"]:
-                if tran["type_id"] == assist.TRANSACTION_SAVINGS:
-                    mid = tran["month"]
-
-                    # set saving
-                    member["tsavings"][f"m{mid}"] = tran["amount"]
-
-                elif tran["type_id"] == assist.TRANSACTION_LOAN:
-                    # set loan total
-                    member["loan_total"] += tran["amount"]
-                elif tran["type_id"] == assist.TRANSACTION_INTEREST_CHARGED:
-                    # set loan interest total
-                    member["loan_interest_total"] += tran["amount"]
-                elif tran["type_id"] == assist.TRANSACTION_LOAN_PAYMENT:
-                    # set loan payment total
-                    member["loan_repayment_total"] += tran["amount"]
-
-        # set sharing
-        for m in range(1, 13):
-
-            sharing = 0
-            msavings = member["tsavings"][f"m{m}"]
-            r1 = totals[f"r1"][f"m{m}"]
-            r2 = totals[f"r2"][f"m{m}"]
-            tsavinsg = totals[f"t{assist.TRANSACTION_SAVINGS}"][f"m{m}"]
-            tinterest = totals[f"t{assist.TRANSACTION_INTEREST_CHARGED}"][f"m{m}"]
-
-            if m == 1:
-                if tsavinsg == 0:
-                    # will produce error, set zero
-                    sharing = 0
-                else:
-                    # calculate
-                    sharing = round((msavings / tsavinsg) * tinterest, 3)
-            else:
-                # get total upto current month
-                memberSavingTotal = 0
-                groupSavingTotal = 0
-
-                for mindex in range(1, m):
-                    memberSavingTotal += member["tsavings"][f"m{mindex}"]
-                    groupSavingTotal += totals[f"t{assist.TRANSACTION_SAVINGS}"][
-                        f"m{mindex}"
-                    ]
-
-                if tsavinsg == 0 or groupSavingTotal == 0:
-                    # will produce error, set zero
-                    sharing = 0
-                else:
-                    # calcute
-                    sharing1 = round((msavings / tsavinsg) * r1, 3)
-                    sharing2 = round((memberSavingTotal / groupSavingTotal) * r2, 3)
-
-                    sharing = sharing1 + sharing2
-
-            member["isharing"][f"m{m}"] = sharing
-
-        # set sharing totals
-        totalMemberSharing = 0
-        totalMemberSavings = 0
-
-        for mindex in range(1, 13):
-            totalMemberSharing += member["isharing"][f"m{mindex}"]
-            totalMemberSavings += member["tsavings"][f"m{mindex}"]
-
-        member["itotal"] = totalMemberSharing
-        member["stotal"] = totalMemberSavings
-
-        # set calculated fields
-        member["loan_plus_interest_total"] = (
-            member["loan_total"] + member["loan_interest_total"]
-        )
-        member["loan_balance"] = (
-            member["loan_plus_interest_total"] - member["loan_repayment_total"]
-        )
-        member["time_value_total"] = member["stotal"] + member["itotal"]
-
-        totals["total_loan_balance"] += member["loan_balance"]
-
-        totals["group_time_value_total"] += member["time_value_total"]
-
-        totals["group_share_total"] += member["stotal"]
-
-    # calculate proportional share for each member
-    for member in summary:
-
-        member["proportional_final_share"] = round(
-            (member["time_value_total"] / totals["group_time_value_total"])
-            * totals["total_loan_balance"],
-            3,
-        )
-
-        member["payout_balance"] = (
-            member["proportional_final_share"] - member["loan_balance"]
-        )
-
-        totals["group_proportional_final_share"] += member["proportional_final_share"]
-        totals["group_payout_balance"] += member["payout_balance"]
-
-    totals["group_money_growth_total"] = (
-        totals["group_proportional_final_share"] - totals["group_share_total"]
-    )
-
-    totals["group_money_growth_percent"] = round(
-        (totals["group_money_growth_total"] / totals["group_share_total"]) * 100, 0
-    )
-
-    totals["group_payout_balance"] = round(totals["group_payout_balance"], 1)
-
-    fullSummary = {"totals": totals, "members": summary}
+    # the group loan balance is shared
+    fullSummary = await osawesharing.get_sharing_summary(db, year)
 
     print("ending starting all member interest sharing", assist.get_current_date(False))
 
@@ -823,9 +539,6 @@ async def get_all_member_interest_sharing(year: int, db: AsyncSession = Depends(
 async def get_all_member_payout_sharing(year: int, db: AsyncSession = Depends(get_osawe_db)):
     print("starting all member interest sharing", assist.get_current_date(False))
 
-    start_of_year = date(year, 1, 1)
-    start_of_next_year = date(year + 1, 1, 1)
-    
     period_id = assist.get_current_date().strftime("%Y%m")
 
     result = await db.execute(
@@ -842,280 +555,8 @@ async def get_all_member_payout_sharing(year: int, db: AsyncSession = Depends(ge
             detail=f"Unable to find posting period with id '{period_id}'",
         )
 
-    # get all users
-    result = await db.execute(select(MemberDB))
-    users = result.scalars().all()
-
-    # create a summary for all members
-    summary = [
-        {
-            "id": user.id,
-            "fname": user.fname,
-            "lname": user.lname,
-            "email": user.email,
-            "phone": user.mobile1,
-            "bank_name": user.bank_name,
-            "branch_name": user.bank_branch_name,
-            "branch_code": user.bank_branch_code,
-            "bank_account_no": user.bank_account_no,
-            "bank_account_name": user.bank_account_name,
-            "itotal": 0,
-            "stotal": 0,
-            "loan_total": 0,
-            "loan_interest_total": 0,
-            "loan_repayment_total": 0,
-            "loan_plus_interest_total": 0,
-            "loan_balance": 0,
-            "time_value_total": 0,
-            "proportional_final_share": 0,
-            "payout_balance": 0,
-            "tsavings": {"id": "Member Savings"},
-            "isharing": {"id": "Member Sharing"},
-        }
-        for user in users
-    ]
-
-    # add transaction info
-    for member in summary:
-        for m in range(1, 13):
-            member["tsavings"][f"m{m}"] = 0
-
-    # get total savings for member per month
-    stmt = (
-        select(
-            TransactionDB.user_id,
-            TransactionDB.type_id,
-            func.extract("year", TransactionDB.date).label("year"),
-            func.extract("month", TransactionDB.date).label("month"),
-            func.coalesce(func.sum(TransactionDB.amount), 0).label("amount"),
-        )
-        .where(
-            TransactionDB.status_id == assist.STATUS_APPROVED,
-            TransactionDB.date >= start_of_year,
-            TransactionDB.date < start_of_next_year,
-        )
-        .group_by(
-            TransactionDB.user_id,
-            TransactionDB.type_id,
-            func.extract("year", TransactionDB.date).label("year"),
-            func.extract("month", TransactionDB.date).label("month"),
-        )
-    )
-
-    result = await db.execute(stmt)
-    memberRows = result.all()
-
-    # get group total savings, interest and loans per month
-    stmt = (
-        select(
-            TransactionDB.type_id,
-            func.extract("year", TransactionDB.date).label("year"),
-            func.extract("month", TransactionDB.date).label("month"),
-            func.coalesce(func.sum(TransactionDB.amount), 0).label("amount"),
-        )
-        .where(
-            TransactionDB.status_id == assist.STATUS_APPROVED,
-            TransactionDB.date >= start_of_year,
-            TransactionDB.date < start_of_next_year,
-            or_(
-                TransactionDB.type_id == assist.TRANSACTION_SAVINGS,
-                TransactionDB.type_id == assist.TRANSACTION_LOAN,
-                TransactionDB.type_id == assist.TRANSACTION_INTEREST_CHARGED,
-            ),
-        )
-        .group_by(
-            TransactionDB.type_id,
-            func.extract("year", TransactionDB.date).label("year"),
-            func.extract("month", TransactionDB.date).label("month"),
-        )
-    )
-
-    result = await db.execute(stmt)
-    totalRows = result.all()
-
-    # get all totals
-    totals = {
-        "total_loan_balance": 0,
-        "group_time_value_total": 0,
-        "group_proportional_final_share": 0,
-        "group_share_total": 0,
-        "group_money_growth_total": 0,
-        "group_money_growth_percent": 0,
-        "group_payout_balance": 0,
-        f"t{assist.TRANSACTION_SAVINGS}": {"id": "Group Savings"},
-        f"t{assist.TRANSACTION_LOAN}": {"id": "Group Loans"},
-        f"t{assist.TRANSACTION_INTEREST_CHARGED}": {"id": "Group Interest"},
-        f"r1": {"id": "Current Month Loan/Savings Proportion"},
-        f"r2": {"id": "Cummulative Month Loan/Savings Proportion"},
-        f"r3": {"id": "Interest rate"},
-    }
-
-    for m in range(1, 13):
-        totals[f"t{assist.TRANSACTION_SAVINGS}"][f"m{m}"] = 0
-        totals[f"t{assist.TRANSACTION_LOAN}"][f"m{m}"] = 0
-        totals[f"t{assist.TRANSACTION_INTEREST_CHARGED}"][f"m{m}"] = 0
-        totals[f"r1"][f"m{m}"] = 0
-        totals[f"r2"][f"m{m}"] = 0
-
-    # map total transactions to base items
-    for tran in totalRows:
-        tid = tran["type_id"]
-        mid = tran["month"]
-        totals[f"t{tid}"][f"m{mid}"] = tran["amount"]
-
-    # calculate row 1 and row 2
-    for m in range(1, 13):
-        # get savings, loans and interest
-        savings = totals[f"t{assist.TRANSACTION_SAVINGS}"][f"m{m}"]
-        loans = totals[f"t{assist.TRANSACTION_LOAN}"][f"m{m}"]
-
-        # get interest rate
-        if m < 10:
-            rate = 0.10
-        elif m == 10:
-            rate = 0.075
-        elif m == 11:
-            rate = 0.05
-        else:
-            rate = 0.025
-
-        # set rows
-        totals[f"r1"][f"m{m}"] = (
-            round(loans * rate, 3) if savings >= loans else round(savings * rate, 3)
-        )
-        totals[f"r2"][f"m{m}"] = (
-            0 if savings >= loans else round(((loans - savings) * rate), 3)
-        )
-
-    # calculate interest rates
-    for m in range(1, 13):
-        # get interest rate
-
-        if m < 10:
-            rate = 0.10
-        elif m == 10:
-            rate = 0.075
-        elif m == 11:
-            rate = 0.05
-        else:
-            rate = 0.025
-        # set rows
-        totals[f"r3"][f"m{m}"] = rate
-
-    # map transactions to base items
-    for member in summary:
-        # set transactions
-        for tran in memberRows:
-            if member["id"] == tran["user_id"]:
-                if tran["type_id"] == assist.TRANSACTION_SAVINGS:
-                    mid = tran["month"]
-
-                    # set saving
-                    member["tsavings"][f"m{mid}"] = tran["amount"]
-
-                elif tran["type_id"] == assist.TRANSACTION_LOAN:
-                    # set loan total
-                    member["loan_total"] += tran["amount"]
-                elif tran["type_id"] == assist.TRANSACTION_INTEREST_CHARGED:
-                    # set loan interest total
-                    member["loan_interest_total"] += tran["amount"]
-                elif tran["type_id"] == assist.TRANSACTION_LOAN_PAYMENT:
-                    # set loan payment total
-                    member["loan_repayment_total"] += tran["amount"]
-
-        # set sharing
-        for m in range(1, 13):
-
-            sharing = 0
-            msavings = member["tsavings"][f"m{m}"]
-            r1 = totals[f"r1"][f"m{m}"]
-            r2 = totals[f"r2"][f"m{m}"]
-            tsavinsg = totals[f"t{assist.TRANSACTION_SAVINGS}"][f"m{m}"]
-            tinterest = totals[f"t{assist.TRANSACTION_INTEREST_CHARGED}"][f"m{m}"]
-
-            if m == 1:
-                if tsavinsg == 0:
-                    # will produce error, set zero
-                    sharing = 0
-                else:
-                    # calculate
-                    sharing = round((msavings / tsavinsg) * tinterest, 3)
-            else:
-                # get total upto current month
-                memberSavingTotal = 0
-                groupSavingTotal = 0
-
-                for mindex in range(1, m):
-                    memberSavingTotal += member["tsavings"][f"m{mindex}"]
-                    groupSavingTotal += totals[f"t{assist.TRANSACTION_SAVINGS}"][
-                        f"m{mindex}"
-                    ]
-
-                if tsavinsg == 0 or groupSavingTotal == 0:
-                    # will produce error, set zero
-                    sharing = 0
-                else:
-                    # calcute
-                    sharing1 = round((msavings / tsavinsg) * r1, 3)
-                    sharing2 = round((memberSavingTotal / groupSavingTotal) * r2, 3)
-
-                    sharing = sharing1 + sharing2
-
-            member["isharing"][f"m{m}"] = sharing
-
-        # set sharing totals
-        totalMemberSharing = 0
-        totalMemberSavings = 0
-
-        for mindex in range(1, 13):
-            totalMemberSharing += member["isharing"][f"m{mindex}"]
-            totalMemberSavings += member["tsavings"][f"m{mindex}"]
-
-        member["itotal"] = totalMemberSharing
-        member["stotal"] = totalMemberSavings
-
-        # set calculated fields
-        member["loan_plus_interest_total"] = (
-            member["loan_total"] + member["loan_interest_total"]
-        )
-        member["loan_balance"] = (
-            member["loan_plus_interest_total"] - member["loan_repayment_total"]
-        )
-        member["time_value_total"] = member["stotal"] + member["itotal"]
-
-        totals["total_loan_balance"] += member["loan_balance"]
-
-        totals["group_time_value_total"] += member["time_value_total"]
-
-        totals["group_share_total"] += member["stotal"]
-
-    # calculate proportional share for each member
-    for member in summary:
-
-        member["proportional_final_share"] = round(
-            (member["time_value_total"] / totals["group_time_value_total"])
-            * period.cash_at_bank,
-            3,
-        )
-
-        member["payout_balance"] = (
-            member["proportional_final_share"] - member["loan_balance"]
-        )
-
-        totals["group_proportional_final_share"] += member["proportional_final_share"]
-        totals["group_payout_balance"] += member["payout_balance"]
-
-    totals["group_money_growth_total"] = (
-        totals["group_proportional_final_share"] - totals["group_share_total"]
-    )
-
-    totals["group_money_growth_percent"] = round(
-        (totals["group_money_growth_total"] / totals["group_share_total"]) * 100, 0
-    )
-
-    totals["group_payout_balance"] = round(totals["group_payout_balance"], 1)
-
-    fullSummary = {"totals": totals, "members": summary}
+    # the cash at bank is shared
+    fullSummary = await osawesharing.get_sharing_summary(db, year, period.cash_at_bank)
 
     print("ending starting all member interest sharing", assist.get_current_date(False))
 
@@ -1125,15 +566,24 @@ async def get_all_member_payout_sharing(year: int, db: AsyncSession = Depends(ge
 @router.get("/transaction-summary/{year}", response_model=List[ParamMemberTransaction])
 async def get_all_member_transaction_summary(year: int, db: AsyncSession = Depends(get_osawe_db)):
 
-    # create a summary
-    summary = []
-
     # get available transactions
     start_of_year = date(year, 1, 1)
     start_of_next_year = date(year + 1, 1, 1)
-    
+
+    # only the fields of the summary, joined in the query
     result = await db.execute(
-        select(TransactionDB).where(
+        select(
+            TransactionDB.id,
+            func.concat(UserDB.fname, " ", UserDB.lname).label("name"),
+            UserDB.email,
+            UserDB.mobile.label("phone"),
+            TransactionDB.date.label("period"),
+            TransactionTypeDB.type_name.label("type"),
+            TransactionDB.amount,
+        )
+        .join(UserDB, UserDB.id == TransactionDB.user_id)
+        .join(TransactionTypeDB, TransactionTypeDB.id == TransactionDB.type_id)
+        .where(
             TransactionDB.status_id == assist.STATUS_APPROVED,
             TransactionDB.type_id != assist.TRANSACTION_GROUP_EARNING,
             TransactionDB.type_id != assist.TRANSACTION_GROUP_EXPENSE,
@@ -1141,23 +591,8 @@ async def get_all_member_transaction_summary(year: int, db: AsyncSession = Depen
             TransactionDB.date < start_of_next_year,
         )
     )
-    rows = result.scalars().all()
 
-    # map transactions to base items
-    for tran in rows:
-        summary.append(
-            {
-                "id": tran.id,
-                "name": f"{tran.user.fname} {tran.user.lname}",
-                "email": tran.user.email,
-                "phone": tran.user.mobile,
-                "period": tran.date,
-                "type": tran.type.type_name,
-                "amount": tran.amount,
-            }
-        )
-
-    return summary
+    return result.mappings().all()
 
 
 @router.get(
@@ -1173,7 +608,9 @@ async def get_all_expense_earnings_summary(year: int, db: AsyncSession = Depends
     start_of_next_year = date(year + 1, 1, 1)
     
     result = await db.execute(
-        select(TransactionDB).where(
+        select(TransactionDB)
+        .options(*osaweloads.TRANSACTION_SUMMARY)
+        .where(
             TransactionDB.status_id == assist.STATUS_APPROVED,
             TransactionDB.date >= start_of_year,
             TransactionDB.date < start_of_next_year,
@@ -1217,6 +654,7 @@ async def initialize_validation_savings(db: AsyncSession = Depends(get_osawe_db)
     for row_index, row in df.iterrows():
 
         month = 1
+        transactions = []
         member = row_index + 1
 
         pad = str(member).zfill(3)
@@ -1260,8 +698,10 @@ async def initialize_validation_savings(db: AsyncSession = Depends(get_osawe_db)
                 created_by=f"member-{pad}.acount@gmail.com",
             )
             db.add(db_tran)
+            transactions.append(db_tran)
 
         try:
+            await osawebalances.add_to_balances(db, transactions)
             await db.commit()
         except Exception as e:
             await db.rollback()
@@ -1295,6 +735,7 @@ async def initialize_validation_loans(db: AsyncSession = Depends(get_osawe_db)):
     for row_index, row in df.iterrows():
 
         month = 1
+        transactions = []
         member = row_index + 1
 
         pad = str(member).zfill(3)
@@ -1338,8 +779,10 @@ async def initialize_validation_loans(db: AsyncSession = Depends(get_osawe_db)):
                 created_by=f"member-{pad}.acount@gmail.com",
             )
             db.add(db_tran)
+            transactions.append(db_tran)
 
         try:
+            await osawebalances.add_to_balances(db, transactions)
             await db.commit()
         except Exception as e:
             await db.rollback()
@@ -1372,6 +815,7 @@ async def initialize_validation_interest(db: AsyncSession = Depends(get_osawe_db
     for row_index, row in df.iterrows():
 
         month = 1
+        transactions = []
         member = row_index + 1
 
         pad = str(member).zfill(3)
@@ -1415,8 +859,10 @@ async def initialize_validation_interest(db: AsyncSession = Depends(get_osawe_db
                 created_by=f"member-{pad}.acount@gmail.com",
             )
             db.add(db_tran)
+            transactions.append(db_tran)
 
         try:
+            await osawebalances.add_to_balances(db, transactions)
             await db.commit()
         except Exception as e:
             await db.rollback()
@@ -1449,6 +895,7 @@ async def initialize_validation_loan_repayment(db: AsyncSession = Depends(get_os
     for row_index, row in df.iterrows():
 
         month = 1
+        transactions = []
         member = row_index + 1
 
         pad = str(member).zfill(3)
@@ -1492,8 +939,10 @@ async def initialize_validation_loan_repayment(db: AsyncSession = Depends(get_os
                 created_by=f"member-{pad}.acount@gmail.com",
             )
             db.add(db_tran)
+            transactions.append(db_tran)
 
         try:
+            await osawebalances.add_to_balances(db, transactions)
             await db.commit()
         except Exception as e:
             await db.rollback()
@@ -5,9 +5,10 @@ from sqlalchemy.future import select
 from typing import List
 
 from apps.osawe.osawedb import get_osawe_db
-from helpers import assist
+from helpers import assist, passwords
 from apps.osawe.models.review_model import SACCOReview
 from apps.osawe.models.user_model import User, UserDB, UserSimple, UserWithDetail
+from apps.osawe import osaweauth
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -38,7 +39,7 @@ async def create_user(user: User, db: AsyncSession = Depends(get_osawe_db)):
         address_postal=user.address_postal,
         # account
         role=user.role,
-        password=assist.hash_password(user.password),
+        password=await passwords.hash_password(user.password),
         # approval
         status_id=user.status_id,
         stage_id=user.stage_id,
@@ -72,13 +73,16 @@ async def update_item(
     for key, value in config_update.dict(exclude_unset=True).items():
         # if password, encrypt
         if key == "password":
-            setattr(config, key, assist.hash_password(value))
+            setattr(config, key, await passwords.hash_password(value))
         else:
             setattr(config, key, value)
 
     try:
         await db.commit()
         await db.refresh(config)
+
+        # the role may have changed
+        osaweauth.invalidate_user_role(user_id)
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to update user {e}")
@@ -129,12 +133,12 @@ async def login(
         # user not found
         raise HTTPException(status_code=401, detail=f"The specified username incorrect")
 
-    if not assist.verify_password(current_password, user.password):
+    if not await passwords.verify_password(current_password, user.password):
         raise HTTPException(
             status_code=401, detail=f"The specified current password is incorrect"
         )
 
-    user.password = assist.hash_password(new_password)
+    user.password = await passwords.hash_password(new_password)
 
     try:
         await db.commit()
@@ -34,7 +34,7 @@ class ComplaintDB(Base):
     uuid = Column(String, unique=True, index=True, nullable=False)
 
     # customer
-    customer_id = Column(Integer, ForeignKey("customers.id"))
+    customer_id = Column(Integer, ForeignKey("customers.id"), index=True)
 
     # complaint stage
     complaint_stage_id = Column(Integer, ForeignKey("list_complaint_stages.id"))
@@ -21,7 +21,7 @@ class CustomerDB(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     
     # account
-    account = Column(String, nullable=False)
+    account = Column(String, index=True, nullable=False)
     
     # user
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -33,7 +33,7 @@ class CustomerDB(Base):
     district_id = Column(Integer, ForeignKey("districts.id"), nullable=False)
     
     # route
-    route_id = Column(Integer, ForeignKey("routes.id"), nullable=False)
+    route_id = Column(Integer, ForeignKey("routes.id"), index=True, nullable=False)
     
     # attachments
     attachment_id = Column(Integer, ForeignKey("attachments.id"), nullable=True)
@@ -45,7 +45,7 @@ class CustomerDB(Base):
     
     #contact, address 
     email = Column(String, unique=True, index=True, nullable=False)
-    mobile = Column(String, nullable=False)
+    mobile = Column(String, index=True, nullable=False)
     tel = Column(String, nullable=False)
     address_physical = Column(String, nullable=True)
     address_postal = Column(String, nullable=True)
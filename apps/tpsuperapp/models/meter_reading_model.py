@@ -1,4 +1,13 @@
-from sqlalchemy import Column, Float, ForeignKey, Integer, String, DateTime, Date
+from sqlalchemy import (
+    Column,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    DateTime,
+    Date,
+    Index,
+)
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional
@@ -15,12 +24,23 @@ from apps.tpsuperapp.models.user_model import User, UserSimple
 # ---------- SQLAlchemy Models ----------
 class MeterReadingDB(Base):
     __tablename__ = "meter_readings"
+    __table_args__ = (
+        # readings of a customer in a period, used on upload
+        Index("ix_meter_readings_customer_period", "customer_id", "period_date"),
+        # latest approved reading of a customer, used for consumption
+        Index(
+            "ix_meter_readings_customer_status_read",
+            "customer_id",
+            "status_id",
+            "read_date",
+        ),
+    )
 
     # id
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
 
     # period
-    period_date = Column(Date, nullable=False)
+    period_date = Column(Date, index=True, nullable=False)
 
     # uuid
     uuid = Column(String, unique=True, index=True, nullable=False)
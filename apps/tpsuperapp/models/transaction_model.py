@@ -30,7 +30,9 @@ class TransactionDB(Base):
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
 
     # customer
-    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    customer_id = Column(
+        Integer, ForeignKey("customers.id"), index=True, nullable=False
+    )
 
     # attachment
     attachment_id = Column(Integer, ForeignKey("attachments.id"), nullable=True)
@@ -1,15 +1,13 @@
-import io
 import os
-import uuid
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from typing import List
 
 from apps.tpsuperapp.tpsuperappdb import get_tpsuperapp_db
-from helpers import assist
+from helpers import ingest, storage
 from apps.tpsuperapp.models.attachment_model import Attachment, AttachmentDB, AttachmentInput
-import csv
 
 
 from apps.tpsuperapp.models.param_models import ParamAttachmentDetail
@@ -18,59 +16,42 @@ from apps.tpsuperapp.models.user_model import UserDB
 router = APIRouter(prefix="/attachments", tags=["Attachment"])
 
 
-async def processCustomers(file: UploadFile, db=AsyncSession):
+CUSTOMER_IMPORT_COLUMNS = {
+    "Account": str,
+    "Current": float,
+    "Previous": float,
+    "Remarks": str,
+    "Meter": str,
+    "StreetName": str,
+    "StreetNo": str,
+    "Dept": str,
+    "ConsCode": str,
+    "Ward": str,
+    "Suburb": str,
+    "Name": str,
+    "Latitude": float,
+    "Longitude": float,
+}
+
+BILL_RATE_IMPORT_COLUMNS = {
+    "Order": str,
+    "Name": str,
+    "From": float,
+    "To": float,
+    "Rate": float,
+}
+
+
+async def processCustomers(file_path: str, preview: bool = True):
 
     # list
     newCustomers = []
 
     try:
-        contents = await file.read()
-        decode_contents = contents.decode("utf-8-sig")
-
-        csv_reader = csv.DictReader(io.StringIO(decode_contents))
-
-        data = list(csv_reader)
-
-        index = 1
-
-        keys = [
-            "Account",
-            "Current",
-            "Previous",
-            "Remarks",
-            "Meter",
-            "StreetName",
-            "StreetNo",
-            "Dept",
-            "ConsCode",
-            "Ward",
-            "Suburb",
-            "Name",
-            "Latitude",
-            "Longitude",
-        ]
-
-        for row in data:
-            
-            if not any(value and value.strip() for value in row.values()):
-                continue
-            
-            customer = {}
-
-            for key in keys:
-                if (
-                    key == "Latitude"
-                    or key == "Longitude"
-                    or key == "Current"
-                    or key == "Previous"
-                ):
-                    customer[key] = float(row[key])
-                else:
-                    customer[key] = row[key]
-
-            newCustomers.append(customer)
-
-            index += 1
+        # every row is validated, rows are only kept to be returned as a preview
+        async for batch in ingest.read_csv_batches(file_path, CUSTOMER_IMPORT_COLUMNS):
+            if preview:
+                newCustomers.extend(batch)
 
     except FileNotFoundError as e:
         raise HTTPException(
@@ -86,47 +67,16 @@ async def processCustomers(file: UploadFile, db=AsyncSession):
     return newCustomers
 
 
-async def processBillRates(file: UploadFile, db=AsyncSession):
+async def processBillRates(file_path: str, preview: bool = True):
 
     # list
     newRates = []
 
     try:
-        contents = await file.read()
-        decode_contents = contents.decode("utf-8-sig")
-
-        csv_reader = csv.DictReader(io.StringIO(decode_contents))
-
-        data = list(csv_reader)
-
-        index = 1
-
-        keys = [
-            "Order",
-            "Name",
-            "From",
-            "To",
-            "Rate",
-        ]
-
-        for row in data:
-            
-            if not any(value and value.strip() for value in row.values()):
-                continue
-            
-            billRate = {}
-
-            for key in keys:
-                if key == "Rate" or key == "From" or key == "To":
-                    billRate[key] = float(row[key])
-                elif key == "OrderName":
-                    billRate[key] = int(row[key])
-                else:
-                    billRate[key] = row[key]
-
-            newRates.append(billRate)
-
-            index += 1
+        # every row is validated, rows are only kept to be returned as a preview
+        async for batch in ingest.read_csv_batches(file_path, BILL_RATE_IMPORT_COLUMNS):
+            if preview:
+                newRates.extend(batch)
 
     except FileNotFoundError as e:
         raise HTTPException(
@@ -148,6 +98,7 @@ async def processBillRates(file: UploadFile, db=AsyncSession):
 async def post_attachment(
     typeId: str = "Attachment",
     parentId: int = 0,
+    preview: bool = True,
     file: UploadFile = File(...),
     db: AsyncSession = Depends(get_tpsuperapp_db),
 ):
@@ -155,40 +106,28 @@ async def post_attachment(
 
         itemList = []
 
-        if typeId == "customerImport":
-            itemList = await processCustomers(file, db)
-        elif typeId == "billRateImport":
-            itemList = await processBillRates(file, db)
-        # ensure folders exist
-        current = assist.get_current_date()
-        dir = f"{assist.UPLOAD_DIR}/{current.year}/{current.month}"
-
-        os.makedirs(dir, exist_ok=True)
-
         # Validate filename
         if not file.filename:
             raise HTTPException(status_code=400, detail="No filename provided")
 
-        # Generate unique name
-        fileDetail = os.path.splitext(file.filename)
-        noextensionfile = fileDetail[0]
-        ext = fileDetail[1]
-
-        unique_name = f"{noextensionfile}_{uuid.uuid4()}{ext}"
-        file_path = os.path.join(dir, unique_name)
+        # save in chunks, identical content is stored once
+        stored = await storage.store_upload(file)
+        file_path = storage.get_file(stored["path"])
 
-        # Save file safely
-        contents = await file.read()
-        with open(file_path, "wb") as f:
-            f.write(contents)
+        # stored content is never removed here, other attachments may use it
+        if typeId == "customerImport":
+            itemList = await processCustomers(file_path, preview)
+        elif typeId == "billRateImport":
+            itemList = await processBillRates(file_path, preview)
 
         # update file
         db_attachment = AttachmentDB(
             # personal details
             name=file.filename,
-            path=f"{current.year}/{current.month}/{unique_name}",
-            filesize=len(contents),
+            path=stored["path"],
+            filesize=stored["filesize"],
             filetype=file.content_type,
+            sha256=stored["sha256"],
             type=typeId,
             parent=parentId,
         )
@@ -205,6 +144,8 @@ async def post_attachment(
 
         return param
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
 
@@ -216,6 +157,34 @@ async def list_attachments(db: AsyncSession = Depends(get_tpsuperapp_db)):
     return attachments
 
 
+@router.get("/{id}/download")
+async def download_attachment(id: int, db: AsyncSession = Depends(get_tpsuperapp_db)):
+    result = await db.execute(select(AttachmentDB).where(AttachmentDB.id == id))
+    attachment = result.scalars().first()
+    if not attachment or not attachment.path:
+        raise HTTPException(
+            status_code=404, detail=f"Attachment with id '{id}' not found"
+        )
+
+    file_path = storage.get_file(attachment.path)
+    if not os.path.isfile(file_path):
+        raise HTTPException(
+            status_code=404, detail=f"The file of attachment '{id}' was not found"
+        )
+
+    # range requests are answered by FileResponse, so downloads can resume
+    headers = {}
+    if attachment.sha256:
+        headers["ETag"] = f'"{attachment.sha256}"'
+
+    return FileResponse(
+        file_path,
+        media_type=attachment.filetype,
+        filename=attachment.name,
+        headers=headers,
+    )
+
+
 @router.get("/{id}", response_model=Attachment)
 async def get_attachment(id: int, db: AsyncSession = Depends(get_tpsuperapp_db)):
     result = await db.execute(select(AttachmentDB).where(AttachmentDB.id == id))
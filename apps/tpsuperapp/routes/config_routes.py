@@ -4,7 +4,10 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import Session, joinedload
 from typing import List
 
-from apps.tpsuperapp.tpsuperappdb import get_tpsuperapp_db
+from helpers import database, http_client, passwords
+
+from apps.tpsuperapp import tpsuperappauth
+from apps.tpsuperapp.tpsuperappdb import engine, get_tpsuperapp_db
 from apps.tpsuperapp.models.configuration_model import AppConfiguration, AppConfigurationDB, SACCOConfigurationWithDetail
 from apps.tpsuperapp.models.user_model import UserDB
 from apps.tpsuperapp.models.status_types_model import StatusTypeDB
@@ -76,6 +79,30 @@ async def update_configuration(config_id: int, config_update: AppConfiguration,
         raise HTTPException(status_code=400, detail=f"Unable to update configuration {e}")
     return config
 
+@router.get("/pool-metrics", dependencies=[Depends(tpsuperappauth.get_administrator)])
+async def get_pool_metrics():
+    """
+    Gets the database connection pool usage, for sizing pools and workers
+    """
+    return database.get_pool_metrics(engine)
+
+
+@router.get("/password-hash-metrics", dependencies=[Depends(tpsuperappauth.get_administrator)])
+async def get_password_hash_metrics():
+    """
+    Gets the password hashing pool usage, waiting is the number of queued hashes
+    """
+    return passwords.get_metrics()
+
+
+@router.get("/http-client-metrics", dependencies=[Depends(tpsuperappauth.get_administrator)])
+async def get_http_client_metrics():
+    """
+    Gets the outbound request timings and circuit state per host
+    """
+    return http_client.get_metrics()
+
+
 @router.get("/", response_model=List[SACCOConfigurationWithDetail])
 async def list_configurations(db: AsyncSession = Depends(get_tpsuperapp_db)):
     result = await db.execute(
@@ -1,13 +1,14 @@
+from datetime import date
 from uuid import uuid4
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List
+from typing import List, Optional
 from sqlalchemy import desc
 from sqlalchemy.orm import selectinload, noload
-from apps.tpsuperapp import tpsuperapp
-from apps.tpsuperapp.tpsuperappdb import get_tpsuperapp_db
+from apps.tpsuperapp import tpsuperapp, tpsuperappexports
+from apps.tpsuperapp.tpsuperappdb import AsyncSessionLocal, get_tpsuperapp_db
 from apps.tpsuperapp.models.attachment_model import AttachmentDB
 from apps.tpsuperapp.models.bill_rate_model import BillRateDB
 from apps.tpsuperapp.models.customer_model import CustomerDB
@@ -19,7 +20,7 @@ from apps.tpsuperapp.models.meter_reading_model import (
 from apps.tpsuperapp.models.param_models import ParamUploadTaskResult
 from apps.tpsuperapp.models.review_model import AppReview
 from apps.tpsuperapp.models.user_model import UserDB
-from helpers import assist
+from helpers import assist, export
 import random
 from sqlalchemy import or_, desc
 
@@ -383,6 +384,38 @@ async def list_meterreadings(db: AsyncSession = Depends(get_tpsuperapp_db)):
     return result.scalars().all()
 
 
+@router.get("/export")
+async def export_meterreadings(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    period_date: Optional[date] = None,
+    route_id: Optional[int] = None,
+    district_id: Optional[int] = None,
+    format: str = export.FORMAT_XLSX,
+):
+    """
+    Exports the meter readings matching the filters as XLSX or CSV
+
+    Rows are read with a server-side cursor and written as they arrive.
+    """
+    if format not in export.MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The export format '{format}' is not supported",
+        )
+
+    stmt = tpsuperappexports.get_meterreading_export_query(
+        date_from, date_to, period_date, route_id, district_id
+    )
+
+    return export.export_response(
+        export.stream_query(AsyncSessionLocal, stmt),
+        tpsuperappexports.METER_READING_COLUMNS,
+        "meter-readings",
+        format,
+    )
+
+
 @router.put("/review-update/{id}", response_model=MeterReading)
 async def review_posting(
     id: int, review: AppReview, db: AsyncSession = Depends(get_tpsuperapp_db)
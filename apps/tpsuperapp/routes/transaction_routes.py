@@ -5,10 +5,10 @@ from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from sqlalchemy.orm import Session, joinedload, selectinload
-from typing import List
+from typing import List, Optional
 
-from apps.tpsuperapp import tpsuperapp
-from apps.tpsuperapp.tpsuperappdb import get_tpsuperapp_db
+from apps.tpsuperapp import tpsuperapp, tpsuperappexports
+from apps.tpsuperapp.tpsuperappdb import AsyncSessionLocal, get_tpsuperapp_db
 from apps.tpsuperapp.models.customer_model import CustomerDB
 from apps.tpsuperapp.models.transaction_group_model import TransactionGroupDB
 from apps.tpsuperapp.models.transaction_model import (
@@ -20,7 +20,7 @@ from apps.tpsuperapp.models.transaction_model import (
 )
 from apps.tpsuperapp.models.transaction_type_model import TransactionTypeDB
 from apps.tpsuperapp.models.user_model import UserDB
-from helpers import assist
+from helpers import assist, export
 
 import pandas as pd
 import numpy as np
@@ -148,6 +148,37 @@ async def list_transactions(db: AsyncSession = Depends(get_tpsuperapp_db)):
     return transactions
 
 
+@router.get("/export")
+async def export_transactions(
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    route_id: Optional[int] = None,
+    district_id: Optional[int] = None,
+    format: str = export.FORMAT_XLSX,
+):
+    """
+    Exports the transactions matching the filters as XLSX or CSV
+
+    Rows are read with a server-side cursor and written as they arrive.
+    """
+    if format not in export.MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"The export format '{format}' is not supported",
+        )
+
+    stmt = tpsuperappexports.get_transaction_export_query(
+        date_from, date_to, route_id, district_id
+    )
+
+    return export.export_response(
+        export.stream_query(AsyncSessionLocal, stmt),
+        tpsuperappexports.TRANSACTION_COLUMNS,
+        "transactions",
+        format,
+    )
+
+
 @router.get("/customer/{account}", response_model=List[TransactionWithDetail])
 async def list_customer_transactions(
     account: str, db: AsyncSession = Depends(get_tpsuperapp_db)
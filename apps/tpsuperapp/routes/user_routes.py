@@ -16,8 +16,10 @@ from apps.tpsuperapp.models.walkroute_model import (
 )
 from helpers import assist
 from helpers import validation
+from helpers import passwords
 from apps.tpsuperapp.models.review_model import AppReview
 from apps.tpsuperapp.models.user_model import User, UserDB, UserSimple, UserWithDetail
+from apps.tpsuperapp import tpsuperappauth
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -50,7 +52,7 @@ async def create_user(user: User, db: AsyncSession = Depends(get_tpsuperapp_db))
         address_postal=user.address_postal,
         # account
         role_id=user.role_id,
-        password=assist.hash_password(user.password),
+        password=await passwords.hash_password(user.password),
         # approval
         status_id=user.status_id,
         stage_id=user.stage_id,
@@ -199,7 +201,7 @@ async def import_users(
                 address_postal=None,
                 # account
                 role_id=tpsuperapp.ROLE_METERREADER,
-                password=assist.hash_password(email[:5]),
+                password=await passwords.hash_password(email[:5]),
                 # walkr routes
                 walk_routes=routes,
                 # approval
@@ -265,13 +267,16 @@ async def update_configuration(
     for key, value in config_update.dict(exclude_unset=True).items():
         # if password, encrypt
         if key == "password":
-            setattr(user, key, assist.hash_password(value))
+            setattr(user, key, await passwords.hash_password(value))
         else:
             setattr(user, key, value)
 
     try:
         await db.commit()
         await db.refresh(user)
+
+        # the role may have changed
+        tpsuperappauth.invalidate_user_role(user_id)
     except Exception as e:
         await db.rollback()
         raise HTTPException(status_code=400, detail=f"Unable to update user {e}")
@@ -381,7 +386,7 @@ async def initialize(db: AsyncSession = Depends(get_tpsuperapp_db)):
             address_postal=value["address_postal"],
             # account
             role_id=value["role"],
-            password=assist.hash_password(value["password"]),
+            password=await passwords.hash_password(value["password"]),
             # approval
             status_id=value["status_id"],
             stage_id=value["stage_id"],
@@ -1,6 +1,7 @@
 from typing import List
 
 from apps.tpsuperapp.tpsuperappdb import engine, Base
+from apps.tpsuperapp import tpsuperappmigrations
 
 from apps.tpsuperapp.models.bill_rate_model import BillRate
 from apps.tpsuperapp.routes import auth_routes
@@ -97,4 +98,5 @@ def include_tpsuperapp_routes(app):
 async def init_tpsuperapp_db(app):
     async with engine.begin() as conn:
         print("Application tpsuperapp starting up old...")
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(tpsuperappmigrations.upgrade)
\ No newline at end of file
@@ -0,0 +1,185 @@
+from datetime import date
+from typing import Optional
+
+from sqlalchemy.future import select
+
+from apps.tpsuperapp.models.customer_model import CustomerDB
+from apps.tpsuperapp.models.district_model import DistrictDB
+from apps.tpsuperapp.models.meter_reading_model import MeterReadingDB
+from apps.tpsuperapp.models.review_stages_model import ReviewStageDB
+from apps.tpsuperapp.models.status_types_model import StatusTypeDB
+from apps.tpsuperapp.models.transaction_model import TransactionDB
+from apps.tpsuperapp.models.transaction_type_model import TransactionTypeDB
+from apps.tpsuperapp.models.user_model import UserDB
+from apps.tpsuperapp.models.walkroute_model import WalkRouteDB
+from helpers import export
+
+METER_READING_COLUMNS = export.compile_columns(
+    [
+        {"caption": "Account", "dataField": "customer.account"},
+        {"caption": "Customer", "dataField": "customer.name"},
+        {"caption": "District", "dataField": "district.name"},
+        {"caption": "Route", "dataField": "route.name"},
+        {"caption": "Period", "dataField": "period_date", "dataType": "date"},
+        {"caption": "Read Date", "dataField": "read_date", "dataType": "date"},
+        {"caption": "Previous", "dataField": "previous"},
+        {"caption": "Current", "dataField": "current"},
+        {"caption": "Consumption (m3)", "dataField": "consumption_m3"},
+        {"caption": "Days", "dataField": "consumption_days"},
+        {"caption": "Daily (m3)", "dataField": "consumption_daily"},
+        {"caption": "Amount (ZMW)", "dataField": "consumption_zmw"},
+        {"caption": "Access", "dataField": "access_status"},
+        {"caption": "Reading", "dataField": "reading_status"},
+        {"caption": "Condition", "dataField": "condition_status"},
+        {"caption": "Comments", "dataField": "comments"},
+        {"caption": "Status", "dataField": "status.status_name"},
+        {"caption": "Stage", "dataField": "stage.stage_name"},
+        {"caption": "Read By", "dataField": "user.name"},
+    ]
+)
+
+TRANSACTION_COLUMNS = export.compile_columns(
+    [
+        {"caption": "Date", "dataField": "date", "dataType": "date"},
+        {"caption": "Code", "dataField": "code"},
+        {"caption": "Type", "dataField": "type.type_name"},
+        {"caption": "Account", "dataField": "customer.account"},
+        {"caption": "Customer", "dataField": "customer.name"},
+        {"caption": "District", "dataField": "district.name"},
+        {"caption": "Route", "dataField": "route.name"},
+        {"caption": "Amount", "dataField": "amount"},
+        {"caption": "Reference", "dataField": "reference"},
+        {"caption": "Comments", "dataField": "comments"},
+        {"caption": "Status", "dataField": "status.status_name"},
+        {"caption": "Stage", "dataField": "stage.stage_name"},
+        {"caption": "Posted By", "dataField": "user.name"},
+    ]
+)
+
+
+def get_meterreading_export_query(
+    date_from: Optional[date],
+    date_to: Optional[date],
+    period_date: Optional[date],
+    route_id: Optional[int],
+    district_id: Optional[int],
+):
+    """
+    Builds the meter reading report query, one row per reading
+
+    Args:
+        date_from (date): The first read day, in the current time zone.
+        date_to (date): The last read day, included.
+        period_date (date): The billing period.
+        route_id (int): The route of the customers.
+        district_id (int): The district of the customers.
+    """
+    stmt = (
+        select(
+            MeterReadingDB.id,
+            MeterReadingDB.period_date,
+            MeterReadingDB.read_date,
+            MeterReadingDB.previous,
+            MeterReadingDB.current,
+            MeterReadingDB.consumption_m3,
+            MeterReadingDB.consumption_days,
+            MeterReadingDB.consumption_daily,
+            MeterReadingDB.consumption_zmw,
+            MeterReadingDB.access_status,
+            MeterReadingDB.reading_status,
+            MeterReadingDB.condition_status,
+            MeterReadingDB.comments,
+            CustomerDB.account.label("customer.account"),
+            CustomerDB.name.label("customer.name"),
+            DistrictDB.name.label("district.name"),
+            WalkRouteDB.name.label("route.name"),
+            StatusTypeDB.status_name.label("status.status_name"),
+            ReviewStageDB.stage_name.label("stage.stage_name"),
+            (UserDB.fname + " " + UserDB.lname).label("user.name"),
+        )
+        .join(CustomerDB, CustomerDB.id == MeterReadingDB.customer_id)
+        .outerjoin(DistrictDB, DistrictDB.id == CustomerDB.district_id)
+        .outerjoin(WalkRouteDB, WalkRouteDB.id == CustomerDB.route_id)
+        .outerjoin(StatusTypeDB, StatusTypeDB.id == MeterReadingDB.status_id)
+        .outerjoin(ReviewStageDB, ReviewStageDB.id == MeterReadingDB.stage_id)
+        .outerjoin(UserDB, UserDB.id == MeterReadingDB.user_id)
+        .order_by(MeterReadingDB.read_date, MeterReadingDB.id)
+    )
+
+    start, end = export.get_date_range(date_from, date_to)
+
+    if start is not None:
+        stmt = stmt.where(MeterReadingDB.read_date >= start)
+
+    if end is not None:
+        stmt = stmt.where(MeterReadingDB.read_date < end)
+
+    if period_date is not None:
+        stmt = stmt.where(MeterReadingDB.period_date == period_date)
+
+    if route_id is not None:
+        stmt = stmt.where(CustomerDB.route_id == route_id)
+
+    if district_id is not None:
+        stmt = stmt.where(CustomerDB.district_id == district_id)
+
+    return stmt
+
+
+def get_transaction_export_query(
+    date_from: Optional[date],
+    date_to: Optional[date],
+    route_id: Optional[int],
+    district_id: Optional[int],
+):
+    """
+    Builds the transaction report query, one row per transaction
+
+    Args:
+        date_from (date): The first transaction day, in the current time zone.
+        date_to (date): The last transaction day, included.
+        route_id (int): The route of the customers.
+        district_id (int): The district of the customers.
+    """
+    stmt = (
+        select(
+            TransactionDB.id,
+            TransactionDB.date,
+            TransactionDB.code,
+            TransactionDB.amount,
+            TransactionDB.reference,
+            TransactionDB.comments,
+            TransactionTypeDB.type_name.label("type.type_name"),
+            CustomerDB.account.label("customer.account"),
+            CustomerDB.name.label("customer.name"),
+            DistrictDB.name.label("district.name"),
+            WalkRouteDB.name.label("route.name"),
+            StatusTypeDB.status_name.label("status.status_name"),
+            ReviewStageDB.stage_name.label("stage.stage_name"),
+            (UserDB.fname + " " + UserDB.lname).label("user.name"),
+        )
+        .join(CustomerDB, CustomerDB.id == TransactionDB.customer_id)
+        .outerjoin(TransactionTypeDB, TransactionTypeDB.id == TransactionDB.type_id)
+        .outerjoin(DistrictDB, DistrictDB.id == CustomerDB.district_id)
+        .outerjoin(WalkRouteDB, WalkRouteDB.id == CustomerDB.route_id)
+        .outerjoin(StatusTypeDB, StatusTypeDB.id == TransactionDB.status_id)
+        .outerjoin(ReviewStageDB, ReviewStageDB.id == TransactionDB.stage_id)
+        .outerjoin(UserDB, UserDB.id == TransactionDB.user_id)
+        .order_by(TransactionDB.date, TransactionDB.id)
+    )
+
+    start, end = export.get_date_range(date_from, date_to)
+
+    if start is not None:
+        stmt = stmt.where(TransactionDB.date >= start)
+
+    if end is not None:
+        stmt = stmt.where(TransactionDB.date < end)
+
+    if route_id is not None:
+        stmt = stmt.where(CustomerDB.route_id == route_id)
+
+    if district_id is not None:
+        stmt = stmt.where(CustomerDB.district_id == district_id)
+
+    return stmt
@@ -0,0 +1,67 @@
+def index_values(rows, key: str, value: str, convert=float) -> dict:
+    """
+    Indexes a value of grouped query rows by their key
+
+    Args:
+        rows: The grouped rows, e.g. (type_id, amount).
+        key (string): The column the rows are grouped by.
+        value (string): The column kept.
+        convert: The type of the values, so counts and sums read the same
+            whatever the driver returns.
+
+    Returns:
+        dict: The value of each key.
+    """
+    return {getattr(row, key): convert(getattr(row, value)) for row in rows}
+
+
+def pivot(rows, key: str, column: str, value: str, prefix: str = "", convert=float):
+    """
+    Pivots grouped query rows into fields per key, in one pass over the rows
+
+    e.g. (user_id, type_id, amount) rows pivoted on user_id and type_id with
+    the prefix 'tid' give {user_id: {'tid1': amount, 'tid2': amount}}.
+
+    Args:
+        rows: The grouped rows.
+        key (string): The column the items are matched on.
+        column (string): The column naming the fields.
+        value (string): The column of the field values.
+        prefix (string): Prefixed to the column value to name a field.
+        convert: The type of the values.
+
+    Returns:
+        dict: The fields of each key.
+    """
+    table = {}
+
+    for row in rows:
+        fields = table.setdefault(getattr(row, key), {})
+        fields[f"{prefix}{getattr(row, column)}"] = convert(getattr(row, value))
+
+    return table
+
+
+def fill(items: list, table: dict, fields: list, key: str = "id", default=0.0):
+    """
+    Sets fields on each item from a pivot, or to the default where missing
+
+    Args:
+        items (list): The dicts to fill.
+        table (dict): The fields of each key, from pivot.
+        fields (list): The fields every item gets.
+        key (string): The item key matched with the pivot keys.
+        default: The value of fields the pivot does not hold.
+
+    Returns:
+        list: The items.
+    """
+    empty = {}
+
+    for item in items:
+        values = table.get(item[key], empty)
+
+        for field in fields:
+            item[field] = values.get(field, default)
+
+    return items
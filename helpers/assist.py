@@ -1,10 +1,13 @@
 import hashlib
+import os
 from passlib.context import CryptContext
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 import calendar
 
-INFOBIP_API_URL = "https://xk85nl.api.infobip.com/whatsapp/1/message/template"
+INFOBIP_API_URL = os.getenv(
+    "INFOBIP_API_URL", "https://xk85nl.api.infobip.com/whatsapp/1/message/template"
+)
 INFOBIP_API_TOKEN = (
     "05704a467eaab51ea1bd2aabaa652517-c006af8e-55e6-4254-aa46-440344a6e040"
 )
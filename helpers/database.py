@@ -0,0 +1,217 @@
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# defaults, each can be set with DB_<NAME> or <APP>_DB_<NAME> in the environment
+DEFAULT_SETTINGS = {
+    "POOL_SIZE": 10,
+    "MAX_OVERFLOW": 10,
+    "POOL_TIMEOUT": 30,
+    "POOL_RECYCLE": 1800,
+    "POOL_PRE_PING": True,
+    "STATEMENT_CACHE_SIZE": 100,
+    "STATEMENT_TIMEOUT_MS": 30000,
+    "SLOW_QUERY_MS": 0,
+    "ECHO": False,
+}
+
+
+def get_setting(app: str, name: str):
+    """
+    Gets a database setting for an app from the environment
+
+    The app specific variable <APP>_DB_<NAME> is used before the shared
+    DB_<NAME>, and the default is used if neither is set.
+    """
+    default = DEFAULT_SETTINGS[name]
+    value = os.getenv(f"{app.upper()}_DB_{name}", os.getenv(f"DB_{name}"))
+
+    if value is None:
+        return default
+
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    return int(value)
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """
+    A connection pool that records how long checkouts wait for a connection
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+
+        try:
+            return super()._do_get()
+        except Exception:
+            self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+
+            self.checkouts += 1
+            self.wait_total += elapsed
+            self.wait_max = max(self.wait_max, elapsed)
+
+            # checkouts that waited for a returned or newly opened connection
+            if elapsed > 0.001:
+                self.waits += 1
+
+    def recreate(self):
+        pool = super().recreate()
+
+        # keep the metrics when the pool is recreated after a disconnect
+        pool.checkouts = self.checkouts
+        pool.waits = self.waits
+        pool.wait_total = self.wait_total
+        pool.wait_max = self.wait_max
+        pool.timeouts = self.timeouts
+
+        return pool
+
+
+def add_slow_query_logger(engine, app: str, threshold_ms: int):
+    """
+    Logs statements of an engine that take longer than the threshold
+    """
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        elapsed = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+
+        if elapsed >= threshold_ms:
+            logger.warning(f"Slow query on {app} took {elapsed:.0f}ms: {statement}")
+
+
+@contextmanager
+def count_statements(engine):
+    """
+    Records the statements an engine executes inside the block
+
+    Args:
+        engine (AsyncEngine): The engine to watch.
+
+    Yields:
+        list: The statements executed so far, in order.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    try:
+        yield statements
+    finally:
+        event.remove(
+            engine.sync_engine, "before_cursor_execute", before_cursor_execute
+        )
+
+
+def create_app_engine(app: str, default_url: str):
+    """
+    Creates the database engine of an app from the environment
+
+    Args:
+        app (string): The app name, used as the prefix of its variables.
+        default_url (string): The url used if <APP>_DATABASE_URL is not set.
+
+    Returns:
+        AsyncEngine: The configured engine.
+    """
+    url = os.getenv(f"{app.upper()}_DATABASE_URL", default_url)
+
+    connect_args = {
+        "prepared_statement_cache_size": get_setting(app, "STATEMENT_CACHE_SIZE"),
+        "server_settings": {"application_name": app},
+    }
+
+    statement_timeout = get_setting(app, "STATEMENT_TIMEOUT_MS")
+
+    if statement_timeout > 0:
+        connect_args["server_settings"]["statement_timeout"] = str(statement_timeout)
+
+    engine = create_async_engine(
+        url,
+        echo=get_setting(app, "ECHO"),
+        poolclass=MeteredPool,
+        pool_size=get_setting(app, "POOL_SIZE"),
+        max_overflow=get_setting(app, "MAX_OVERFLOW"),
+        pool_timeout=get_setting(app, "POOL_TIMEOUT"),
+        pool_recycle=get_setting(app, "POOL_RECYCLE"),
+        pool_pre_ping=get_setting(app, "POOL_PRE_PING"),
+        connect_args=connect_args,
+    )
+
+    slow_query_ms = get_setting(app, "SLOW_QUERY_MS")
+
+    if slow_query_ms > 0:
+        add_slow_query_logger(engine, app, slow_query_ms)
+
+    return engine
+
+
+def get_pool_metrics(engine):
+    """
+    Gets the usage of the connection pool of an engine
+
+    Args:
+        engine (AsyncEngine): The engine created with create_app_engine.
+
+    Returns:
+        dict: The pool sizes, connections in use and checkout wait times.
+    """
+    pool = engine.pool
+
+    metrics = {"pool": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        metrics.update(
+            {
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+        )
+
+    if isinstance(pool, MeteredPool):
+        metrics.update(
+            {
+                "checkouts": pool.checkouts,
+                "waits": pool.waits,
+                "timeouts": pool.timeouts,
+                "wait_seconds_total": round(pool.wait_total, 6),
+                "wait_seconds_avg": round(pool.wait_total / pool.checkouts, 6)
+                if pool.checkouts
+                else 0.0,
+                "wait_seconds_max": round(pool.wait_max, 6),
+            }
+        )
+
+    return metrics
@@ -0,0 +1,264 @@
+import asyncio
+import csv
+import io
+import tempfile
+from collections.abc import Mapping
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from fastapi.responses import StreamingResponse
+from openpyxl import Workbook
+
+from helpers import assist, pagination
+
+FORMAT_XLSX = "xlsx"
+FORMAT_CSV = "csv"
+
+MEDIA_TYPES = {
+    FORMAT_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    FORMAT_CSV: "text/csv; charset=utf-8",
+}
+
+# bytes read from the finished workbook per chunk sent
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+TIME_ZONE = ZoneInfo(assist.CURRENT_TIME_ZONE)
+
+
+class ExportColumn:
+    """
+    A column of an export with its value accessor compiled once
+    """
+
+    def __init__(self, caption: str, field: str, data_type: str | None = None):
+        self.caption = caption
+        self.field = field
+        self.access = get_accessor(field)
+        self.is_date = data_type == "date"
+
+    def get_value(self, row):
+        value = self.access(row)
+
+        # excel cannot store timezones, so datetimes are always written as text
+        if self.is_date or isinstance(value, datetime):
+            return excel_date(value)
+
+        return value
+
+
+def excel_date(value):
+    """
+    Converts an ISO 8601 string or a date into an Excel friendly string
+
+    Times are shown in the current time zone, naive values are taken as UTC.
+    Days are written as they are.
+
+    Returns:
+        string: 'YYYY-MM-DD' if the time is midnight, otherwise
+            'YYYY-MM-DD HH:MM:SS'. Values that are not dates are returned as is.
+    """
+    if value is None:
+        return None
+
+    if isinstance(value, str):
+        value = value.strip()
+
+        # days have no time to convert
+        if len(value) == 10:
+            return value
+
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        return value.isoformat()
+    elif not isinstance(value, datetime):
+        return value
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    value = value.astimezone(TIME_ZONE)
+
+    if value.time() == time.min:
+        return value.date().isoformat()
+
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def get_date_range(date_from: date | None, date_to: date | None):
+    """
+    Gets the start and the exclusive end of an inclusive range of days
+
+    Days start at midnight in the current time zone, either bound may be None.
+
+    Returns:
+        tuple: The start and end datetimes.
+    """
+    start = None
+    end = None
+
+    if date_from is not None:
+        start = datetime.combine(date_from, time.min, tzinfo=TIME_ZONE)
+
+    if date_to is not None:
+        end = datetime.combine(date_to + timedelta(days=1), time.min, tzinfo=TIME_ZONE)
+
+    return start, end
+
+
+def get_accessor(path: str):
+    """
+    Compiles a dotted field path into a function reading it from a row
+
+    Rows are mappings. A row holding the full path as a key, like the
+    labelled columns of an export query, is read directly, otherwise the
+    path is followed through nested mappings.
+
+    Args:
+        path (string): The field path, e.g. 'status.status_name'.
+
+    Returns:
+        function: Gets the value of a row, or None if the path is missing.
+    """
+    keys = path.split(".")
+
+    if len(keys) == 1:
+        return lambda row: row.get(path) if isinstance(row, Mapping) else None
+
+    def access(row):
+        if not isinstance(row, Mapping):
+            return None
+
+        if path in row:
+            return row[path]
+
+        value = row
+        for key in keys:
+            if not isinstance(value, Mapping):
+                return None
+            value = value.get(key)
+
+        return value
+
+    return access
+
+
+def compile_columns(columns: list[dict]) -> list[ExportColumn]:
+    """
+    Compiles grid column definitions (caption, dataField, dataType)
+    """
+    return [
+        ExportColumn(
+            column.get("caption") or column["dataField"],
+            column["dataField"],
+            column.get("dataType"),
+        )
+        for column in columns
+    ]
+
+
+async def iter_rows(rows: list, size: int = pagination.STREAM_PARTITION_SIZE):
+    """
+    Yields a list of rows in partitions, as stream_query does
+    """
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+async def stream_query(session_factory, stmt):
+    """
+    Yields the rows of a query in partitions read from a server-side cursor
+
+    A session of its own is used, the request session is closed once the
+    response starts.
+
+    Args:
+        session_factory: The sessionmaker of the app database.
+        stmt: A select of labelled columns.
+    """
+    async with session_factory() as session:
+        result = await session.stream(
+            stmt.execution_options(yield_per=pagination.STREAM_PARTITION_SIZE)
+        )
+
+        async for rows in result.mappings().partitions():
+            yield rows
+
+
+def append_rows(sheet, rows, columns: list[ExportColumn]):
+    for row in rows:
+        sheet.append([column.get_value(row) for column in columns])
+
+
+async def write_xlsx(partitions, columns: list[ExportColumn], title="Sheet1"):
+    """
+    Writes partitions of rows to a workbook and yields the file in chunks
+
+    The workbook is write-only, rows go to a temporary file as they are
+    appended, so memory does not grow with the row count.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append([column.caption for column in columns])
+
+    async for rows in partitions:
+        await asyncio.to_thread(append_rows, sheet, rows, columns)
+
+    with tempfile.TemporaryFile() as output:
+        await asyncio.to_thread(workbook.save, output)
+        output.seek(0)
+
+        while chunk := await asyncio.to_thread(output.read, EXPORT_CHUNK_SIZE):
+            yield chunk
+
+
+async def write_csv(partitions, columns: list[ExportColumn]):
+    """
+    Yields partitions of rows as CSV, one chunk per partition
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # the byte order mark lets Excel detect the encoding
+    writer.writerow([column.caption for column in columns])
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    async for rows in partitions:
+        buffer.seek(0)
+        buffer.truncate()
+
+        for row in rows:
+            writer.writerow([column.get_value(row) for column in columns])
+
+        yield buffer.getvalue().encode("utf-8")
+
+
+def export_response(
+    partitions, columns: list[ExportColumn], filename: str, format=FORMAT_XLSX
+):
+    """
+    Streams partitions of rows as an XLSX or CSV attachment
+
+    Args:
+        partitions: Async iterator of row lists, from stream_query or iter_rows.
+        columns (list): The compiled columns to write.
+        filename (string): The file name, without extension.
+        format (string): FORMAT_XLSX or FORMAT_CSV.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if format == FORMAT_XLSX:
+        content = write_xlsx(partitions, columns)
+    elif format == FORMAT_CSV:
+        content = write_csv(partitions, columns)
+    else:
+        raise ValueError(f"The export format '{format}' is not supported")
+
+    return StreamingResponse(
+        content,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename={filename}.{format}"},
+    )
@@ -1,15 +1,208 @@
+import logging
+import os
+import time
+from urllib.parse import urlsplit
+
 import httpx
 
+logger = logging.getLogger(__name__)
+
+# pool and timeout settings, each can be set with HTTP_<NAME> in the environment
+DEFAULT_SETTINGS = {
+    "MAX_CONNECTIONS": 100,
+    "MAX_KEEPALIVE": 20,
+    "KEEPALIVE_EXPIRY": 30.0,
+    "TIMEOUT": 10.0,
+    "CONNECT_TIMEOUT": 5.0,
+    "POOL_TIMEOUT": 5.0,
+    "HTTP2": False,
+    # failures in a row that open the circuit of a host, and seconds it stays open
+    "BREAKER_FAILURES": 5,
+    "BREAKER_COOLDOWN": 30.0,
+}
+
 client: httpx.AsyncClient | None = None
+host_clients: dict[str, httpx.AsyncClient] = {}
+host_metrics: dict[str, "HostMetrics"] = {}
+
+
+class CircuitOpenError(httpx.TransportError):
+    """
+    Raised instead of sending a request to a host whose circuit is open
+    """
+
+
+def get_setting(name: str):
+    default = DEFAULT_SETTINGS[name]
+    value = os.getenv(f"HTTP_{name}")
+
+    if value is None:
+        return default
+
+    if isinstance(default, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+
+    return type(default)(value)
+
+
+class HostMetrics:
+    """
+    Request timings and the circuit breaker state of one host
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+
+        # after the cooldown one request is let through to try the host again
+        if time.monotonic() - self.opened_at >= get_setting("BREAKER_COOLDOWN"):
+            self.opened_at = time.monotonic()
+            return True
+
+        return False
+
+    def record(self, seconds: float, failed: bool):
+        self.requests += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+        if not failed:
+            self.failures = 0
+            self.opened_at = None
+            return
+
+        self.errors += 1
+        self.failures += 1
+
+        if self.failures >= get_setting("BREAKER_FAILURES"):
+            self.opened_at = time.monotonic()
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "avg_seconds": (
+                round(self.total_seconds / self.requests, 6) if self.requests else 0.0
+            ),
+            "max_seconds": round(self.max_seconds, 6),
+            "circuit": "closed" if self.opened_at is None else "open",
+        }
+
+
+class MeteredTransport(httpx.AsyncBaseTransport):
+    """
+    Times requests per host and stops calling hosts that keep failing
+
+    Server errors and transport errors count as failures.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        metrics = host_metrics.setdefault(host, HostMetrics())
+
+        if not metrics.allow():
+            metrics.rejected += 1
+            raise CircuitOpenError(f"Circuit open for {host}", request=request)
+
+        start = time.perf_counter()
+
+        try:
+            response = await self.transport.handle_async_request(request)
+        except httpx.TransportError:
+            metrics.record(time.perf_counter() - start, True)
+            raise
+
+        metrics.record(time.perf_counter() - start, response.status_code >= 500)
+
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def create_client() -> httpx.AsyncClient:
+    """
+    Creates a client with the configured pool limits, timeouts and metrics
+    """
+    http2 = get_setting("HTTP2")
+
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP_HTTP2 is set but h2 is not installed, using HTTP/1.1")
+            http2 = False
+
+    limits = httpx.Limits(
+        max_connections=get_setting("MAX_CONNECTIONS"),
+        max_keepalive_connections=get_setting("MAX_KEEPALIVE"),
+        keepalive_expiry=get_setting("KEEPALIVE_EXPIRY"),
+    )
+
+    timeout = httpx.Timeout(
+        get_setting("TIMEOUT"),
+        connect=get_setting("CONNECT_TIMEOUT"),
+        pool=get_setting("POOL_TIMEOUT"),
+    )
+
+    transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+
+    return httpx.AsyncClient(timeout=timeout, transport=MeteredTransport(transport))
+
 
 async def init_client():
     global client
-    client = httpx.AsyncClient(timeout=10.0)
+    client = create_client()
+
 
 async def close_client():
     global client
     if client:
         await client.aclose()
-        
-def get_http_client():
-    return client
\ No newline at end of file
+
+    for hostClient in host_clients.values():
+        await hostClient.aclose()
+
+    host_clients.clear()
+
+
+def get_http_client(url: str | None = None):
+    """
+    Gets the shared client, or the client of the host of a url
+
+    Each host has its own connection pool, so a slow provider can only
+    hold its own connections.
+
+    Args:
+        url (string): The url that will be called. The shared client is
+            returned if not given.
+    """
+    if url is None:
+        return client
+
+    host = urlsplit(url).netloc
+
+    if host not in host_clients:
+        host_clients[host] = create_client()
+
+    return host_clients[host]
+
+
+def get_metrics():
+    """
+    Gets the request timings and circuit state of every host called
+    """
+    return {host: metrics.to_dict() for host, metrics in host_metrics.items()}
@@ -0,0 +1,108 @@
+import asyncio
+import csv
+
+# rows handed on at a time when reading an import file
+INGEST_BATCH_SIZE = 2000
+
+
+class IngestError(ValueError):
+    """
+    Raised when an import file is missing a column or holds an invalid value
+    """
+
+
+def compile_converters(header: list, schema: dict):
+    """
+    Matches the columns of a schema to their position in a CSV header
+
+    Args:
+        header (list): The header row of the file.
+        schema (dict): The converter (e.g. float or str) of each column kept.
+
+    Returns:
+        list: The (column, position, converter) of each column of the schema.
+
+    Raises:
+        IngestError: If a column of the schema is not in the header.
+    """
+    positions = {name.strip(): i for i, name in enumerate(header)}
+    missing = [name for name in schema if name not in positions]
+
+    if missing:
+        raise IngestError(f"The file is missing the column(s) {', '.join(missing)}")
+
+    return [(name, positions[name], convert) for name, convert in schema.items()]
+
+
+def iter_csv_rows(path: str, schema: dict):
+    """
+    Reads the rows of a CSV file one at a time, converted to the schema
+
+    Blank rows are skipped.
+
+    Args:
+        path (string): The file to read, UTF-8 with or without a BOM.
+        schema (dict): The converter of each column kept, by column name.
+
+    Yields:
+        dict: The converted values of a row, by column name.
+
+    Raises:
+        IngestError: If a column is missing or a value can not be converted.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as source:
+        reader = csv.reader(source)
+        converters = compile_converters(next(reader, []), schema)
+        width = max(position for _, position, _ in converters) + 1
+
+        for row in reader:
+            if not any(value.strip() for value in row):
+                continue
+
+            if len(row) < width:
+                row = row + [""] * (width - len(row))
+
+            try:
+                yield {name: convert(row[i]) for name, i, convert in converters}
+            except ValueError as e:
+                raise IngestError(f"Invalid value on line {reader.line_num}: {e}")
+
+
+def iter_batches(rows, size: int = INGEST_BATCH_SIZE):
+    """
+    Groups rows into lists of at most size rows
+    """
+    batch = []
+
+    for row in rows:
+        batch.append(row)
+
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def read_csv_batches(path: str, schema: dict, size: int = INGEST_BATCH_SIZE):
+    """
+    Reads a CSV file in batches of converted rows, parsing off the event loop
+
+    Only one batch is held at a time, whatever the size of the file.
+
+    Args:
+        path (string): The file to read.
+        schema (dict): The converter of each column kept, by column name.
+        size (int): The rows per batch.
+
+    Yields:
+        list: The next batch of rows.
+    """
+    batches = iter_batches(iter_csv_rows(path, schema), size)
+
+    try:
+        while batch := await asyncio.to_thread(next, batches, None):
+            yield batch
+    finally:
+        batches.close()
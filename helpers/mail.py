@@ -0,0 +1,219 @@
+import asyncio
+import logging
+import os
+import smtplib
+import time
+from email.message import EmailMessage
+
+logger = logging.getLogger(__name__)
+
+# messages sent per session use and time an idle session is kept open
+MAIL_BATCH_SIZE = 50
+MAIL_IDLE_TIMEOUT = 60
+
+# attempts for a batch when the server fails, with the delay doubling each time
+MAIL_RETRIES = 3
+MAIL_BACKOFF = 1.0
+
+# sessions use STARTTLS and log in, plain SMTP only for a local debugging server
+MAIL_ALLOW_PLAIN = os.getenv("MAIL_ALLOW_PLAIN", "").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+
+_senders = {}
+
+
+def is_transient_error(e: Exception) -> bool:
+    """
+    Whether an SMTP error may pass on a new session, e.g. a dropped connection
+    """
+    if isinstance(e, smtplib.SMTPResponseException):
+        return e.smtp_code < 500
+
+    return isinstance(e, (smtplib.SMTPServerDisconnected, OSError))
+
+
+class MailSender:
+    """
+    Sends queued messages over one authenticated SMTP session per server
+
+    smtplib is blocking, so the session is used from a worker thread and
+    only one batch uses it at a time. Callers only wait to queue a message.
+    """
+
+    def __init__(self, server: str, port: int, user: str, password: str):
+        self.server = server
+        self.port = port
+        self.user = user
+        self.password = password
+
+        self.queue = asyncio.Queue()
+        self.smtp: smtplib.SMTP | None = None
+        self.last_used = 0.0
+        self.sent = 0
+        self.failed = 0
+        self.task: asyncio.Task | None = None
+
+    def _connect(self):
+        smtp = smtplib.SMTP(self.server, self.port, timeout=30)
+
+        try:
+            smtp.ehlo()
+
+            # raise when not offered, so credentials never go in cleartext
+            if not MAIL_ALLOW_PLAIN:
+                smtp.starttls()
+                smtp.ehlo()
+
+            smtp.login(self.user, self.password)
+        except BaseException:
+            smtp.close()
+            raise
+
+        return smtp
+
+    def _close(self):
+        if self.smtp is not None:
+            try:
+                self.smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+
+            self.smtp = None
+
+    def _send_batch(self, messages: list):
+        # reopen sessions the server may have dropped while idle
+        if self.smtp is not None and time.monotonic() - self.last_used > 10:
+            try:
+                self.smtp.noop()
+            except (smtplib.SMTPException, OSError):
+                self.smtp = None
+
+        if self.smtp is None:
+            self.smtp = self._connect()
+
+        # sent messages are removed so a retry does not send them again
+        while messages:
+            try:
+                self.smtp.send_message(messages[0])
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError) as e:
+                # data the server may take later is sent again on a retry
+                if isinstance(e, smtplib.SMTPDataError) and is_transient_error(e):
+                    raise
+
+                # refused for this message only, the session is reset by smtplib
+                self.failed += 1
+                logger.error(f"Unable to send email to {messages[0]['To']}: {e}")
+            else:
+                self.sent += 1
+
+            messages.pop(0)
+
+        self.last_used = time.monotonic()
+
+    async def _send(self, messages: list):
+        for attempt in range(MAIL_RETRIES):
+            try:
+                await asyncio.to_thread(self._send_batch, messages)
+                return
+            except (smtplib.SMTPException, OSError) as e:
+                # start over on a new session
+                await asyncio.to_thread(self._close)
+
+                # e.g. failed logins are not retried
+                if attempt == MAIL_RETRIES - 1 or not is_transient_error(e):
+                    self.failed += len(messages)
+                    logger.error(
+                        f"Unable to send {len(messages)} email(s) via {self.server}: {e}"
+                    )
+                    return
+
+                await asyncio.sleep(MAIL_BACKOFF * 2**attempt)
+
+    async def run(self):
+        while True:
+            try:
+                message = await asyncio.wait_for(
+                    self.queue.get(), timeout=MAIL_IDLE_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                # nothing to send for a while, let the session go
+                await asyncio.to_thread(self._close)
+                continue
+
+            # send whatever else is already waiting in the same batch
+            messages = [message]
+
+            while len(messages) < MAIL_BATCH_SIZE and not self.queue.empty():
+                messages.append(self.queue.get_nowait())
+
+            try:
+                await self._send(list(messages))
+            finally:
+                for _ in messages:
+                    self.queue.task_done()
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+
+def get_sender(config) -> MailSender:
+    """
+    Gets the sender for the SMTP settings of a configuration
+    """
+    key = (config.smtp_server, config.smtp_port, config.smtp_user, config.smtp_password)
+    sender = _senders.get(key)
+
+    if sender is None:
+        sender = _senders[key] = MailSender(*key)
+
+    sender.start()
+
+    return sender
+
+
+def queue_email(to: str, subject: str, body: str, config) -> MailSender:
+    """
+    Queues an email to be sent with the SMTP settings of a configuration
+
+    Args:
+        to (string): The recipient.
+        subject (string): The subject.
+        body (string): The plain text body.
+        config: The configuration with the smtp_* settings.
+
+    Returns:
+        MailSender: The sender the message was queued on.
+    """
+    msg = EmailMessage()
+    msg["From"] = config.smtp_user
+    msg["To"] = to
+    msg["Subject"] = subject
+    msg.set_content(body)
+
+    sender = get_sender(config)
+    sender.queue.put_nowait(msg)
+
+    return sender
+
+
+async def close_senders(timeout: float = 10):
+    """
+    Sends what is queued, within the timeout, and closes all sessions
+    """
+    for sender in list(_senders.values()):
+        try:
+            await asyncio.wait_for(sender.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Unsent email(s) left for {sender.server}")
+
+        if sender.task is not None:
+            sender.task.cancel()
+
+        await asyncio.to_thread(sender._close)
+
+    _senders.clear()
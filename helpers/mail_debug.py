@@ -0,0 +1,97 @@
+import asyncio
+import base64
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# messages accepted by the debugging server, newest last, for tests to check
+received = []
+
+
+async def handle_debug_client(reader, writer):
+    """
+    Answers one SMTP session, accepting any login and every message
+    """
+
+    async def reply(line: str):
+        writer.write(f"{line}\r\n".encode())
+        await writer.drain()
+
+    await reply("220 localhost debugging SMTP")
+
+    sender = None
+    recipients = []
+
+    while line := await reader.readline():
+        command = line.decode(errors="replace").strip()
+        verb = command.split(" ")[0].upper()
+
+        if verb == "EHLO":
+            await reply("250-localhost\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME")
+        elif verb == "AUTH":
+            # accept any credentials, asking for them if not sent inline
+            if command.upper().startswith("AUTH LOGIN"):
+                for prompt in ("Username:", "Password:"):
+                    await reply(f"334 {base64.b64encode(prompt.encode()).decode()}")
+                    await reader.readline()
+
+            await reply("235 Authentication successful")
+        elif verb == "MAIL":
+            sender = command.partition(":")[2].strip()
+            recipients = []
+            await reply("250 OK")
+        elif verb == "RCPT":
+            recipients.append(command.partition(":")[2].strip())
+            await reply("250 OK")
+        elif verb == "DATA":
+            await reply("354 End data with <CR><LF>.<CR><LF>")
+
+            data = []
+            while (line := await reader.readline()) not in (b".\r\n", b""):
+                data.append(line)
+
+            message = b"".join(data)
+            received.append((sender, recipients, message))
+
+            logger.info(
+                f"Message from {sender} to {', '.join(recipients)}, {len(message)} bytes"
+            )
+            await reply("250 OK")
+        elif verb == "QUIT":
+            await reply("221 Bye")
+            break
+        else:
+            await reply("250 OK")
+
+    writer.close()
+
+
+async def start_debug_server(port: int = 1025):
+    """
+    Starts the debugging server on 127.0.0.1, e.g. from a test
+
+    Args:
+        port (int): The port to listen on.
+
+    Returns:
+        asyncio.Server: The server, close it when done.
+    """
+    return await asyncio.start_server(handle_debug_client, "127.0.0.1", port)
+
+
+async def run_debug_server(port: int):
+    server = await start_debug_server(port)
+
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    # python -m helpers.mail_debug [port], with MAIL_ALLOW_PLAIN=1 on the app
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 1025
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logger.info(f"Debugging SMTP server listening on 127.0.0.1:{port}")
+
+    asyncio.run(run_debug_server(port))
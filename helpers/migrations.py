@@ -0,0 +1,187 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.future import select
+
+# applied migrations are tracked per database
+migration_table = Table(
+    "schema_migrations",
+    MetaData(),
+    Column("id", String, primary_key=True),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def get_index(model, name: str):
+    """
+    Gets an index declared on a model by name
+
+    Args:
+        model: The SQLAlchemy model declaring the index.
+        name (string): The name of the index.
+
+    Returns:
+        Index: The declared index.
+    """
+    for index in model.__table__.indexes:
+        if index.name == name:
+            return index
+
+    raise KeyError(f"The model '{model.__name__}' has no index '{name}'")
+
+
+def create_indexes(*indexes):
+    """
+    Creates a migration step that adds declared indexes missing in the database
+
+    Tables created by create_all already have the indexes, so only databases
+    created before the indexes were declared are changed.
+    """
+
+    def step(conn):
+        inspector = inspect(conn)
+
+        for index in indexes:
+            existing = {
+                item["name"] for item in inspector.get_indexes(index.table.name)
+            }
+
+            if index.name not in existing:
+                index.create(conn)
+
+    return step
+
+
+def add_columns(model, *names: str):
+    """
+    Creates a migration step that adds declared columns missing in the database
+
+    Columns are added as declared but nullable, existing rows are left empty.
+
+    Args:
+        model: The SQLAlchemy model declaring the columns.
+        names (string): The names of the columns.
+    """
+
+    def step(conn):
+        table = model.__table__
+        existing = {item["name"] for item in inspect(conn).get_columns(table.name)}
+
+        for name in names:
+            if name in existing:
+                continue
+
+            column = table.c[name]
+            type = column.type.compile(dialect=conn.dialect)
+
+            conn.execute(
+                text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {type}')
+            )
+
+    return step
+
+
+def run_migrations(conn, migrations):
+    """
+    Applies the migrations that have not yet been applied, in order
+
+    Args:
+        conn: A synchronous connection, e.g. from AsyncConnection.run_sync.
+        migrations (list): (id, step) pairs where step takes the connection.
+
+    Returns:
+        list: The ids of the migrations applied.
+    """
+    migration_table.create(conn, checkfirst=True)
+
+    applied = set(conn.execute(select(migration_table.c.id)).scalars().all())
+
+    done = []
+
+    for id, step in migrations:
+        if id in applied:
+            continue
+
+        step(conn)
+
+        conn.execute(
+            migration_table.insert().values(
+                id=id, applied_at=datetime.now(timezone.utc)
+            )
+        )
+        done.append(id)
+
+    return done
+
+
+def get_plan_indexes(plan) -> set:
+    """
+    Gets the names of all indexes used anywhere in an EXPLAIN JSON plan
+    """
+    names = set()
+
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+
+    for child in plan.get("Plans", []):
+        names |= get_plan_indexes(child)
+
+    return names
+
+
+def explain_indexes(conn, stmt) -> set:
+    """
+    Gets the indexes the planner uses for a statement when index scans are possible
+
+    Sequential scans are disabled for the check so that small tables still
+    show whether an index is usable for the predicate.
+
+    Args:
+        conn: A synchronous connection, e.g. from AsyncConnection.run_sync.
+        stmt: The select statement to explain.
+
+    Returns:
+        set: The names of the indexes in the plan.
+    """
+    # named parameters so the compiled statement can be wrapped in text
+    compiled = stmt.compile(dialect=postgresql.dialect(paramstyle="named"))
+
+    # the setting is undone when the savepoint is rolled back
+    savepoint = conn.begin_nested()
+
+    try:
+        conn.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = conn.execute(
+            text(f"EXPLAIN (FORMAT JSON) {compiled}"), compiled.params
+        ).scalar()
+    finally:
+        savepoint.rollback()
+
+    return get_plan_indexes(plan[0]["Plan"])
+
+
+def check_queries(conn, queries):
+    """
+    Checks that each hot query is planned with its expected index
+
+    Run against a populated database. With empty tables the planner has no
+    statistics and may pick any usable index over the expected one.
+
+    Args:
+        conn: A synchronous connection, e.g. from AsyncConnection.run_sync.
+        queries (list): (name, statement, index name) triples.
+
+    Returns:
+        list: (name, index name, used indexes) of the queries that do not use
+        their index. Empty when every query does.
+    """
+    failed = []
+
+    for name, stmt, index in queries:
+        used = explain_indexes(conn, stmt)
+
+        if index not in used:
+            failed.append((name, index, used))
+
+    return failed
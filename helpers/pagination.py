@@ -0,0 +1,62 @@
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+STREAM_PARTITION_SIZE = 500
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encodes the keyset values of the last row of a page into an opaque cursor
+
+    Args:
+        values: The keyset values (e.g. read date and id) of the last row.
+
+    Returns:
+        string: The url-safe cursor string to pass back for the next page.
+    """
+    payload = json.dumps(list(values), default=str, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    Decodes a cursor created by encode_cursor back into its keyset values
+
+    Args:
+        cursor (string): The cursor to decode.
+
+    Returns:
+        list: The keyset values in the order they were encoded.
+
+    Raises:
+        ValueError: If the cursor is not a valid encoded cursor.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        values = json.loads(payload.decode("utf-8"))
+    except Exception as e:
+        raise ValueError(f"Invalid cursor '{cursor}': {e}")
+
+    if not isinstance(values, list):
+        raise ValueError(f"Invalid cursor '{cursor}'")
+
+    return values
+
+
+def get_page_size(limit: int) -> int:
+    """
+    Clamps a requested page size to the allowed range
+
+    Args:
+        limit (int): The requested page size.
+
+    Returns:
+        int: The page size to use.
+    """
+    if limit is None or limit < 1:
+        return DEFAULT_PAGE_SIZE
+
+    return min(limit, MAX_PAGE_SIZE)
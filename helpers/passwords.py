@@ -0,0 +1,77 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from helpers import assist
+
+# argon2 releases the GIL while hashing, so threads run hashes in parallel
+HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+
+_executor = ThreadPoolExecutor(
+    max_workers=HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_slots = asyncio.Semaphore(HASH_WORKERS)
+
+# only changed on the event loop
+_metrics = {"running": 0, "waiting": 0, "max_waiting": 0, "completed": 0}
+
+
+async def _offload(func, *args):
+    _metrics["waiting"] += 1
+    _metrics["max_waiting"] = max(_metrics["max_waiting"], _metrics["waiting"])
+
+    try:
+        await _slots.acquire()
+    finally:
+        _metrics["waiting"] -= 1
+
+    _metrics["running"] += 1
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, func, *args)
+    finally:
+        _metrics["running"] -= 1
+        _metrics["completed"] += 1
+        _slots.release()
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hashes a plain password without blocking the event loop
+
+    Args:
+        password (string): The plain password.
+
+    Returns:
+        string: The hashed password.
+    """
+    return await _offload(assist.hash_password, password)
+
+
+async def hash_passwords(passwords: list) -> list:
+    """
+    Hashes several plain passwords at once, e.g. for imports
+    """
+    return await asyncio.gather(*(hash_password(password) for password in passwords))
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verifies a plain password against a hash without blocking the event loop
+
+    Args:
+        plain_password (string): The plain password.
+        hashed_password (string): The stored hash.
+
+    Returns:
+        bool: Whether the password matches.
+    """
+    return await _offload(assist.verify_password, plain_password, hashed_password)
+
+
+def get_metrics():
+    """
+    Gets the hashing pool usage. waiting is the queue depth
+    """
+    return {"workers": HASH_WORKERS, **_metrics}
@@ -0,0 +1,73 @@
+import math
+import time
+from collections import deque
+
+
+class RateLimiter:
+    """
+    Limits how many times a key, such as a username, may act within a window
+
+    Attempts over the limit are rejected straight away instead of being
+    delayed, so a throttled caller never holds up the event loop.
+    """
+
+    def __init__(self, limit: int, window: float, maxkeys: int = 10000):
+        self.limit = limit
+        self.window = window
+        self.maxkeys = maxkeys
+        self._hits = {}
+
+    def _prune(self, hits: deque, now: float):
+        while hits and hits[0] <= now - self.window:
+            hits.popleft()
+
+    def hit(self, key) -> float:
+        """
+        Records an attempt for a key if it is within the limit
+
+        Args:
+            key: The key being limited.
+
+        Returns:
+            float: 0 if the attempt is allowed, otherwise the seconds until
+            the key may try again.
+        """
+        now = time.monotonic()
+        hits = self._hits.get(key)
+
+        if hits is None:
+            if len(self._hits) >= self.maxkeys:
+                self.sweep(now)
+
+            hits = self._hits[key] = deque()
+
+        self._prune(hits, now)
+
+        if len(hits) >= self.limit:
+            return hits[0] + self.window - now
+
+        hits.append(now)
+        return 0
+
+    def sweep(self, now: float | None = None):
+        """
+        Drops the keys with no attempts left in the window
+        """
+        now = time.monotonic() if now is None else now
+
+        for key in list(self._hits):
+            hits = self._hits[key]
+            self._prune(hits, now)
+
+            if not hits:
+                del self._hits[key]
+
+    def reset(self, key):
+        self._hits.pop(key, None)
+
+
+def retry_after(seconds: float) -> int:
+    """
+    Gets the whole seconds to send in the Retry-After header of a rejection
+    """
+    return max(1, math.ceil(seconds))
@@ -0,0 +1,76 @@
+import asyncio
+import hashlib
+import os
+import uuid
+
+from fastapi import UploadFile
+
+from helpers import assist
+
+# bytes read from an upload and written to disk at a time
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# folder of the content addressed files, inside the upload folder
+BLOB_DIR = "blobs"
+
+
+def get_file(path: str):
+    """
+    Gets the location on disk of the path stored on an attachment
+    """
+    return os.path.join(assist.UPLOAD_DIR, path)
+
+
+def write_chunk(output, hasher, chunk: bytes):
+    hasher.update(chunk)
+    output.write(chunk)
+
+
+async def store_upload(file: UploadFile) -> dict:
+    """
+    Streams an upload to disk, stored once per distinct content
+
+    The upload is hashed while it is written in chunks from a worker
+    thread. Files are named by their SHA-256 and extension, so an upload
+    of content already stored, like a photo sent again on a retry, keeps
+    the stored file and drops the new copy.
+
+    Stored files are shared by the attachments of every app and are not
+    removed when an upload is rejected.
+
+    Args:
+        file (UploadFile): The upload, read from its current position.
+
+    Returns:
+        dict: The path relative to the upload folder, filesize and sha256.
+    """
+    ext = os.path.splitext(file.filename or "")[1].lower()
+
+    folder = get_file(BLOB_DIR)
+    await asyncio.to_thread(os.makedirs, folder, exist_ok=True)
+
+    temp = os.path.join(folder, f".{uuid.uuid4().hex}.part")
+    hasher = hashlib.sha256()
+    size = 0
+
+    try:
+        with await asyncio.to_thread(open, temp, "wb") as output:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await asyncio.to_thread(write_chunk, output, hasher, chunk)
+                size += len(chunk)
+
+        sha256 = hasher.hexdigest()
+        path = f"{BLOB_DIR}/{sha256[:2]}/{sha256}{ext}"
+        target = get_file(path)
+
+        if await asyncio.to_thread(os.path.exists, target):
+            await asyncio.to_thread(os.remove, temp)
+        else:
+            await asyncio.to_thread(os.makedirs, os.path.dirname(target), exist_ok=True)
+            await asyncio.to_thread(os.replace, temp, target)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+    return {"path": path, "filesize": size, "sha256": sha256}
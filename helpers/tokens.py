@@ -0,0 +1,59 @@
+import time
+
+from fastapi import HTTPException
+from jose import JWTError, jwt
+
+from helpers import assist
+from helpers.cache import TTLCache
+
+# decoded claims keyed by token hash, never kept past the token expiry
+CLAIMS_TTL = 300
+
+claims_cache = TTLCache(ttl=CLAIMS_TTL, maxsize=4096)
+
+
+def get_unauthorized(detail: str):
+    return HTTPException(
+        status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"}
+    )
+
+
+def decode_token(token: str, audience: str) -> dict:
+    """
+    Verifies a bearer token and gets its claims
+
+    Tokens seen before are served from the cache without decoding again.
+
+    Args:
+        token (string): The token issued by /auth/login.
+        audience (string): The app the token must be issued for.
+
+    Returns:
+        dict: The claims of the token.
+    """
+    key = assist.encode_sha256(f"{audience}|{token}")
+    claims = claims_cache.get(key)
+
+    if claims is not None:
+        return claims
+
+    try:
+        claims = jwt.decode(
+            token,
+            assist.SECRET_KEY,
+            algorithms=[assist.ALGORITHM],
+            audience=audience,
+            options={"require_aud": True, "require_exp": True},
+        )
+    except JWTError:
+        raise get_unauthorized("The specified token is invalid or has expired")
+
+    if "userid" not in claims:
+        raise get_unauthorized("The specified token has no user")
+
+    ttl = min(CLAIMS_TTL, claims["exp"] - time.time())
+
+    if ttl > 0:
+        claims_cache.set(key, claims, ttl)
+
+    return claims
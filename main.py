@@ -2,8 +2,10 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
 from helpers.http_client import init_client, close_client
+from helpers.mail import close_senders
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
@@ -61,6 +63,9 @@ app.add_middleware(
         allow_headers=["*"],  # Allows all headers
     )
 
+# compress larger responses for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
 # SSL
 '''
 app.add_middleware(
@@ -93,6 +98,7 @@ async def startup():
 @app.on_event("shutdown")
 async def shutdown_event():
     await close_client()
+    await close_senders()
     
 def get_httpsx_client():
     return app.state.client
\ No newline at end of file
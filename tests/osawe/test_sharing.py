@@ -0,0 +1,42 @@
+import json
+import math
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from apps.osawe import osawesharing
+
+# inputs and output of the sharing before it was computed on month matrices
+GOLDEN = json.loads(
+    (Path(__file__).parent / "fixtures" / "sharing_golden.json").read_text()
+)
+
+
+def assert_close(actual, expected, path="sharing"):
+    if isinstance(expected, dict):
+        assert actual.keys() == expected.keys(), path
+        for key, value in expected.items():
+            assert_close(actual[key], value, f"{path}.{key}")
+    elif isinstance(expected, list):
+        assert len(actual) == len(expected), path
+        for i, value in enumerate(expected):
+            assert_close(actual[i], value, f"{path}[{i}]")
+    elif isinstance(expected, (int, float)) and not isinstance(expected, bool):
+        assert math.isclose(actual, expected, rel_tol=1e-9, abs_tol=1e-6), path
+    else:
+        assert actual == expected, path
+
+
+@pytest.mark.parametrize("case", ["interest", "payout"])
+def test_compute_sharing_matches_golden_output(case):
+    members = [SimpleNamespace(**member) for member in GOLDEN["members"]]
+    member_rows = [SimpleNamespace(**row) for row in GOLDEN["member_rows"]]
+    group_rows = [SimpleNamespace(**row) for row in GOLDEN["group_rows"]]
+
+    summary = osawesharing.compute_sharing(
+        members, member_rows, group_rows, GOLDEN[case]["pool"]
+    )
+
+    # compared as served, the routes return it as JSON
+    assert_close(json.loads(json.dumps(summary)), GOLDEN[case]["expected"])